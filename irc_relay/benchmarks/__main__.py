@@ -0,0 +1,51 @@
+"""Run the benchmarks, `python -m irc_relay.benchmarks [benchmark [arguments]]`.
+
+Every benchmark runs in turn with its defaults, unless one is named, then only that one runs and is handed the rest of
+the arguments.
+"""
+
+import sys
+
+from irc_relay.benchmarks import dispatcher, end_to_end, ingest, processor, rate_limit, templates, transport
+
+BENCHMARKS = {
+    "rate_limit": ("rate limiter", rate_limit),
+    "processor": ("message processor", processor),
+    "templates": ("message templates", templates),
+    "ingest": ("ingest decoding", ingest),
+    "dispatcher": ("dispatcher", dispatcher),
+    "transport": ("outbound transport", transport),
+    "end_to_end": ("end to end", end_to_end),
+}
+
+# Benchmarks whose main() takes arguments, the others run the same way every time
+_TAKES_ARGUMENTS = {"end_to_end"}
+
+
+def _run(name: str, arguments: list[str]) -> None:
+    benchmark = BENCHMARKS[name][1]
+    if name in _TAKES_ARGUMENTS:
+        benchmark.main(arguments)
+    else:
+        benchmark.main()
+
+
+def main(argv: list[str]) -> None:
+    if not argv:
+        for name, (title, _) in BENCHMARKS.items():
+            print(f"== {title}")
+            _run(name, [])
+            print()
+        return
+
+    name, *arguments = argv
+    if name not in BENCHMARKS:
+        sys.exit(f"Unknown benchmark {name!r}, expected one of: {', '.join(BENCHMARKS)}")
+    if arguments and name not in _TAKES_ARGUMENTS:
+        sys.exit(f"The {name} benchmark takes no arguments")
+
+    _run(name, arguments)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
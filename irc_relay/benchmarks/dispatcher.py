@@ -0,0 +1,65 @@
+"""Per message overhead of MessageDispatcher fan-out, run with `python -m irc_relay.benchmarks.dispatcher`."""
+
+import asyncio
+import time
+
+from irc_relay.messages.dispatcher import EditMessageReceiver, MessageDispatcher, MessageReceiver, WarnedUserReceiver
+from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+
+ITERATIONS = 100_000
+
+
+class _NullReceiver(MessageReceiver, EditMessageReceiver, WarnedUserReceiver):
+    def __init__(self, non_blocking: bool) -> None:
+        self.non_blocking = non_blocking
+
+    async def send(self, message: TextMessage) -> None:
+        pass
+
+    async def send_edit(self, edit: ProcessedEdit) -> None:
+        pass
+
+    async def send_user_warning(self, warn: WarnedUser) -> None:
+        pass
+
+
+class _GatherDispatcher(MessageDispatcher):
+    """The previous implementation; filters receivers per call and always gathers."""
+
+    async def send_edit(self, edit: ProcessedEdit) -> None:
+        edit_receivers = [r for r in self._receivers if isinstance(r, EditMessageReceiver)]
+        await asyncio.gather(*[receiver.send_edit(edit) for receiver in edit_receivers])
+
+
+async def _benchmark(name: str, dispatcher: MessageDispatcher) -> None:
+    edit = ProcessedEdit(
+        change=EditChange(title="Title", user="User", url="https://en.wikipedia.org/", revision_id=1),
+        reverted=True,
+        comment=None,
+        score=0.9,
+    )
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await dispatcher.send_edit(edit)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<50} {elapsed / ITERATIONS * 1e9:>8.0f} ns/message")
+
+
+async def _main():
+    for receivers in (1, 3):
+        for dispatcher_class in (_GatherDispatcher, MessageDispatcher):
+            for non_blocking in (False, True):
+                dispatcher = dispatcher_class()
+                for _ in range(receivers):
+                    dispatcher.add_receiver(_NullReceiver(non_blocking))
+                label = "non-blocking" if non_blocking else "blocking"
+                await _benchmark(f"{dispatcher_class.__name__} ({receivers} x {label})", dispatcher)
+
+
+def main():
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
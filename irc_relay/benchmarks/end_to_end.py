@@ -0,0 +1,117 @@
+"""HTTP PUT to PRIVMSG-on-the-wire benchmark of the full relay stack against an in-process fake IRC server.
+
+Run with `python -m irc_relay.benchmarks.end_to_end [messages] [connections]`.
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import statistics
+import sys
+import time
+
+from irc_relay.benchmarks.fake_irc import FakeIrcServer
+from irc_relay.http_api.server import HttpServer
+from irc_relay.messages.dispatcher import IrcReceiver, MessageDispatcher
+from irc_relay.senders.irc import IrcClient
+
+CHANNEL = "#benchmark"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until(predicate, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Gave up waiting")
+        await asyncio.sleep(0.01)
+
+
+async def _put(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, port: int, body: bytes) -> int:
+    writer.write(
+        f"PUT / HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("utf-8") + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split(b" ")[1])
+    content_length = 0
+    while (header := await reader.readline()) != b"\r\n":
+        name, _, value = header.partition(b":")
+        if name.strip().lower() == b"content-length":
+            content_length = int(value)
+    await reader.readexactly(content_length)
+    return status
+
+
+async def _send_messages(port: int, ids: list[int], sent_at: dict[int, float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for message_id in ids:
+            body = json.dumps({"channel": CHANNEL, "string": f"benchmark {message_id}"}).encode("utf-8")
+            sent_at[message_id] = time.perf_counter()
+            if (status := await _put(reader, writer, port, body)) >= 300:
+                raise RuntimeError(f"Unexpected HTTP status {status}")
+    finally:
+        writer.close()
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percentile) - 1]
+
+
+async def _run(messages: int, connections: int) -> None:
+    irc_server = FakeIrcServer()
+    await irc_server.start()
+
+    # No rate limiter, we want to measure the relay rather than the configured budget
+    client = IrcClient("127.0.0.1", irc_server.port, "CBNGBenchmark", "bench", "bench", [CHANNEL], None, messages)
+    client_task = asyncio.create_task(client.run())
+    await _wait_until(lambda: client.can_accept_messages(CHANNEL))
+
+    dispatcher = MessageDispatcher()
+    dispatcher.add_receiver(IrcReceiver(client))
+    http_port = _free_port()
+    http_server = HttpServer("127.0.0.1", http_port, dispatcher, access_log=False)
+    http_task = asyncio.create_task(http_server.run())
+    await _wait_until(lambda: http_server._server is not None and http_server._server.started)
+
+    sent_at: dict[int, float] = {}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[_send_messages(http_port, list(range(n, messages, connections)), sent_at) for n in range(connections)]
+    )
+    await _wait_until(lambda: len(irc_server.received) >= messages, timeout=60)
+    elapsed = time.perf_counter() - start
+
+    latencies = [
+        (received_at - sent_at[int(message.split(" ")[1])]) * 1000 for received_at, _, message in irc_server.received
+    ]
+    print(f"messages:     {messages} over {connections} HTTP connections")
+    print(f"throughput:   {messages / elapsed:.0f} messages/sec")
+    print(f"latency p50:  {_percentile(latencies, 50):.2f} ms")
+    print(f"latency p99:  {_percentile(latencies, 99):.2f} ms")
+
+    await http_server.shutdown()
+    await client.shutdown()
+    await irc_server.stop()
+    client_task.cancel()
+    await asyncio.gather(http_task, client_task, return_exceptions=True)
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.WARNING)
+    messages = int(argv[0]) if len(argv) > 0 else 5000
+    connections = int(argv[1]) if len(argv) > 1 else 4
+    asyncio.run(_run(messages, connections))
+
+
+if __name__ == "__main__":
+    main()
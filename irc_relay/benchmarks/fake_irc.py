@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FakeIrcServer:
+    """Just enough of an IRC server for IrcClient: CAP/SASL, registration with MOTD, JOIN and PING.
+
+    Every PRIVMSG received is recorded with its arrival time, keyed by channel.
+    """
+
+    def __init__(self, address: str = "127.0.0.1", port: int = 0, server_name: str = "fake.irc") -> None:
+        self._address = address
+        self._port = port
+        self._server_name = server_name
+        self._server: asyncio.Server | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+        self.received: list[tuple[float, str, str]] = []
+        self.joined: set[str] = set()
+        self.message_received = asyncio.Event()
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_client, self._address, self._port)
+
+    async def stop(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def ping_all(self, token: str = "benchmark") -> None:
+        for writer in self._writers:
+            writer.write(f"PING :{token}\r\n".encode("utf-8"))
+            await writer.drain()
+
+    def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        writer.write(f":{self._server_name} {line}\r\n".encode("utf-8"))
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.append(writer)
+        nick = "*"
+        try:
+            while line := await reader.readline():
+                received_at = time.perf_counter()
+                command, _, params = line.decode("utf-8").rstrip("\r\n").partition(" ")
+                command = command.upper()
+
+                if command == "PRIVMSG":
+                    target, _, message = params.partition(" :")
+                    self.received.append((received_at, target, message))
+                    self.message_received.set()
+                elif command == "CAP":
+                    self._reply(writer, f"CAP * ACK :{params.removeprefix('REQ ').lstrip(':')}")
+                elif command == "AUTHENTICATE":
+                    if params == "PLAIN":
+                        writer.write(b"AUTHENTICATE +\r\n")
+                    else:
+                        self._reply(writer, f"900 {nick} {nick}!relay@fake.irc account :You are now logged in")
+                        self._reply(writer, f"903 {nick} :SASL authentication successful")
+                elif command == "NICK":
+                    nick = params.lstrip(":")
+                elif command == "USER":
+                    self._reply(writer, f"001 {nick} :Welcome to the fake IRC network {nick}")
+                    self._reply(writer, f"375 {nick} :- {self._server_name} Message of the day -")
+                    self._reply(writer, f"372 {nick} :- Nothing to see here")
+                    self._reply(writer, f"376 {nick} :End of /MOTD command.")
+                elif command == "JOIN":
+                    for channel in params.lstrip(":").split(","):
+                        self.joined.add(channel.lower())
+                        writer.write(f":{nick}!relay@fake.irc JOIN {channel}\r\n".encode("utf-8"))
+                elif command == "PING":
+                    self._reply(writer, f"PONG {self._server_name} {params}")
+                elif command == "QUIT":
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.remove(writer)
+            writer.close()
@@ -0,0 +1,57 @@
+"""Per message decoding cost of the HTTP payload validation vs the line protocol listener, for each message type.
+
+Run with `python -m irc_relay.benchmarks.ingest`.
+"""
+
+import json
+import time
+
+from irc_relay.http_api.server import payload_adapter
+from irc_relay.listeners.line import parse_line
+
+ITERATIONS = 50_000
+
+TEXT_PAYLOAD = {"channel": "#wikipedia-en-cbngfeed", "string": "[[Type Dangerous]] https://en.wikipedia.org/w/"}
+EDIT_PAYLOAD = {
+    "change": {
+        "title": "Spanish–American War",
+        "user": "50.216.6.66",
+        "url": "https://en.wikipedia.org/w/index.php?diff=1314252669&oldid=1310871853",
+        "revision_id": 1314252669,
+        "namespace": "",
+        "flags": [],
+        "length": "-683",
+        "comment": "",
+    },
+    "reverted": False,
+    "comment": None,
+    "score": 0.779827,
+}
+WARNING_PAYLOAD = {"username": "50.216.6.66", "level": 2}
+
+
+def _benchmark(name: str, func, data) -> None:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(data)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed / ITERATIONS * 1e9:>8.0f} ns/message")
+
+
+def main():
+    text_json = json.dumps(TEXT_PAYLOAD).encode("utf-8")
+    edit_json = json.dumps(EDIT_PAYLOAD).encode("utf-8")
+    warning_json = json.dumps(WARNING_PAYLOAD).encode("utf-8")
+    text_line = f"{TEXT_PAYLOAD['channel']}\t{TEXT_PAYLOAD['string']}".encode("utf-8")
+
+    _benchmark("HTTP payload (text)", payload_adapter.validate_json, text_json)
+    _benchmark("HTTP payload (edit)", payload_adapter.validate_json, edit_json)
+    _benchmark("HTTP payload (warning)", payload_adapter.validate_json, warning_json)
+    _benchmark("Line JSON (text)", parse_line, text_json)
+    _benchmark("Line JSON (edit)", parse_line, edit_json)
+    _benchmark("Line JSON (warning)", parse_line, warning_json)
+    _benchmark("Line tab separated (text)", parse_line, text_line)
+
+
+if __name__ == "__main__":
+    main()
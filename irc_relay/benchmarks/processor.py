@@ -0,0 +1,43 @@
+"""Microbenchmark of ClueBotNGMessageProcessor formatting, run with `python -m irc_relay.benchmarks.processor`."""
+
+import time
+
+from irc_relay.messages.models import EditChange, ProcessedEdit, WarnedUser
+from irc_relay.messages.processor import ClueBotNGMessageProcessor
+
+ITERATIONS = 200_000
+
+EDIT = ProcessedEdit(
+    change=EditChange(
+        title="Spanish–American War",
+        user="50.216.6.66",
+        url="https://en.wikipedia.org/w/index.php?diff=1314252669&oldid=1310871853",
+        revision_id=1314252669,
+        length="-683",
+    ),
+    reverted=True,
+    comment="Possible vandalism",
+    score=0.979827,
+)
+
+
+def _benchmark(name: str, func) -> None:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed / ITERATIONS * 1e9:>8.0f} ns/call")
+
+
+def main():
+    processor = ClueBotNGMessageProcessor()
+    warn = WarnedUser(username="Example", level=2)
+
+    _benchmark("revert message", lambda: processor._format_revert_message(EDIT))
+    _benchmark("huggle message", lambda: processor._format_huggle_message(EDIT.change.revision_id, 0.5, False))
+    _benchmark("edit messages (revert + huggle)", lambda: processor._get_edit_messages(EDIT, "#revert", "#huggle"))
+    _benchmark("warn messages", lambda: processor._get_warn_messages(warn, "#huggle"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Microbenchmark of the rate limiter engines, run with `python -m irc_relay.benchmarks.rate_limit`."""
+
+import time
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.ring_counter import RingCounterRateLimit
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+
+ITERATIONS = 200_000
+
+
+def _benchmark(name: str, rate_limiter: RateLimiter) -> None:
+    start = time.perf_counter()
+    allowed = 0
+    for _ in range(ITERATIONS):
+        if rate_limiter.should_allow():
+            allowed += 1
+        rate_limiter.time_until_allowed()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed / ITERATIONS * 1e9:>8.0f} ns/check  ({allowed} allowed)")
+
+
+def main():
+    default_buckets = SlidingWindowRateLimitConfig.from_default().buckets
+    # A bucket large enough to never fill, so every check has to walk a long window
+    large_buckets = [BucketConfig(window=60, limit=ITERATIONS * 2)]
+
+    for label, buckets in [("default buckets", default_buckets), ("large bucket", large_buckets)]:
+        _benchmark(f"SlidingWindowRateLimit ({label})", SlidingWindowRateLimit(buckets))
+        _benchmark(f"RingCounterRateLimit ({label})", RingCounterRateLimit(buckets))
+
+
+if __name__ == "__main__":
+    main()
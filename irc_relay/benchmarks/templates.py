@@ -0,0 +1,70 @@
+"""Line templates against plain f-string formatting, run with `python -m irc_relay.benchmarks.templates`.
+
+Every call renders a different edit, `fan-out` renders and encodes each edit for two receivers as the dispatcher does.
+The f-strings never checked the line against the IRC limit, `checked` adds the byte length check templates must make
+to show what the formatting itself costs.
+"""
+
+import dataclasses
+import time
+
+from irc_relay.benchmarks.processor import EDIT
+from irc_relay.messages.models import ProcessedEdit
+from irc_relay.messages.processor import ClueBotNGMessageProcessor
+from irc_relay.messages.templates import line_budget
+from irc_relay.senders.irc import encode_privmsg
+
+ITERATIONS = 100_000
+BUDGET = line_budget("#r")
+
+
+def _format_revert_fstring(edit: ProcessedEdit) -> str:
+    # The formatting used before lines were rendered from templates, as a baseline
+    score_str = f"{edit.score:.6f}" if edit.score is not None else ""
+    return (
+        f'\x0315[[\x0307{edit.change.title}\x0315]] by "\x0303{edit.change.user}\x0315"'
+        f" (\x0312 {edit.change.url} \x0315) \x0306{score_str}\x0315"
+        f" (\x0304Reverted\x0315) (\x0313{edit.comment or ''}\x0315)"
+    )
+
+
+def _format_revert_fstring_checked(edit: ProcessedEdit) -> str:
+    line = _format_revert_fstring(edit)
+    if len(line.encode("utf-8")) > BUDGET:
+        raise ValueError("Over the line limit")
+    return line
+
+
+def _benchmark(name: str, func, edits: list[ProcessedEdit], receivers: int = 1) -> None:
+    start = time.perf_counter()
+    for edit in edits:
+        for _ in range(receivers):
+            func(edit)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<48} {elapsed / len(edits) * 1e9:>8.0f} ns/message")
+
+
+def main():
+    processor = ClueBotNGMessageProcessor()
+    # Distinct comments, so no line is ever served from a cache
+    edits = [dataclasses.replace(EDIT, comment=f"Possible vandalism {n}") for n in range(ITERATIONS)]
+
+    _benchmark("f-string revert", _format_revert_fstring, edits)
+    _benchmark("f-string revert, checked", _format_revert_fstring_checked, edits)
+    _benchmark("template revert", lambda e: processor._format_revert_message(e, BUDGET), edits)
+    _benchmark(
+        "f-string revert + encode, fan-out to 2",
+        lambda e: encode_privmsg("#r", _format_revert_fstring_checked(e)),
+        edits,
+        2,
+    )
+    _benchmark(
+        "template revert + encode, fan-out to 2",
+        lambda e: encode_privmsg("#r", processor._format_revert_message(e, BUDGET)),
+        edits,
+        2,
+    )
+
+
+if __name__ == "__main__":
+    main()
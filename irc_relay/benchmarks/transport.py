@@ -0,0 +1,79 @@
+"""Outbound PRIVMSG cost via bottom's client.send vs the pre-encoded coalescing writer.
+
+Counts transport writes (one syscall each on a plain socket) and CPU per message for bursts of messages produced
+within one event loop tick. Run with `python -m irc_relay.benchmarks.transport`.
+"""
+
+import asyncio
+import time
+
+import bottom
+from bottom.core import Protocol
+
+from irc_relay.senders.irc import CoalescingWriter, encode_privmsg
+
+MESSAGES = 100_000
+BURST = 10
+STRING = "SCORED 1314252669 579"
+
+
+class _CountingTransport(asyncio.WriteTransport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+        self.bytes = 0
+
+    def write(self, data: bytes) -> None:
+        self.writes += 1
+        self.bytes += len(data)
+
+    def is_closing(self) -> bool:
+        return False
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+
+async def _bottom_send() -> _CountingTransport:
+    transport = _CountingTransport()
+    client = bottom.Client(host="127.0.0.1", port=6667, ssl=False)
+    client._protocol = Protocol(lambda message: None, None)
+    client._protocol.connection_made(transport)
+
+    for _ in range(MESSAGES // BURST):
+        for _ in range(BURST):
+            await client.send("privmsg", target="#channel", message=STRING)
+        await asyncio.sleep(0)
+    return transport
+
+
+async def _coalescing_writer() -> _CountingTransport:
+    transport = _CountingTransport()
+    writer = CoalescingWriter()
+    writer.attach(transport)
+
+    for _ in range(MESSAGES // BURST):
+        for _ in range(BURST):
+            writer.write(encode_privmsg("#channel", STRING))
+            await writer.drain()
+        await asyncio.sleep(0)
+    return transport
+
+
+def _benchmark(name: str, func) -> None:
+    start = time.process_time()
+    transport = asyncio.run(func())
+    elapsed = time.process_time() - start
+    print(
+        f"{name:<30} {elapsed / MESSAGES * 1e9:>8.0f} ns/message  "
+        f"{transport.writes:>7} writes  {transport.bytes / transport.writes:>6.0f} bytes/write"
+    )
+
+
+def main():
+    _benchmark("bottom client.send", _bottom_send)
+    _benchmark("coalescing writer", _coalescing_writer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import dataclasses
+import os
+
+
+@dataclasses.dataclass
+class DuplicateSuppressionConfig:
+    # Seconds a dispatched message is remembered for, 0 disables suppression
+    window: float
+    max_entries: int
+
+    @staticmethod
+    def from_env() -> "DuplicateSuppressionConfig":
+        return DuplicateSuppressionConfig(
+            window=float(os.environ.get("IRC_RELAY_DEDUP_WINDOW", "0")),
+            max_entries=int(os.environ.get("IRC_RELAY_DEDUP_MAX_ENTRIES", "10000")),
+        )
@@ -0,0 +1,34 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class EnvFile:
+    """`KEY=VALUE` lines loaded over the process environment, so configuration can be changed without a restart.
+
+    Keys removed from the file since the last load are removed from the environment again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._loaded_keys: set[str] = set()
+
+    def load(self) -> None:
+        values = {}
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                key, separator, value = line.partition("=")
+                if not separator:
+                    logger.warning(f"Ignoring invalid line in {self._path}: {line}")
+                    continue
+                values[key.strip()] = value.strip().removeprefix('"').removesuffix('"')
+
+        for key in self._loaded_keys - values.keys():
+            os.environ.pop(key, None)
+        os.environ.update(values)
+        self._loaded_keys = set(values)
+        logger.info(f"Loaded {len(values)} settings from {self._path}")
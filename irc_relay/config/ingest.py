@@ -0,0 +1,30 @@
+import dataclasses
+import os
+
+
+@dataclasses.dataclass
+class IngestConfig:
+    # 0 dispatches in the request, anything else queues and returns 202
+    queue_size: int
+    workers: int
+    retry_after: int
+    # 0 serves ingest from this process only, anything else starts that many HTTP worker processes
+    http_workers: int
+    http_address: str
+    http_port: int
+    # Unix socket the workers forward messages over, a temporary path is used if unset
+    ipc_path: str | None
+
+    @staticmethod
+    def from_env() -> "IngestConfig":
+        return IngestConfig(
+            queue_size=int(os.environ.get("IRC_RELAY_INGEST_QUEUE_SIZE", "0")),
+            workers=int(os.environ.get("IRC_RELAY_INGEST_WORKERS", "4")),
+            retry_after=int(os.environ.get("IRC_RELAY_INGEST_RETRY_AFTER", "1")),
+            http_workers=int(os.environ.get("IRC_RELAY_INGEST_HTTP_WORKERS", "0")),
+            http_address=os.environ.get(
+                "IRC_RELAY_INGEST_HTTP_ADDRESS", "0.0.0.0"  # nosec B104:hardcoded_bind_all_interfaces
+            ),
+            http_port=int(os.environ.get("IRC_RELAY_INGEST_HTTP_PORT", "9335")),
+            ipc_path=os.environ.get("IRC_RELAY_INGEST_IPC_PATH"),
+        )
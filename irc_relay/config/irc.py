@@ -10,6 +10,22 @@ class IrcClientConfig:
     username: str | None
     password: str | None
     channels: list[str]
+    queue_size: int
+    message_ttl: float
+    # Additional nicks to connect as, each becoming a member of a sender pool alongside `nick`
+    pool_nicks: list[str]
+    pool_routing: str
+    # Messages for channels we are not joined to are spooled here and replayed once re-joined
+    spool_path: str | None
+    spool_max_bytes: int
+    spool_max_age: float
+    # Log every Nth channel message seen, 0 to drop them all unparsed
+    inbound_sample_every: int
+    # Seconds between PING probes measuring the round trip for the rate limiter, 0 disables them
+    probe_interval: float
+    # Bounds of the jittered exponential backoff between reconnection attempts
+    reconnect_min_delay: float
+    reconnect_max_delay: float
 
     @staticmethod
     def from_environment(env_var_prefix: str) -> "IrcClientConfig":
@@ -24,4 +40,17 @@ class IrcClientConfig:
                 for channel in os.environ.get(f"{env_var_prefix}_CHANNELS", "").split(",")
                 if channel.strip()
             ],
+            queue_size=int(os.environ.get(f"{env_var_prefix}_QUEUE_SIZE", "1000")),
+            message_ttl=float(os.environ.get(f"{env_var_prefix}_MESSAGE_TTL", "30")),
+            pool_nicks=[
+                nick.strip() for nick in os.environ.get(f"{env_var_prefix}_POOL_NICKS", "").split(",") if nick.strip()
+            ],
+            pool_routing=os.environ.get(f"{env_var_prefix}_POOL_ROUTING", "least_loaded"),
+            spool_path=os.environ.get(f"{env_var_prefix}_SPOOL_PATH"),
+            spool_max_bytes=int(os.environ.get(f"{env_var_prefix}_SPOOL_MAX_BYTES", str(1024 * 1024))),
+            spool_max_age=float(os.environ.get(f"{env_var_prefix}_SPOOL_MAX_AGE", "300")),
+            inbound_sample_every=int(os.environ.get(f"{env_var_prefix}_INBOUND_SAMPLE_EVERY", "0")),
+            probe_interval=float(os.environ.get(f"{env_var_prefix}_PROBE_INTERVAL", "0")),
+            reconnect_min_delay=float(os.environ.get(f"{env_var_prefix}_RECONNECT_MIN_DELAY", "1")),
+            reconnect_max_delay=float(os.environ.get(f"{env_var_prefix}_RECONNECT_MAX_DELAY", "60")),
         )
@@ -0,0 +1,25 @@
+import dataclasses
+import os
+
+
+@dataclasses.dataclass
+class LineListenerConfig:
+    udp_address: str
+    udp_port: int | None
+    unix_path: str | None
+    # Datagrams dispatched at once, further ones are dropped until some complete
+    udp_max_pending: int = 1000
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.udp_port or self.unix_path)
+
+    @staticmethod
+    def from_env() -> "LineListenerConfig":
+        udp_port = os.environ.get("IRC_RELAY_LINE_UDP_PORT")
+        return LineListenerConfig(
+            udp_address=os.environ.get("IRC_RELAY_LINE_UDP_ADDRESS", "127.0.0.1"),
+            udp_port=int(udp_port) if udp_port else None,
+            unix_path=os.environ.get("IRC_RELAY_LINE_UNIX_PATH"),
+            udp_max_pending=int(os.environ.get("IRC_RELAY_LINE_UDP_MAX_PENDING", "1000")),
+        )
@@ -5,29 +5,66 @@ import os
 from irc_relay.rate_limit import sliding_window
 
 
+def _parse_buckets(bucket_configs: list[dict]) -> list[sliding_window.BucketConfig]:
+    return [
+        sliding_window.BucketConfig(window=int(bucket_config["window"]), limit=int(bucket_config["limit"]))
+        for bucket_config in bucket_configs
+    ]
+
+
 @dataclasses.dataclass
 class SlidingWindowRateLimitConfig:
     buckets: list[sliding_window.BucketConfig]
+    # "sliding_window" (timestamp log), "ring_counter" (fixed memory, monotonic clock),
+    # "shared" (sliding window in `shared_path`, one budget for every process using the file)
+    # or "adaptive" (sliding window with limits scaled between the bounds by server feedback)
+    engine: str = "sliding_window"
+    shared_path: str | None = None
+    adaptive_min_scale: float = 0.25
+    adaptive_max_scale: float = 1.0
+    # Relative share of the connection for each channel while several have messages queued (1 if not listed)
+    channel_shares: dict[str, float] = dataclasses.field(default_factory=dict)
+    # Limits for individual channels, applied on top of `buckets`
+    channel_buckets: dict[str, list[sliding_window.BucketConfig]] = dataclasses.field(default_factory=dict)
 
     @staticmethod
-    def from_default() -> "SlidingWindowRateLimitConfig":
+    def from_default(engine: str = "sliding_window", shared_path: str | None = None) -> "SlidingWindowRateLimitConfig":
         return SlidingWindowRateLimitConfig(
+            engine=engine,
+            shared_path=shared_path,
             buckets=[
                 # 100 messages per 30 seconds
                 sliding_window.BucketConfig(window=30, limit=100),
                 # 5 messages per second
                 sliding_window.BucketConfig(window=1, limit=5),
-            ]
+            ],
         )
 
     @staticmethod
     def from_environment(env_var_prefix: str) -> "SlidingWindowRateLimitConfig":
+        engine = os.environ.get(f"{env_var_prefix}_ENGINE", "sliding_window")
+        shared_path = os.environ.get(f"{env_var_prefix}_SHARED_PATH")
         if raw_config := os.environ.get(f"{env_var_prefix}_CONFIG"):
             bucket_configs = json.loads(raw_config)
-            return SlidingWindowRateLimitConfig(
-                buckets=[
-                    sliding_window.BucketConfig(window=int(bucket_config["window"]), limit=int(bucket_config["limit"]))
-                    for bucket_config in bucket_configs
-                ]
+            config = SlidingWindowRateLimitConfig(
+                engine=engine,
+                shared_path=shared_path,
+                buckets=_parse_buckets(bucket_configs),
             )
-        return SlidingWindowRateLimitConfig.from_default()
+        else:
+            config = SlidingWindowRateLimitConfig.from_default(engine, shared_path)
+
+        config.adaptive_min_scale = float(os.environ.get(f"{env_var_prefix}_ADAPTIVE_MIN_SCALE", "0.25"))
+        config.adaptive_max_scale = float(os.environ.get(f"{env_var_prefix}_ADAPTIVE_MAX_SCALE", "1.0"))
+        config.channel_shares = {
+            channel.lower(): float(share)
+            for channel, share in json.loads(os.environ.get(f"{env_var_prefix}_CHANNEL_SHARES", "{}")).items()
+        }
+        # Checked here, so a reload with a bad share fails before any sender is changed
+        if any(share <= 0 for share in config.channel_shares.values()):
+            raise ValueError(f"{env_var_prefix}_CHANNEL_SHARES must all be positive: {config.channel_shares}")
+        config.channel_buckets = {
+            channel.lower(): _parse_buckets(bucket_configs)
+            for channel, bucket_configs in json.loads(os.environ.get(f"{env_var_prefix}_CHANNEL_CONFIG", "{}")).items()
+        }
+        return config
@@ -3,6 +3,9 @@ import logging
 import os
 from typing import List
 
+from irc_relay.config.dedup import DuplicateSuppressionConfig
+from irc_relay.config.ingest import IngestConfig
+from irc_relay.config.listener import LineListenerConfig
 from irc_relay.config.metrics import MetricsConfig
 from irc_relay.config.sender import SenderConfig
 
@@ -13,6 +16,9 @@ logger = logging.getLogger(__name__)
 class RuntimeConfig:
     senders: List[SenderConfig]
     metrics: MetricsConfig
+    ingest: IngestConfig
+    line_listener: LineListenerConfig
+    dedup: DuplicateSuppressionConfig
 
     @staticmethod
     def from_env() -> "RuntimeConfig":
@@ -25,4 +31,7 @@ class RuntimeConfig:
         return RuntimeConfig(
             senders=[SenderConfig.from_env(environment) for environment in environments],
             metrics=MetricsConfig.from_env(),
+            ingest=IngestConfig.from_env(),
+            line_listener=LineListenerConfig.from_env(),
+            dedup=DuplicateSuppressionConfig.from_env(),
         )
@@ -3,18 +3,50 @@ import os
 
 from irc_relay.config.irc import IrcClientConfig
 from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.messages import templates
 
 
 @dataclasses.dataclass
 class CbngReceiverConfig:
     revert_channel: str | None
     huggle_channel: str | None
+    # Seconds to collect huggle lines for before packing them into a PRIVMSG, 0 disables coalescing
+    huggle_coalesce_window: float = 0
+    huggle_coalesce_separator: str = " | "
+    # Leaves room for the `:nick!user@host PRIVMSG #channel :` prefix within the 512 byte IRC line, lowered to the
+    # channel's line budget for long channel names
+    huggle_coalesce_max_bytes: int = 400
+    # Sender pressure (time a message would spend queued as a fraction of its TTL, or the fraction of the outbound queue
+    # used if higher) at which SCORED lines start being shed, lowest score first
+    shed_start: float = 0.5
+    # Pressure kept for reverts and warnings only, SCORED lines are all shed above `1 - shed_reserved`
+    shed_reserved: float = 0.2
+    # `str.format` templates, parsed once per distinct format
+    revert_format: str = templates.DEFAULT_REVERT_FORMAT
+    huggle_rollback_format: str = templates.DEFAULT_HUGGLE_ROLLBACK_FORMAT
+    huggle_scored_format: str = templates.DEFAULT_HUGGLE_SCORED_FORMAT
+    huggle_warn_format: str = templates.DEFAULT_HUGGLE_WARN_FORMAT
 
     @staticmethod
     def from_environment(env_var_prefix: str) -> "CbngReceiverConfig":
         return CbngReceiverConfig(
             revert_channel=os.environ.get(f"{env_var_prefix}_REVERT_CHANNEL"),
             huggle_channel=os.environ.get(f"{env_var_prefix}_HUGGLE_CHANNEL"),
+            huggle_coalesce_window=float(os.environ.get(f"{env_var_prefix}_HUGGLE_COALESCE_WINDOW", "0")),
+            huggle_coalesce_separator=os.environ.get(f"{env_var_prefix}_HUGGLE_COALESCE_SEPARATOR", " | "),
+            huggle_coalesce_max_bytes=int(os.environ.get(f"{env_var_prefix}_HUGGLE_COALESCE_MAX_BYTES", "400")),
+            shed_start=float(os.environ.get(f"{env_var_prefix}_SHED_START", "0.5")),
+            shed_reserved=float(os.environ.get(f"{env_var_prefix}_SHED_RESERVED", "0.2")),
+            revert_format=os.environ.get(f"{env_var_prefix}_REVERT_FORMAT", templates.DEFAULT_REVERT_FORMAT),
+            huggle_rollback_format=os.environ.get(
+                f"{env_var_prefix}_HUGGLE_ROLLBACK_FORMAT", templates.DEFAULT_HUGGLE_ROLLBACK_FORMAT
+            ),
+            huggle_scored_format=os.environ.get(
+                f"{env_var_prefix}_HUGGLE_SCORED_FORMAT", templates.DEFAULT_HUGGLE_SCORED_FORMAT
+            ),
+            huggle_warn_format=os.environ.get(
+                f"{env_var_prefix}_HUGGLE_WARN_FORMAT", templates.DEFAULT_HUGGLE_WARN_FORMAT
+            ),
         )
 
 
@@ -24,6 +56,8 @@ class SenderConfig:
     throttler: SlidingWindowRateLimitConfig | None
     client: IrcClientConfig
     cbng: CbngReceiverConfig
+    # The environment name from `IRC_RELAY_SENDER_<NAME>_...`, identifying the sender across reloads
+    name: str = "default"
 
     @staticmethod
     def from_env(name: str) -> "SenderConfig":
@@ -36,4 +70,5 @@ class SenderConfig:
             throttler=SlidingWindowRateLimitConfig.from_environment(f"{env_key}_THROTTLER"),
             client=IrcClientConfig.from_environment(f"{env_key}_CLIENT"),
             cbng=CbngReceiverConfig.from_environment(f"{env_key}_CBNG"),
+            name=name,
         )
@@ -1,44 +1,94 @@
+import json
 import logging
+import math
+import socket
+import time
+from collections.abc import Callable
+from typing import Annotated, Any
 
 import uvicorn
-from fastapi import FastAPI, APIRouter, Response
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from pydantic import BaseModel
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import Discriminator, Tag, TypeAdapter, ValidationError
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from irc_relay.listeners.metrics import listener_messages_accepted
+from irc_relay.listeners.ipc import IpcForwarder, NotAdmitted
+from irc_relay.listeners.metrics import (
+    listener_messages_accepted,
+    listener_messages_rejected,
+    listener_request_duration,
+)
 from irc_relay.messages.dispatcher import MessageDispatcher
-from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+from irc_relay.messages.ingest import IngestQueue
+from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
 
 logger = logging.getLogger(__name__)
 app = FastAPI()
 
 
-class ExternalMessage(BaseModel):
-    channel: str
-    string: str
+def _payload_type(data: Any) -> str | None:
+    # An explicit `type` wins, otherwise the keys present decide, so only one message type is ever validated
+    if isinstance(data, dict):
+        if "type" in data:
+            return data["type"] if isinstance(data["type"], str) else None
+        if "change" in data:
+            return "edit"
+        if "username" in data:
+            return "warning"
+        return "text"
+    return None
 
 
-class EditChangePayload(BaseModel):
-    title: str
-    user: str
-    url: str
-    revision_id: int
-    namespace: str = ""
-    flags: list[str] = []
-    length: str | None = None
-    comment: str = ""
+# Validated straight into the message types, the same shape as the line protocol (`messages/decoder.py`)
+Payload = Annotated[
+    Annotated[TextMessage, Tag("text")] | Annotated[ProcessedEdit, Tag("edit")] | Annotated[WarnedUser, Tag("warning")],
+    Discriminator(_payload_type),
+]
+payload_adapter: TypeAdapter[Payload] = TypeAdapter(Payload)
 
 
-class EditPayload(BaseModel):
-    change: EditChangePayload
-    reverted: bool
-    comment: str | None
-    score: float | None
+_REJECTION_MESSAGES = {
+    "undeliverable": "No sender can currently deliver to the message's channels",
+    "rate_limited": "Rate limited",
+}
 
 
-class WarnedUserPayload(BaseModel):
-    username: str
-    level: int
+def parse_batch_body(body: bytes, content_type: str) -> list:
+    """Split a batch body (JSON array or NDJSON) into raw items, validation happens per item."""
+    if content_type.startswith("application/x-ndjson") or not body.lstrip().startswith(b"["):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array")
+    return items
+
+
+class _RequestTimer:
+    """Plain ASGI middleware timing each request, without the extra task and body streaming of BaseHTTPMiddleware."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self._app = app
+        self._durations: dict[str, Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            # Label by route template, so unmatched paths can not grow the label set
+            path = route.path if (route := scope.get("route")) else "unmatched"
+            if (duration := self._durations.get(path)) is None:
+                duration = self._durations[path] = listener_request_duration.labels(path=path)
+            duration.observe(time.perf_counter() - start)
+
+
+app.add_middleware(_RequestTimer)
 
 
 @app.get("/health")
@@ -46,50 +96,196 @@ async def _handle_health() -> Response:
     return Response("OK")
 
 
-@app.get("/metrics")
-async def _handle_metrics() -> Response:
-    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+def create_listener(
+    message_dispatcher: MessageDispatcher | IpcForwarder,
+    ingest_queue: IngestQueue | None = None,
+    retry_after: int = 1,
+) -> APIRouter:
+    router = APIRouter()
 
+    def _rejection(delay: float | None) -> tuple[str, int] | None:
+        # How long the caller should back off for, from the dispatcher's admission delay
+        if delay is None:
+            return "undeliverable", retry_after
+        if delay > 0:
+            return "rate_limited", math.ceil(delay)
+        return None
 
-def create_listener(message_dispatcher: MessageDispatcher) -> APIRouter:
-    router = APIRouter()
+    def _check_admission(message: TextMessage | ProcessedEdit | WarnedUser) -> tuple[str, int] | None:
+        # Rejected before anything is formatted. HTTP workers only learn the owner's verdict on dispatch (NotAdmitted)
+        return _rejection(message_dispatcher.admission_delay(message))
+
+    def _rejection_response(reason: str, delay: int) -> Response:
+        listener_messages_rejected.labels(reason=reason).inc()
+        return Response(
+            _REJECTION_MESSAGES[reason],
+            status_code=503 if reason == "undeliverable" else 429,
+            headers={"Retry-After": str(delay)},
+        )
+
+    def _rejected_item(reason: str, delay: int) -> dict:
+        listener_messages_rejected.labels(reason=reason).inc()
+        return {
+            "status": "rejected",
+            "errors": [{"type": reason, "msg": _REJECTION_MESSAGES[reason]}],
+            "retry_after": delay,
+        }
 
     @router.put("/")
-    async def _handle_message(payload: ExternalMessage | EditPayload | WarnedUserPayload) -> Response:
-        if isinstance(payload, ExternalMessage):
-            await message_dispatcher.send(TextMessage(channel=payload.channel, string=payload.string))
-        elif isinstance(payload, WarnedUserPayload):
-            await message_dispatcher.send_user_warning(WarnedUser(username=payload.username, level=payload.level))
-        else:
-            await message_dispatcher.send_edit(
-                ProcessedEdit(
-                    change=EditChange(**payload.change.model_dump()),
-                    score=payload.score,
-                    reverted=payload.reverted,
-                    comment=payload.comment,
-                )
-            )
+    async def _handle_message(message: Payload) -> Response:
+        if rejection := _check_admission(message):
+            return _rejection_response(*rejection)
+
+        if ingest_queue is None:
+            try:
+                await message_dispatcher.dispatch(message)
+            except NotAdmitted as e:
+                return _rejection_response(*_rejection(e.delays[0]))
+            listener_messages_accepted.inc()
+            return Response("OK")
+
+        if not ingest_queue.put(message):
+            listener_messages_rejected.labels(reason="queue_full").inc()
+            return Response("Queue full", status_code=429, headers={"Retry-After": str(retry_after)})
+
         listener_messages_accepted.inc()
-        return Response("OK")
+        return Response("Accepted", status_code=202)
+
+    @router.put("/batch")
+    async def _handle_batch(request: Request) -> Response:
+        try:
+            items = parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+        # `taken` holds the index in `results` of each message in `messages`
+        messages, taken, results, back_off = [], [], [], 0
+        for item in items:
+            try:
+                message = payload_adapter.validate_python(item)
+            except ValidationError as e:
+                results.append(
+                    {
+                        "status": "rejected",
+                        "errors": e.errors(include_url=False, include_context=False, include_input=False),
+                    }
+                )
+                continue
+
+            if rejection := _check_admission(message):
+                back_off = max(back_off, rejection[1])
+                results.append(_rejected_item(*rejection))
+            elif ingest_queue is None:
+                messages.append(message)
+                taken.append(len(results))
+                results.append({"status": "accepted"})
+            elif ingest_queue.put(message):
+                messages.append(message)
+                taken.append(len(results))
+                results.append({"status": "queued"})
+            else:
+                back_off = max(back_off, retry_after)
+                listener_messages_rejected.labels(reason="queue_full").inc()
+                results.append(
+                    {
+                        "status": "rejected",
+                        "errors": [{"type": "queue_full", "msg": "Queue full"}],
+                        "retry_after": retry_after,
+                    }
+                )
+
+        if ingest_queue is None:
+            try:
+                await message_dispatcher.dispatch_batch(messages)
+            except NotAdmitted as e:
+                for index, delay in zip(list(taken), e.delays):
+                    if rejection := _rejection(delay):
+                        back_off = max(back_off, rejection[1])
+                        results[index] = _rejected_item(*rejection)
+                        taken.remove(index)
+        listener_messages_accepted.inc(len(taken))
+
+        # Only a batch of which nothing was taken is backed off as a whole, otherwise each rejected item says when
+        # it can be retried
+        if not taken and back_off:
+            return JSONResponse({"results": results}, status_code=429, headers={"Retry-After": str(back_off)})
+        if len(taken) < len(results):
+            return JSONResponse({"results": results}, status_code=207)
+        return JSONResponse({"results": results}, status_code=200 if ingest_queue is None else 202)
+
+    return router
+
+
+def create_metrics() -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/metrics")
+    async def _handle_metrics() -> Response:
+        return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+    return router
+
+
+def create_readiness(channel_status: Callable[[], dict[str, dict[str, bool]]]) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/ready")
+    async def _handle_ready() -> Response:
+        senders = {
+            name: {"ready": bool(channels) and all(channels.values()), "channels": channels}
+            for name, channels in channel_status().items()
+        }
+        ready = not senders or any(sender["ready"] for sender in senders.values())
+        return JSONResponse({"ready": ready, "senders": senders}, status_code=200 if ready else 503)
 
     return router
 
 
 class HttpServer:
-    def __init__(self, address: str, port: int, dispatcher: MessageDispatcher):
+    def __init__(
+        self,
+        address: str,
+        port: int,
+        dispatcher: MessageDispatcher | IpcForwarder,
+        ingest_queue: IngestQueue | None = None,
+        retry_after: int = 1,
+        access_log: bool = True,
+        reuse_port: bool = False,
+        channel_status: Callable[[], dict[str, dict[str, bool]]] | None = None,
+        serve_metrics: bool = True,
+    ):
         self._address = address
         self._port = port
         self._server: uvicorn.Server | None = None
         self._dispatcher = dispatcher
+        self._ingest_queue = ingest_queue
+        self._retry_after = retry_after
+        self._access_log = access_log
+        self._reuse_port = reuse_port
+        self._channel_status = channel_status
+        # Each process has its own registry, so only the process owning the senders serves them
+        self._serve_metrics = serve_metrics
 
     async def shutdown(self) -> None:
         logger.info("Shutting down HTTP Server")
         if self._server:
-            self._server.shutdown()
+            self._server.should_exit = True
+
+    def _bind_reuse_port(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self._address else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Lets several worker processes bind the same port, the kernel spreads connections between them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self._address, self._port))
+        return sock
 
     async def run(self) -> None:
         logger.info("Starting HTTP Server")
-        app.include_router(create_listener(self._dispatcher))
+        app.include_router(create_listener(self._dispatcher, self._ingest_queue, self._retry_after))
+        if self._serve_metrics:
+            app.include_router(create_metrics())
+        if self._channel_status:
+            app.include_router(create_readiness(self._channel_status))
 
         self._server = uvicorn.Server(
             uvicorn.Config(
@@ -97,6 +293,7 @@ class HttpServer:
                 host=self._address,
                 port=self._port,
                 log_level="debug" if logger.getEffectiveLevel() == logging.DEBUG else "info",
+                access_log=self._access_log,
             )
         )
-        await self._server.serve()
+        await self._server.serve(sockets=[self._bind_reuse_port()] if self._reuse_port else None)
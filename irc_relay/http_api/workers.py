@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.process
+
+from irc_relay.http_api.server import HttpServer
+from irc_relay.listeners.ipc import IpcForwarder
+
+logger = logging.getLogger(__name__)
+
+
+def _run_worker(address: str, port: int, ipc_path: str, access_log: bool) -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        HttpServer(
+            address, port, IpcForwarder(ipc_path), access_log=access_log, reuse_port=True, serve_metrics=False
+        ).run()
+    )
+
+
+class HttpWorkerPool:
+    """Ingest-only HTTP servers in separate processes, sharing one port via SO_REUSEPORT.
+
+    Validated messages are forwarded to this process over `ipc_path`, so the IRC connections and rate limiter
+    state stay in one place while request parsing spreads across cores. Workers that exit are restarted.
+    """
+
+    def __init__(self, workers: int, address: str, port: int, ipc_path: str, access_log: bool = True) -> None:
+        self._workers = workers
+        self._address = address
+        self._port = port
+        self._ipc_path = ipc_path
+        self._access_log = access_log
+        self._should_run = True
+        self._processes: list[multiprocessing.process.BaseProcess] = []
+
+    def _start_worker(self, number: int) -> multiprocessing.process.BaseProcess:
+        # Spawn rather than fork, the parent's event loop and IRC connections must not be inherited
+        process = multiprocessing.get_context("spawn").Process(
+            target=_run_worker,
+            args=(self._address, self._port, self._ipc_path, self._access_log),
+            name=f"irc-relay-http-{number}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    async def shutdown(self) -> None:
+        logger.info("Shutting down HTTP workers")
+        self._should_run = False
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            await asyncio.to_thread(process.join, 5)
+
+    async def run(self) -> None:
+        logger.info(f"Starting {self._workers} HTTP workers on {self._address}:{self._port}")
+        self._processes = [self._start_worker(number) for number in range(self._workers)]
+
+        while self._should_run:
+            for number, process in enumerate(self._processes):
+                if not process.is_alive() and self._should_run:
+                    logger.error(f"HTTP worker {process.name} exited ({process.exitcode}), restarting")
+                    self._processes[number] = self._start_worker(number)
+            await asyncio.sleep(1)
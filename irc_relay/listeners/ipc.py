@@ -0,0 +1,166 @@
+import asyncio
+import collections
+import dataclasses
+import json
+import logging
+import os
+
+from irc_relay.listeners.line import parse_line
+from irc_relay.listeners.metrics import listener_messages_accepted, listener_messages_rejected
+from irc_relay.messages.dispatcher import MessageDispatcher
+from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
+
+logger = logging.getLogger(__name__)
+
+
+def encode_message(message: TextMessage | ProcessedEdit | WarnedUser) -> bytes:
+    return json.dumps(dataclasses.asdict(message), separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class NotAdmitted(Exception):
+    """Forwarded messages the owner refused at admission, none of which were dispatched.
+
+    `delays` has an entry for every message sent together, as `MessageDispatcher.admission_delay` returned it: 0 for
+    those that were dispatched, the seconds to back off for, or None if no sender accepts any of its channels.
+    """
+
+    def __init__(self, delays: list[float | None]) -> None:
+        super().__init__("Message not admitted by the sender process")
+        self.delays = delays
+
+
+def encode_acknowledgement(delay: float | None) -> bytes:
+    if delay is None:
+        return b"!\n"
+    if delay > 0:
+        return f"~{delay}\n".encode("ascii")
+    return b"+\n"
+
+
+def decode_acknowledgement(line: bytes) -> float | None:
+    """The admission delay an acknowledgement carries, raises ValueError for lines the owner could not parse."""
+    line = line.strip()
+    if line == b"+":
+        return 0
+    if line == b"!":
+        return None
+    if line.startswith(b"~"):
+        return float(line[1:])
+    raise ValueError("Message rejected by the sender process")
+
+
+class IpcForwarder:
+    """Hands messages to the process owning the senders, through its IpcListener.
+
+    Stands in for the MessageDispatcher in HTTP worker processes. Lines are pipelined over a single Unix socket
+    connection and acknowledged in order once dispatched, so a request only succeeds once the sender process has it.
+    Admission is checked by the owner as each line arrives, a refusal is raised as NotAdmitted.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._writer: asyncio.StreamWriter | None = None
+        # Futures awaiting an acknowledgement on the current connection, in the order its lines were written
+        self._pending: collections.deque[asyncio.Future] = collections.deque()
+        self._connect_lock = asyncio.Lock()
+        self._read_task: asyncio.Task | None = None
+
+    async def _connect(self) -> tuple[asyncio.StreamWriter, collections.deque[asyncio.Future]]:
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(self._path)
+                self._pending = collections.deque()
+                self._read_task = asyncio.create_task(self._read_acknowledgements(reader, self._writer, self._pending))
+        return self._writer, self._pending
+
+    async def _read_acknowledgements(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        pending: collections.deque[asyncio.Future],
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                future = pending.popleft()
+                if not future.done():
+                    future.set_result(line)
+        finally:
+            logger.warning(f"Lost IPC connection to {self._path}")
+            # A newer connection may already have replaced this one, leave its writer and requests alone
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            while pending:
+                future = pending.popleft()
+                if not future.done():
+                    future.set_exception(ConnectionError("IPC connection lost"))
+
+    async def _send(self, lines: list[bytes]) -> None:
+        writer, pending = await self._connect()
+        loop = asyncio.get_running_loop()
+        acknowledgements = [loop.create_future() for _ in lines]
+        pending.extend(acknowledgements)
+        writer.write(b"".join(lines))
+        await writer.drain()
+
+        delays = [decode_acknowledgement(line) for line in await asyncio.gather(*acknowledgements)]
+        if any(delay != 0 for delay in delays):
+            raise NotAdmitted(delays)
+
+    def admission_delay(self, message: TextMessage | ProcessedEdit | WarnedUser) -> float | None:
+        # The channel index lives in the sender process, which checks admission when the message is dispatched
+        return 0
+
+    async def dispatch(self, message: TextMessage | ProcessedEdit | WarnedUser) -> None:
+        await self._send([encode_message(message)])
+
+    async def dispatch_batch(self, messages: list[TextMessage | ProcessedEdit | WarnedUser]) -> None:
+        if messages:
+            await self._send([encode_message(message) for message in messages])
+
+
+class IpcListener:
+    """Receives messages forwarded by HTTP worker processes and dispatches them, acknowledging each line."""
+
+    def __init__(self, dispatcher: MessageDispatcher, path: str) -> None:
+        self._dispatcher = dispatcher
+        self._path = path
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while line := await reader.readline():
+                if (message := parse_line(line)) is None:
+                    writer.write(b"-\n")
+                    continue
+
+                # The same check the HTTP API makes in this process, workers turn the verdict into its response
+                delay = self._dispatcher.admission_delay(message)
+                if delay is None or delay > 0:
+                    listener_messages_rejected.labels(reason="undeliverable" if delay is None else "rate_limited").inc()
+                else:
+                    await self._dispatcher.dispatch(message)
+                    listener_messages_accepted.inc()
+                writer.write(encode_acknowledgement(delay))
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def shutdown(self) -> None:
+        logger.info("Shutting down IPC listener")
+        if self._server:
+            self._server.close()
+        # Workers see the connection drop and reconnect to whichever process listens on the path next
+        for writer in list(self._writers):
+            writer.close()
+
+    async def run(self) -> None:
+        logger.info(f"Starting IPC listener on {self._path}")
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        self._server = await asyncio.start_unix_server(self._handle_stream, path=self._path)
+        await self._server.serve_forever()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import os
+
+from irc_relay.listeners.metrics import listener_messages_accepted, listener_messages_rejected
+from irc_relay.messages.decoder import decode_message
+from irc_relay.messages.dispatcher import MessageDispatcher
+from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
+
+logger = logging.getLogger(__name__)
+
+# Longer lines are rejected rather than buffered, also the stream reader's limit
+MAX_LINE_BYTES = 65536
+
+
+def parse_line(line: bytes) -> TextMessage | ProcessedEdit | WarnedUser | None:
+    """Either a JSON object (same shapes as the HTTP API) or `<channel>\\t<message>`."""
+    line = line.strip()
+    if not line:
+        return None
+
+    if len(line) > MAX_LINE_BYTES:
+        logger.warning(f"Ignoring oversize line ({len(line)} bytes): {line[:200]!r}")
+        listener_messages_rejected.labels(reason="oversize").inc()
+        return None
+
+    try:
+        if line.startswith(b"{"):
+            return decode_message(json.loads(line))
+
+        channel, separator, string = line.decode("utf-8").partition("\t")
+        if not separator or not channel:
+            raise ValueError("Expected <channel>\\t<message>")
+        return TextMessage(channel=channel, string=string)
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring invalid line ({e}): {line[:200]!r}")
+        listener_messages_rejected.labels(reason="invalid").inc()
+        return None
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: "LineListener") -> None:
+        self._listener = listener
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        # A datagram may carry several lines, dispatch them together
+        messages = [message for line in data.splitlines() if (message := parse_line(line)) is not None]
+        if messages:
+            self._listener.dispatch_in_background(messages)
+
+
+class LineListener:
+    """Newline delimited messages over UDP and/or a Unix domain socket, dispatched without going through HTTP."""
+
+    def __init__(
+        self,
+        dispatcher: MessageDispatcher,
+        udp_address: str | None,
+        udp_port: int | None,
+        unix_path: str | None,
+        max_pending_datagrams: int = 1000,
+    ) -> None:
+        self._dispatcher = dispatcher
+        self._udp_address = udp_address
+        self._udp_port = udp_port
+        self._unix_path = unix_path
+        self._max_pending_datagrams = max_pending_datagrams
+        # Datagrams still being dispatched, beyond `max_pending_datagrams` new ones are dropped
+        self._tasks: set[asyncio.Task] = set()
+        self._transport: asyncio.DatagramTransport | None = None
+        self._server: asyncio.Server | None = None
+
+    async def _dispatch(self, messages: list[TextMessage | ProcessedEdit | WarnedUser]) -> None:
+        await self._dispatcher.dispatch_batch(messages)
+        listener_messages_accepted.inc(len(messages))
+
+    def dispatch_in_background(self, messages: list[TextMessage | ProcessedEdit | WarnedUser]) -> None:
+        # UDP has no backpressure, so a burst the dispatcher can not keep up with is dropped rather than buffered
+        if len(self._tasks) >= self._max_pending_datagrams:
+            listener_messages_rejected.labels(reason="queue_full").inc(len(messages))
+            return
+
+        task = asyncio.create_task(self._dispatch(messages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Over the reader's limit, the rest of the line would be read as new lines so the connection is
+                    # dropped instead
+                    logger.warning(f"Closing line listener connection after a line over {MAX_LINE_BYTES} bytes")
+                    listener_messages_rejected.labels(reason="oversize").inc()
+                    break
+                if not line:
+                    break
+                if (message := parse_line(line)) is not None:
+                    await self._dispatch([message])
+        finally:
+            writer.close()
+
+    async def shutdown(self) -> None:
+        logger.info("Shutting down line listener")
+        if self._transport:
+            self._transport.close()
+        if self._server:
+            self._server.close()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        if self._udp_port:
+            logger.info(f"Starting UDP line listener on {self._udp_address}:{self._udp_port}")
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), local_addr=(self._udp_address, self._udp_port)
+            )
+
+        if self._unix_path:
+            logger.info(f"Starting Unix socket line listener on {self._unix_path}")
+            if os.path.exists(self._unix_path):
+                os.unlink(self._unix_path)
+            self._server = await asyncio.start_unix_server(
+                self._handle_stream, path=self._unix_path, limit=MAX_LINE_BYTES
+            )
+            await self._server.serve_forever()
+        elif self._transport:
+            await loop.create_future()
@@ -1,4 +1,4 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 
 from irc_relay.config import PROMETHEUS_METRIC_NAMESPACE
 
@@ -6,3 +6,21 @@ listener_messages_accepted = Counter(
     f"{PROMETHEUS_METRIC_NAMESPACE}_listener_messages_accepted",
     "Number of messages accepted by the listener",
 )
+
+listener_messages_rejected = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_listener_messages_rejected",
+    "Number of messages rejected by the listener",
+    ["reason"],
+)
+
+listener_ingest_queue_depth = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_listener_ingest_queue_depth",
+    "Number of messages waiting in the ingest queue",
+)
+
+listener_request_duration = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_listener_request_duration_seconds",
+    "Time to receive, validate and hand off a HTTP request",
+    ["path"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def pack_lines(lines: list[str], separator: str, max_bytes: int) -> list[str]:
+    """Greedily join lines with `separator` into as few strings of at most `max_bytes` (UTF-8) as possible.
+
+    A single line longer than `max_bytes` is passed through on its own, rather than being split mid-line.
+    """
+    packed: list[str] = []
+    current: list[str] = []
+    current_size = 0
+    separator_size = len(separator.encode("utf-8"))
+
+    for line in lines:
+        line_size = len(line.encode("utf-8"))
+        if current and current_size + separator_size + line_size > max_bytes:
+            packed.append(separator.join(current))
+            current, current_size = [], 0
+
+        current_size += line_size + (separator_size if current else 0)
+        current.append(line)
+
+    if current:
+        packed.append(separator.join(current))
+    return packed
+
+
+def unpack_line(string: str, separator: str) -> list[str]:
+    """Inverse of `pack_lines`, for consumers of the packed format."""
+    return string.split(separator)
+
+
+class LineCoalescer:
+    """Collects lines for `window` seconds then hands them to `flush` packed into as few strings as possible."""
+
+    def __init__(
+        self,
+        window: float,
+        separator: str,
+        max_bytes: int,
+        flush: Callable[[str], Awaitable[None]],
+    ) -> None:
+        self._window = window
+        self._separator = separator
+        self._max_bytes = max_bytes
+        self._flush = flush
+        self._lines: list[str] = []
+        self._size = 0
+        self._flush_task: asyncio.Task | None = None
+
+    async def add(self, line: str) -> None:
+        line_size = len(line.encode("utf-8"))
+        separator_size = len(self._separator.encode("utf-8"))
+
+        # The pending lines are as full as they can get, send them now rather than waiting for the window
+        if self._lines and self._size + separator_size + line_size > self._max_bytes:
+            await self.flush()
+
+        self._size += line_size + (separator_size if self._lines else 0)
+        self._lines.append(line)
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        lines, self._lines, self._size = self._lines, [], 0
+        for string in pack_lines(lines, self._separator, self._max_bytes):
+            await self._flush(string)
@@ -0,0 +1,40 @@
+from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+
+
+def decode_message(data: dict) -> TextMessage | ProcessedEdit | WarnedUser:
+    """Build a message straight from decoded JSON, picking the type from `type` if given, else the keys present.
+
+    Raises ValueError (or KeyError/TypeError, which callers should treat the same) for payloads that do not match.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+
+    kind = data.get("type")
+    if kind not in (None, "text", "edit", "warning"):
+        raise ValueError(f"Unknown message type: {kind}")
+
+    if kind == "edit" or (kind is None and "change" in data):
+        change = data["change"]
+        return ProcessedEdit(
+            change=EditChange(
+                title=str(change["title"]),
+                user=str(change["user"]),
+                url=str(change["url"]),
+                revision_id=int(change["revision_id"]),
+                namespace=str(change.get("namespace", "")),
+                flags=[str(flag) for flag in change.get("flags", [])],
+                length=None if change.get("length") is None else str(change["length"]),
+                comment=str(change.get("comment", "")),
+            ),
+            reverted=bool(data["reverted"]),
+            comment=None if data.get("comment") is None else str(data["comment"]),
+            score=None if data.get("score") is None else float(data["score"]),
+        )
+
+    if kind == "warning" or (kind is None and "username" in data):
+        return WarnedUser(username=str(data["username"]), level=int(data["level"]))
+
+    if kind == "text" or "channel" in data:
+        return TextMessage(channel=str(data["channel"]), string=str(data["string"]))
+
+    raise ValueError(f"Unknown message: {sorted(data)}")
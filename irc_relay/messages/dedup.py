@@ -0,0 +1,65 @@
+import collections
+import hashlib
+import logging
+import time
+from collections.abc import Hashable
+
+from irc_relay.messages.metrics import (
+    dispatcher_duplicate_cache_evictions,
+    dispatcher_duplicate_cache_misses,
+    dispatcher_duplicate_cache_size,
+    dispatcher_duplicates_suppressed,
+)
+from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
+
+logger = logging.getLogger(__name__)
+
+
+def message_key(message: TextMessage | ProcessedEdit | WarnedUser) -> tuple[str, Hashable]:
+    if isinstance(message, ProcessedEdit):
+        return "edit", message.change.revision_id
+    if isinstance(message, WarnedUser):
+        return "warning", (message.username, message.level)
+    # Strings can be long, only keep a digest so the memory per entry is fixed
+    return "text", hashlib.blake2b(f"{message.channel}\0{message.string}".encode("utf-8"), digest_size=16).digest()
+
+
+class DuplicateCache:
+    """Remembers recently dispatched messages for `window` seconds, holding at most `max_entries`.
+
+    Entries are never refreshed by a repeat, so they expire (and are evicted when full) in the order first seen.
+    """
+
+    def __init__(self, window: float, max_entries: int) -> None:
+        self._window = window
+        self._max_entries = max_entries
+        self._expires_at: collections.OrderedDict[tuple[str, Hashable], float] = collections.OrderedDict()
+        dispatcher_duplicate_cache_size.set_function(lambda: len(self._expires_at))
+
+    def __len__(self) -> int:
+        return len(self._expires_at)
+
+    def _expire(self, now: float) -> None:
+        while self._expires_at:
+            key, expires_at = next(iter(self._expires_at.items()))
+            if expires_at > now:
+                return
+            del self._expires_at[key]
+            dispatcher_duplicate_cache_evictions.labels(reason="expired").inc()
+
+    def is_duplicate(self, message: TextMessage | ProcessedEdit | WarnedUser) -> bool:
+        """Records the message, returning True if it was already seen within the window."""
+        now = time.monotonic()
+        self._expire(now)
+
+        message_type, key = message_key(message)
+        if (message_type, key) in self._expires_at:
+            dispatcher_duplicates_suppressed.labels(type=message_type).inc()
+            return True
+
+        dispatcher_duplicate_cache_misses.labels(type=message_type).inc()
+        if len(self._expires_at) >= self._max_entries:
+            self._expires_at.popitem(last=False)
+            dispatcher_duplicate_cache_evictions.labels(reason="capacity").inc()
+        self._expires_at[(message_type, key)] = now + self._window
+        return False
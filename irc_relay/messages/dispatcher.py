@@ -1,16 +1,35 @@
 import abc
 import asyncio
+import dataclasses
+from collections.abc import Awaitable, Callable
+from typing import Any
 
 from irc_relay.config.sender import CbngReceiverConfig, SenderConfig
+from irc_relay.messages import templates
+from irc_relay.messages.coalescer import LineCoalescer
+from irc_relay.messages.dedup import DuplicateCache
+from irc_relay.messages.metrics import dispatcher_fan_out_duration, receiver_lines_shed
 from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
 from irc_relay.messages.processor import ClueBotNGMessageProcessor
-from irc_relay.senders.irc import IrcClient
+from irc_relay.senders.base import IrcSender
+
+# Resolved once rather than through `labels()` on every message
+_text_fan_out_duration = dispatcher_fan_out_duration.labels(type="text")
+_edit_fan_out_duration = dispatcher_fan_out_duration.labels(type="edit")
+_warning_fan_out_duration = dispatcher_fan_out_duration.labels(type="warning")
 
 
 class MessageReceiver(abc.ABC):
+    # Receivers that never suspend (e.g. only enqueue) are awaited in turn, rather than each getting a Task
+    non_blocking: bool = False
+
     @abc.abstractmethod
     async def send(self, message: TextMessage) -> None: ...
 
+    def target_channels(self, message: TextMessage | ProcessedEdit | WarnedUser) -> list[str] | None:
+        """Channels `message` would be sent to, None if this receiver always takes it (e.g. it is not IRC)."""
+        return None
+
 
 class EditMessageReceiver(abc.ABC):
     @abc.abstractmethod
@@ -23,32 +42,116 @@ class WarnedUserReceiver(abc.ABC):
 
 
 class IrcReceiver(MessageReceiver):
-    def __init__(self, irc_client: IrcClient):
+    non_blocking = True
+
+    def __init__(self, irc_client: IrcSender):
         self._irc_client = irc_client
 
+    @property
+    def sender(self) -> IrcSender:
+        return self._irc_client
+
+    def target_channels(self, message: TextMessage | ProcessedEdit | WarnedUser) -> list[str] | None:
+        return [message.channel] if isinstance(message, TextMessage) else []
+
     async def send(self, message: TextMessage) -> None:
         await self._irc_client.send_to_channel(message.channel, message.string)
 
 
 class ClueBotNGIrcReceiver(IrcReceiver, ClueBotNGMessageProcessor, EditMessageReceiver, WarnedUserReceiver):
-    def __init__(self, irc_client: IrcClient, cbng_config: CbngReceiverConfig):
+    def __init__(self, irc_client: IrcSender, cbng_config: CbngReceiverConfig):
         super().__init__(irc_client)
         self._cbng_config = cbng_config
 
+        self._revert_template = templates.compile_template(
+            cbng_config.revert_format, templates.REVERT_FIELDS, ("comment", "title")
+        )
+        self._huggle_rollback_template = templates.compile_template(
+            cbng_config.huggle_rollback_format, templates.HUGGLE_ROLLBACK_FIELDS
+        )
+        self._huggle_scored_template = templates.compile_template(
+            cbng_config.huggle_scored_format, templates.HUGGLE_SCORED_FIELDS
+        )
+        self._huggle_warn_template = templates.compile_template(
+            cbng_config.huggle_warn_format, templates.HUGGLE_WARN_FIELDS, ("username",)
+        )
+
+        self._huggle_coalescer = None
+        if cbng_config.huggle_channel and cbng_config.huggle_coalesce_window > 0:
+            self._huggle_coalescer = LineCoalescer(
+                window=cbng_config.huggle_coalesce_window,
+                separator=cbng_config.huggle_coalesce_separator,
+                # Packed lines are sent as they are, so they must also fit the line budget the templates keep to
+                max_bytes=min(cbng_config.huggle_coalesce_max_bytes, templates.line_budget(cbng_config.huggle_channel)),
+                flush=self._send_huggle_packed,
+            )
+
+    def target_channels(self, message: TextMessage | ProcessedEdit | WarnedUser) -> list[str] | None:
+        if isinstance(message, TextMessage):
+            return [message.channel]
+
+        channels = [self._cbng_config.huggle_channel]
+        if isinstance(message, ProcessedEdit) and message.reverted:
+            channels.append(self._cbng_config.revert_channel)
+        return [channel for channel in channels if channel]
+
+    async def _send_huggle_packed(self, string: str) -> None:
+        await self._irc_client.send_to_channel(self._cbng_config.huggle_channel, string)
+
+    async def _send_to_channel(self, channel: str, msg: str, priority: bool = False) -> None:
+        # Revert lines are not held back for packing, and go ahead of the SCORED backlog that could be shed
+        if self._huggle_coalescer and channel == self._cbng_config.huggle_channel and not priority:
+            await self._huggle_coalescer.add(msg)
+        else:
+            await self._irc_client.send_to_channel(channel, msg, priority=priority)
+
+    def _should_shed(self, line_class: str, score: float | None = None) -> bool:
+        """Reverts are always sent, warnings may use half of the reserved capacity and SCORED lines shed by score."""
+        if line_class == "revert" or not self._cbng_config.huggle_channel:
+            return False
+
+        pressure = self._irc_client.pressure(self._cbng_config.huggle_channel)
+        reserved_from = 1 - self._cbng_config.shed_reserved
+        if line_class == "warning":
+            return pressure >= 1 - self._cbng_config.shed_reserved / 2
+
+        if pressure >= reserved_from:
+            return True
+        if pressure < self._cbng_config.shed_start:
+            return False
+        # The minimum score rises from 0 at `shed_start` to 1 where the reserved capacity begins
+        minimum_score = (pressure - self._cbng_config.shed_start) / (reserved_from - self._cbng_config.shed_start)
+        return (score or 0) < minimum_score
+
     async def send_edit(self, edit: ProcessedEdit) -> None:
         messages = self._get_edit_messages(
             edit,
             revert_channel=self._cbng_config.revert_channel,
             huggle_channel=self._cbng_config.huggle_channel,
         )
-        await asyncio.gather(*[self._irc_client.send_to_channel(channel, msg) for channel, msg in messages])
+        if not messages:
+            return
+
+        line_class = "revert" if edit.reverted else "scored"
+        if self._should_shed(line_class, edit.score):
+            receiver_lines_shed.labels(type=line_class).inc(len(messages))
+            return
+
+        for channel, msg in messages:
+            await self._send_to_channel(channel, msg, priority=edit.reverted)
 
     async def send_user_warning(self, warn: WarnedUser) -> None:
-        messages = self._get_warn_messages(warn, huggle_channel=self._cbng_config.huggle_channel)
-        await asyncio.gather(*[self._irc_client.send_to_channel(channel, msg) for channel, msg in messages])
+        if self._should_shed("warning"):
+            receiver_lines_shed.labels(type="warning").inc()
+            return
+
+        for channel, msg in self._get_warn_messages(warn, huggle_channel=self._cbng_config.huggle_channel):
+            await self._send_to_channel(channel, msg)
 
 
 class DebugReceiver(MessageReceiver, ClueBotNGMessageProcessor, EditMessageReceiver, WarnedUserReceiver):
+    non_blocking = True
+
     async def send(self, message: TextMessage) -> None:
         print(f"[{message.channel}] {message.string}")
 
@@ -65,29 +168,150 @@ class DebugReceiver(MessageReceiver, ClueBotNGMessageProcessor, EditMessageRecei
         print("")
 
 
+@dataclasses.dataclass
+class _Route:
+    immediate: list[Callable[[Any], Awaitable[None]]]
+    concurrent: list[Callable[[Any], Awaitable[None]]]
+
+    @staticmethod
+    def build(receivers: list[MessageReceiver], method: str) -> "_Route":
+        route = _Route(immediate=[], concurrent=[])
+        for receiver in receivers:
+            (route.immediate if receiver.non_blocking else route.concurrent).append(getattr(receiver, method))
+        return route
+
+    async def fan_out(self, message: Any) -> None:
+        for handler in self.immediate:
+            await handler(message)
+
+        if len(self.concurrent) == 1:
+            await self.concurrent[0](message)
+        elif self.concurrent:
+            await asyncio.gather(*[handler(message) for handler in self.concurrent])
+
+
 class MessageDispatcher:
-    def __init__(self):
+    def __init__(self, duplicate_cache: DuplicateCache | None = None):
         self._receivers: list[MessageReceiver] = []
+        # Repeats (client retries, edits scored twice) are dropped here, before they use up rate limit capacity
+        self._duplicate_cache = duplicate_cache
+        # Channel -> senders currently accepting messages for it, kept up to date by the senders
+        self._accepting: dict[str, set[IrcSender]] = {}
+        self._tracked_senders: dict[IrcSender, int] = {}
+        self._rebuild_routes()
+
+    def _rebuild_routes(self) -> None:
+        self._edit_receivers = [r for r in self._receivers if isinstance(r, EditMessageReceiver)]
+        self._warn_receivers = [r for r in self._receivers if isinstance(r, WarnedUserReceiver)]
+        self._text_route = _Route.build(self._receivers, "send")
+        self._edit_route = _Route.build(self._edit_receivers, "send_edit")
+        self._warn_route = _Route.build(self._warn_receivers, "send_user_warning")
+
+    def _channel_changed(self, sender: IrcSender, channel: str, accepting: bool) -> None:
+        if sender not in self._tracked_senders:
+            # Listeners can not be removed, so a sender that has since been stopped may still call this
+            return
+        if accepting:
+            self._accepting.setdefault(channel.lower(), set()).add(sender)
+        elif senders := self._accepting.get(channel.lower()):
+            senders.discard(sender)
+
+    def _track_sender(self, sender: IrcSender) -> None:
+        if sender in self._tracked_senders:
+            self._tracked_senders[sender] += 1
+            return
+
+        self._tracked_senders[sender] = 1
+        sender.add_channel_listener(self._channel_changed)
+        for channel in sender.accepting_channels():
+            self._channel_changed(sender, channel, True)
+
+    def _untrack_sender(self, sender: IrcSender) -> None:
+        self._tracked_senders[sender] -= 1
+        if self._tracked_senders[sender]:
+            return
+
+        del self._tracked_senders[sender]
+        for senders in self._accepting.values():
+            senders.discard(sender)
 
     def add_receiver(self, receiver: MessageReceiver) -> None:
         self._receivers.append(receiver)
+        if isinstance(receiver, IrcReceiver):
+            self._track_sender(receiver.sender)
+        self._rebuild_routes()
 
     def remove_receiver(self, receiver: MessageReceiver) -> None:
         self._receivers.remove(receiver)
+        if isinstance(receiver, IrcReceiver):
+            self._untrack_sender(receiver.sender)
+        self._rebuild_routes()
+
+    def admission_delay(self, message: TextMessage | ProcessedEdit | WarnedUser) -> float | None:
+        """Whether `message` can be delivered, checked before any formatting.
+
+        0 if some receiver would take it now or no receiver sends it to any channel, the seconds until one would if
+        they are all backed up, or None if no sender accepts any channel it would go to.
+        """
+        if isinstance(message, ProcessedEdit):
+            receivers = self._edit_receivers
+        elif isinstance(message, TextMessage):
+            receivers = self._receivers
+        else:
+            receivers = self._warn_receivers
+
+        delay = None
+        targeted = False
+        for receiver in receivers:
+            if (channels := receiver.target_channels(message)) is None:
+                return 0
+
+            for channel in channels:
+                targeted = True
+                if receiver.sender not in self._accepting.get(channel.lower(), ()):
+                    continue
+                if (sender_delay := receiver.sender.admission_delay(channel)) <= 0:
+                    return 0
+                delay = sender_delay if delay is None else min(delay, sender_delay)
+        # Nothing to deliver is accepted and dropped, as it was before admission was checked
+        return delay if targeted else 0
 
     async def send(self, message: TextMessage) -> None:
-        await asyncio.gather(*[receiver.send(message) for receiver in self._receivers])
+        if self._duplicate_cache is not None and self._duplicate_cache.is_duplicate(message):
+            return
+
+        with _text_fan_out_duration.time():
+            await self._text_route.fan_out(message)
 
     async def send_edit(self, edit: ProcessedEdit) -> None:
-        edit_receivers = [r for r in self._receivers if isinstance(r, EditMessageReceiver)]
-        await asyncio.gather(*[receiver.send_edit(edit) for receiver in edit_receivers])
+        if self._duplicate_cache is not None and self._duplicate_cache.is_duplicate(edit):
+            return
+
+        with _edit_fan_out_duration.time():
+            await self._edit_route.fan_out(edit)
 
     async def send_user_warning(self, warn: WarnedUser) -> None:
-        warn_receivers = [r for r in self._receivers if isinstance(r, WarnedUserReceiver)]
-        await asyncio.gather(*[receiver.send_user_warning(warn) for receiver in warn_receivers])
+        if self._duplicate_cache is not None and self._duplicate_cache.is_duplicate(warn):
+            return
+
+        with _warning_fan_out_duration.time():
+            await self._warn_route.fan_out(warn)
+
+    async def dispatch(self, message: TextMessage | ProcessedEdit | WarnedUser) -> None:
+        if isinstance(message, ProcessedEdit):
+            await self.send_edit(message)
+        elif isinstance(message, TextMessage):
+            await self.send(message)
+        else:
+            await self.send_user_warning(message)
+
+    async def dispatch_batch(self, messages: list[TextMessage | ProcessedEdit | WarnedUser]) -> None:
+        # Sequential, so messages reach the outbound queues in the order they were submitted
+        for message in messages:
+            await self.dispatch(message)
 
 
-def make_receiver(receiver_type: str, client: IrcClient, sender_config: SenderConfig) -> MessageReceiver:
+def make_receiver(receiver_type: str, client: IrcSender, sender_config: SenderConfig) -> MessageReceiver:
     if receiver_type == "irc":
         return IrcReceiver(client)
     if receiver_type == "cbng":
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from irc_relay.listeners.metrics import listener_ingest_queue_depth
+from irc_relay.messages.dispatcher import MessageDispatcher
+from irc_relay.messages.models import ProcessedEdit, TextMessage, WarnedUser
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Bounded queue between the listeners and the dispatcher, drained by a pool of worker tasks.
+
+    Listeners only enqueue, so a slow receiver never holds up the caller; a full queue is reported back to the
+    caller rather than making it wait. With more than one worker messages may be dispatched out of order.
+    """
+
+    def __init__(self, dispatcher: MessageDispatcher, max_size: int, workers: int) -> None:
+        self._dispatcher = dispatcher
+        self._queue: asyncio.Queue[TextMessage | ProcessedEdit | WarnedUser] = asyncio.Queue(max_size)
+        self._workers = workers
+
+    def put(self, message: TextMessage | ProcessedEdit | WarnedUser) -> bool:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        listener_ingest_queue_depth.set(self._queue.qsize())
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            listener_ingest_queue_depth.set(self._queue.qsize())
+            try:
+                await self._dispatcher.dispatch(message)
+            except Exception:
+                logger.exception(f"Failed to dispatch {message}")
+            finally:
+                self._queue.task_done()
+
+    async def run(self) -> None:
+        logger.info(f"Starting ingest queue with {self._workers} workers")
+        await asyncio.gather(*[self._worker() for _ in range(self._workers)])
@@ -0,0 +1,39 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+from irc_relay.config import PROMETHEUS_METRIC_NAMESPACE
+
+dispatcher_fan_out_duration = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_dispatcher_fan_out_duration_seconds",
+    "Time to format and hand a message to every receiver",
+    ["type"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.1, 1),
+)
+
+dispatcher_duplicates_suppressed = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_dispatcher_duplicates_suppressed",
+    "Number of messages dropped as a repeat of one dispatched within the duplicate window",
+    ["type"],
+)
+
+dispatcher_duplicate_cache_misses = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_dispatcher_duplicate_cache_misses",
+    "Number of messages not found in the duplicate cache",
+    ["type"],
+)
+
+dispatcher_duplicate_cache_evictions = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_dispatcher_duplicate_cache_evictions",
+    "Number of entries removed from the duplicate cache",
+    ["reason"],
+)
+
+dispatcher_duplicate_cache_size = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_dispatcher_duplicate_cache_size",
+    "Number of entries in the duplicate cache",
+)
+
+receiver_lines_shed = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_receiver_lines_shed",
+    "Number of lines not sent because the sender was under pressure, by line class",
+    ["type"],
+)
@@ -1,27 +1,51 @@
 from irc_relay.messages.models import ProcessedEdit, WarnedUser
+from irc_relay.messages.templates import (
+    DEFAULT_HUGGLE_ROLLBACK_FORMAT,
+    DEFAULT_HUGGLE_SCORED_FORMAT,
+    DEFAULT_HUGGLE_WARN_FORMAT,
+    DEFAULT_REVERT_FORMAT,
+    HUGGLE_ROLLBACK_FIELDS,
+    HUGGLE_SCORED_FIELDS,
+    HUGGLE_WARN_FIELDS,
+    REVERT_FIELDS,
+    compile_template,
+    line_budget,
+)
 
 
 class RevertMessageProcessor:
-    def _format_revert_message(self, edit: ProcessedEdit) -> str:
-        score_str = f"{edit.score:.6f}" if edit.score is not None else ""
-        return (
-            f'\x0315[[\x0307{edit.change.title}\x0315]] by "\x0303{edit.change.user}\x0315"'
-            f" (\x0312 {edit.change.url} \x0315) \x0306{score_str}\x0315"
-            f" (\x0304Reverted\x0315) (\x0313{edit.comment or ''}\x0315)"
+    # Long titles and comments are shortened rather than the server cutting the line off
+    _revert_template = compile_template(DEFAULT_REVERT_FORMAT, REVERT_FIELDS, ("comment", "title"))
+
+    def _format_revert_message(self, edit: ProcessedEdit, max_bytes: int = line_budget("")) -> str:
+        return self._revert_template.render(
+            max_bytes,
+            edit.change.title,
+            edit.change.user,
+            edit.change.url,
+            f"{edit.score:.6f}" if edit.score is not None else "",
+            edit.comment or "",
         )
 
 
 class WarnMessageProcessor:
-    def _format_huggle_warn_message(self, warn: WarnedUser) -> str:
-        return f"WARN {warn.level} {warn.username}"
+    _huggle_warn_template = compile_template(DEFAULT_HUGGLE_WARN_FORMAT, HUGGLE_WARN_FIELDS, ("username",))
+
+    def _format_huggle_warn_message(self, warn: WarnedUser, max_bytes: int = line_budget("")) -> str:
+        return self._huggle_warn_template.render(max_bytes, warn.level, warn.username)
 
 
 class HuggleMessageProcessor:
-    def _format_huggle_message(self, revision_id: int, score: float | None, reverted: bool) -> str | None:
+    _huggle_rollback_template = compile_template(DEFAULT_HUGGLE_ROLLBACK_FORMAT, HUGGLE_ROLLBACK_FIELDS)
+    _huggle_scored_template = compile_template(DEFAULT_HUGGLE_SCORED_FORMAT, HUGGLE_SCORED_FIELDS)
+
+    def _format_huggle_message(
+        self, revision_id: int, score: float | None, reverted: bool, max_bytes: int = line_budget("")
+    ) -> str | None:
         if reverted:
-            return f"ROLLBACK {revision_id}"
+            return self._huggle_rollback_template.render(max_bytes, revision_id)
         if score is not None and score > 0.1:
-            return f"SCORED {revision_id} {int((score - 0.2) * 1000)}"
+            return self._huggle_scored_template.render(max_bytes, revision_id, int((score - 0.2) * 1000))
         return None
 
 
@@ -35,10 +59,12 @@ class ClueBotNGMessageProcessor(RevertMessageProcessor, HuggleMessageProcessor,
         messages = []
 
         if revert_channel and edit.reverted:
-            messages.append((revert_channel, self._format_revert_message(edit)))
+            messages.append((revert_channel, self._format_revert_message(edit, line_budget(revert_channel))))
 
         if huggle_channel:
-            if text := self._format_huggle_message(edit.change.revision_id, edit.score, edit.reverted):
+            if text := self._format_huggle_message(
+                edit.change.revision_id, edit.score, edit.reverted, line_budget(huggle_channel)
+            ):
                 messages.append((huggle_channel, text))
 
         return messages
@@ -51,6 +77,6 @@ class ClueBotNGMessageProcessor(RevertMessageProcessor, HuggleMessageProcessor,
         messages = []
 
         if huggle_channel:
-            messages.append((huggle_channel, self._format_huggle_warn_message(warn)))
+            messages.append((huggle_channel, self._format_huggle_warn_message(warn, line_budget(huggle_channel))))
 
         return messages
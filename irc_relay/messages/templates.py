@@ -0,0 +1,102 @@
+import functools
+import string
+
+MAX_LINE_BYTES = 512
+# Room for the `:nick!user@host ` prefix the server adds when relaying our line to other clients
+PREFIX_ALLOWANCE = 100
+ELLIPSIS = "…"
+
+DEFAULT_REVERT_FORMAT = (
+    '\x0315[[\x0307{title}\x0315]] by "\x0303{user}\x0315"'
+    " (\x0312 {url} \x0315) \x0306{score}\x0315"
+    " (\x0304Reverted\x0315) (\x0313{comment}\x0315)"
+)
+DEFAULT_HUGGLE_ROLLBACK_FORMAT = "ROLLBACK {revision_id}"
+DEFAULT_HUGGLE_SCORED_FORMAT = "SCORED {revision_id} {score}"
+DEFAULT_HUGGLE_WARN_FORMAT = "WARN {level} {username}"
+
+# Fields each template may use, in the order they are passed to `LineTemplate.render`
+REVERT_FIELDS = ("title", "user", "url", "score", "comment")
+HUGGLE_ROLLBACK_FIELDS = ("revision_id",)
+HUGGLE_SCORED_FIELDS = ("revision_id", "score")
+HUGGLE_WARN_FIELDS = ("level", "username")
+
+
+def line_budget(channel: str) -> int:
+    """Bytes available for the text of a PRIVMSG to `channel` within the IRC line limit."""
+    return MAX_LINE_BYTES - PREFIX_ALLOWANCE - len(f"PRIVMSG {channel} :\r\n".encode("utf-8"))
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """Cut `text` to at most `max_bytes` when encoded, on a character boundary, marking the cut with an ellipsis."""
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+
+    keep = max_bytes - len(ELLIPSIS.encode("utf-8"))
+    if keep < 0:
+        return encoded[:max_bytes].decode("utf-8", "ignore")
+    return encoded[:keep].decode("utf-8", "ignore") + ELLIPSIS
+
+
+_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+
+class LineTemplate:
+    """A `str.format` style template parsed once, taking its fields positionally in `signature` order.
+
+    `render(max_bytes, *values)` formats each field and joins it with the literal text around it. If the line is over
+    `max_bytes` when encoded, the fields named in `truncate` are shortened in that order, before falling back to
+    cutting the whole line.
+    """
+
+    def __init__(self, template: str, signature: tuple[str, ...], truncate: tuple[str, ...] = ()) -> None:
+        self._parts: list[tuple[str, int | None, str | None, str]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            if field is not None and field not in signature:
+                raise ValueError(f"Unknown field {field!r} in template, expected one of {signature}")
+            if conversion is not None and conversion not in _CONVERSIONS:
+                raise ValueError(f"Unknown conversion {conversion!r} in template")
+            if spec and ("{" in spec or "}" in spec):
+                raise ValueError(f"Nested fields are not supported in template format specs: {spec!r}")
+
+            index = signature.index(field) if field is not None else None
+            self._parts.append((literal, index, conversion, spec or ""))
+
+        self._literal_bytes = sum(len(literal.encode("utf-8")) for literal, _, _, _ in self._parts)
+        self._truncate = [signature.index(field) for field in truncate]
+
+    def render(self, max_bytes: int, *values) -> str:
+        rendered = [
+            (
+                format(_CONVERSIONS[conversion](values[index]) if conversion else values[index], spec)
+                if index is not None
+                else ""
+            )
+            for _, index, conversion, spec in self._parts
+        ]
+        line = "".join(literal + value for (literal, _, _, _), value in zip(self._parts, rendered))
+        if (len(line) <= max_bytes and line.isascii()) or len(line.encode("utf-8")) <= max_bytes:
+            return line
+        return self._truncate_fields(max_bytes, rendered)
+
+    def _truncate_fields(self, max_bytes: int, rendered: list[str]) -> str:
+        excess = self._literal_bytes + sum(len(value.encode("utf-8")) for value in rendered) - max_bytes
+        for field_index in self._truncate:
+            for part, (_, index, _, _) in enumerate(self._parts):
+                if excess <= 0:
+                    break
+                if index != field_index:
+                    continue
+                size = len(rendered[part].encode("utf-8"))
+                rendered[part] = truncate_utf8(rendered[part], max(0, size - excess))
+                excess -= size - len(rendered[part].encode("utf-8"))
+
+        line = "".join(literal + value for (literal, _, _, _), value in zip(self._parts, rendered))
+        return truncate_utf8(line, max_bytes) if excess > 0 else line
+
+
+@functools.cache
+def compile_template(template: str, signature: tuple[str, ...], truncate: tuple[str, ...] = ()) -> LineTemplate:
+    """Receivers configured with the same format share one compiled template."""
+    return LineTemplate(template, signature, truncate)
@@ -0,0 +1,74 @@
+import collections
+import logging
+import math
+import time
+
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimit(SlidingWindowRateLimit):
+    """Sliding window limiter whose bucket limits are scaled by feedback from the server.
+
+    A flood warning halves the scale. A probe round trip noticeably slower than the recent best (servers delay
+    processing the lines of clients they consider to be flooding) reduces it a little, any other round trip raises
+    it a little, unless there was a flood warning within `recovery` seconds. The scale always stays within
+    `min_scale` and `max_scale` of the configured limits, starting at 1 (or the nearest bound).
+    """
+
+    engine = "adaptive"
+
+    def __init__(
+        self,
+        buckets: list[BucketConfig],
+        min_scale: float = 0.25,
+        max_scale: float = 1.0,
+        rtt_tolerance: float = 1.0,
+        recovery: float = 60,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.8,
+    ) -> None:
+        super().__init__(buckets)
+        self._min_scale = min_scale
+        self._max_scale = max_scale
+        self._rtt_tolerance = rtt_tolerance
+        self._recovery = recovery
+        self._increase_step = increase_step
+        self._decrease_factor = decrease_factor
+
+        self._scale = min(max(1.0, min_scale), max_scale)
+        self._round_trips: collections.deque[float] = collections.deque(maxlen=20)
+        self._last_flood_warning: float | None = None
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    def set_scale_bounds(self, min_scale: float, max_scale: float) -> None:
+        self._min_scale = min_scale
+        self._max_scale = max_scale
+        # The learned scale carries over, moved into the new bounds if it is outside them
+        self._set_scale(self._scale)
+
+    def _set_scale(self, scale: float) -> None:
+        scale = round(min(max(scale, self._min_scale), self._max_scale), 4)
+        if scale != self._scale:
+            logger.info(f"Adjusting rate limit scale from {self._scale:.2f} to {scale:.2f}")
+        self._scale = scale
+
+    def _bucket_limit(self, bucket: BucketConfig) -> int:
+        return max(1, math.floor(bucket.limit * self._scale))
+
+    def observe_round_trip(self, seconds: float) -> None:
+        baseline = min(self._round_trips, default=seconds)
+        self._round_trips.append(seconds)
+
+        if seconds > baseline + self._rtt_tolerance:
+            self._set_scale(self._scale * self._decrease_factor)
+        elif self._last_flood_warning is None or time.monotonic() - self._last_flood_warning > self._recovery:
+            self._set_scale(self._scale + self._increase_step)
+
+    def observe_flood_warning(self) -> None:
+        self._last_flood_warning = time.monotonic()
+        self._set_scale(self._scale / 2)
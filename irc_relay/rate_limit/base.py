@@ -1,6 +1,39 @@
 import abc
+import math
 
 
 class RateLimiter(abc.ABC):
     @abc.abstractmethod
     def should_allow(self) -> bool: ...
+
+    @abc.abstractmethod
+    def time_until_allowed(self) -> float:
+        """Seconds until `should_allow` would next succeed, 0 if it would succeed now (does not consume)."""
+
+    def bucket_utilisation(self) -> dict[str, float]:
+        """Fraction of each bucket currently used, keyed by a bucket label such as `100/30s`."""
+        return {}
+
+    def reconfigure(self, engine: str, buckets: list) -> bool:
+        """Apply new bucket limits in place, keeping the current window state.
+
+        Returns False if this limiter can not do so (e.g. a different engine), so the caller should replace it.
+        """
+        return False
+
+    def throughput(self) -> float:
+        """Messages per second sustained once every bucket is full, inf if nothing limits them."""
+        return math.inf
+
+    def bucket_limits(self) -> dict[str, float]:
+        """Messages currently allowed per window for each bucket, for limiters that change them at runtime."""
+        return {}
+
+    def close(self) -> None:
+        """Release anything held outside the process (e.g. a shared state file), the limiter is not used again."""
+
+    def observe_round_trip(self, seconds: float) -> None:
+        """Time for a probe written to the connection to be answered by the server."""
+
+    def observe_flood_warning(self) -> None:
+        """The server warned us that we are sending too quickly."""
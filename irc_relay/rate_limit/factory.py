@@ -0,0 +1,34 @@
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.rate_limit.adaptive import AdaptiveRateLimit
+from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.ring_counter import RingCounterRateLimit
+from irc_relay.rate_limit.shared import SharedSlidingWindowRateLimit
+from irc_relay.rate_limit.sliding_window import SlidingWindowRateLimit
+
+
+def make_rate_limiter(config: SlidingWindowRateLimitConfig) -> RateLimiter:
+    if config.engine == "sliding_window":
+        return SlidingWindowRateLimit(config.buckets)
+    if config.engine == "ring_counter":
+        return RingCounterRateLimit(config.buckets)
+    if config.engine == "adaptive":
+        return AdaptiveRateLimit(config.buckets, config.adaptive_min_scale, config.adaptive_max_scale)
+    if config.engine == "shared":
+        if not config.shared_path:
+            raise ValueError("The shared rate limit engine requires a state file path")
+        return SharedSlidingWindowRateLimit(config.buckets, config.shared_path)
+    raise ValueError(f"Unknown rate limit engine: {config.engine}")
+
+
+def reconfigure_rate_limiter(rate_limiter: RateLimiter, config: SlidingWindowRateLimitConfig) -> bool:
+    """Apply `config` to `rate_limiter` in place, False if it has to be replaced with `make_rate_limiter(config)`."""
+    if not rate_limiter.reconfigure(config.engine, config.buckets):
+        return False
+    if isinstance(rate_limiter, AdaptiveRateLimit):
+        rate_limiter.set_scale_bounds(config.adaptive_min_scale, config.adaptive_max_scale)
+    return True
+
+
+def make_channel_rate_limiters(config: SlidingWindowRateLimitConfig) -> dict[str, RateLimiter]:
+    # Only this connection sends to its channels, so these never need the shared or adaptive engines
+    return {channel.lower(): SlidingWindowRateLimit(buckets) for channel, buckets in config.channel_buckets.items()}
@@ -0,0 +1,88 @@
+import logging
+import math
+import time
+
+from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.sliding_window import BucketConfig
+
+logger = logging.getLogger(__name__)
+
+
+class _CounterRing:
+    """Fixed ring of per-slot counters covering one bucket window.
+
+    A message is counted until its whole slot has left the window, so the ring only ever over-counts (by at most one
+    slot width) and never lets more than `limit` messages through in any window.
+    """
+
+    __slots__ = ("counts", "head", "label", "limit", "total", "width", "window")
+
+    def __init__(self, bucket: BucketConfig, resolution: int) -> None:
+        self.label = bucket.label
+        self.limit = bucket.limit
+        self.window = bucket.window
+        self.width = bucket.window / resolution
+        self.counts = [0] * (resolution + 1)
+        self.head = 0
+        self.total = 0
+
+    def advance(self, now: float) -> None:
+        index = int(now // self.width)
+        if index <= self.head:
+            return
+
+        size = len(self.counts)
+        if index - self.head >= size:
+            self.counts = [0] * size
+            self.total = 0
+        else:
+            for slot in range(self.head + 1, index + 1):
+                self.total -= self.counts[slot % size]
+                self.counts[slot % size] = 0
+        self.head = index
+
+    def time_until_capacity(self, now: float) -> float:
+        if self.total < self.limit:
+            return 0.0
+
+        # Capacity frees up when the oldest non-empty slot is recycled, padded to land past the slot boundary
+        size = len(self.counts)
+        for slot in range(self.head - size + 1, self.head + 1):
+            if self.counts[slot % size]:
+                return max(0.0, (slot + size) * self.width - now) + 0.001
+        return 0.0
+
+
+class RingCounterRateLimit(RateLimiter):
+    def __init__(self, buckets: list[BucketConfig], resolution: int = 10) -> None:
+        self._rings = [_CounterRing(bucket, resolution) for bucket in buckets]
+
+    def should_allow(self) -> bool:
+        now = time.monotonic()
+        for ring in self._rings:
+            ring.advance(now)
+            if ring.total >= ring.limit:
+                return False
+
+        # Only charge once every bucket has agreed
+        for ring in self._rings:
+            ring.counts[ring.head % len(ring.counts)] += 1
+            ring.total += 1
+        return True
+
+    def time_until_allowed(self) -> float:
+        now = time.monotonic()
+        for ring in self._rings:
+            ring.advance(now)
+        return max((ring.time_until_capacity(now) for ring in self._rings), default=0.0)
+
+    def throughput(self) -> float:
+        return min((ring.limit / ring.window for ring in self._rings), default=math.inf)
+
+    def bucket_utilisation(self) -> dict[str, float]:
+        now = time.monotonic()
+        utilisation = {}
+        for ring in self._rings:
+            ring.advance(now)
+            utilisation[ring.label] = ring.total / ring.limit
+        return utilisation
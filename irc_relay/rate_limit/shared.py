@@ -0,0 +1,130 @@
+import contextlib
+import fcntl
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from collections.abc import Iterator
+
+from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.sliding_window import BucketConfig
+
+logger = logging.getLogger(__name__)
+
+# magic, number of buckets
+_HEADER = struct.Struct("<8sI")
+_MAGIC = b"IRCRLv1\0"
+# limit, window, index of the oldest timestamp; followed by `limit` timestamps
+_BUCKET = struct.Struct("<IIQ")
+_TIMESTAMP = struct.Struct("<d")
+
+
+class SharedSlidingWindowRateLimit(RateLimiter):
+    """Sliding window limiter whose state lives in a memory mapped file, so every process using it shares one budget.
+
+    Each bucket keeps the times of its last `limit` admissions in a ring. A message is allowed once the oldest of
+    those has left the window, which is the same decision SlidingWindowRateLimit makes from its full log. Admission
+    holds an exclusive flock on the file, so it is atomic across processes.
+    """
+
+    def __init__(self, buckets: list[BucketConfig], path: str) -> None:
+        # Explicitly sort the buckets, so every process agrees on the layout
+        self._buckets = sorted(buckets, key=lambda b: (b.window, b.limit))
+        # Processes with other limits use their own file, a mapped file is never resized under another process
+        self._path = f"{path}.{'_'.join(f'{bucket.limit}-{bucket.window}s' for bucket in self._buckets)}"
+
+        self._offsets = []
+        offset = _HEADER.size
+        for bucket in self._buckets:
+            self._offsets.append(offset)
+            offset += _BUCKET.size + bucket.limit * _TIMESTAMP.size
+        size = offset
+
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked():
+                if (existing := os.fstat(self._fd).st_size) == 0:
+                    logger.info(f"Initialising shared rate limit state in {self._path}")
+                    os.ftruncate(self._fd, size)
+                    self._mmap = mmap.mmap(self._fd, size)
+                    _HEADER.pack_into(self._mmap, 0, _MAGIC, len(self._buckets))
+                    for bucket, bucket_offset in zip(self._buckets, self._offsets):
+                        _BUCKET.pack_into(self._mmap, bucket_offset, bucket.limit, bucket.window, 0)
+                elif existing != size:
+                    raise ValueError(f"{self._path} is {existing} bytes, not a rate limit state file for {buckets}")
+                else:
+                    self._mmap = mmap.mmap(self._fd, size)
+                    if not self._layout_matches():
+                        self._mmap.close()
+                        raise ValueError(f"{self._path} is not a rate limit state file for {buckets}")
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _layout_matches(self) -> bool:
+        if _HEADER.unpack_from(self._mmap, 0) != (_MAGIC, len(self._buckets)):
+            return False
+        for bucket, offset in zip(self._buckets, self._offsets):
+            limit, window, head = _BUCKET.unpack_from(self._mmap, offset)
+            if (limit, window) != (bucket.limit, bucket.window) or head >= limit:
+                return False
+        return True
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _oldest(self, index: int) -> float:
+        offset = self._offsets[index]
+        head = _BUCKET.unpack_from(self._mmap, offset)[2]
+        return _TIMESTAMP.unpack_from(self._mmap, offset + _BUCKET.size + head * _TIMESTAMP.size)[0]
+
+    def _record(self, index: int, now: float) -> None:
+        offset = self._offsets[index]
+        limit, window, head = _BUCKET.unpack_from(self._mmap, offset)
+        _TIMESTAMP.pack_into(self._mmap, offset + _BUCKET.size + head * _TIMESTAMP.size, now)
+        _BUCKET.pack_into(self._mmap, offset, limit, window, (head + 1) % limit)
+
+    def should_allow(self) -> bool:
+        with self._locked():
+            now = time.time()
+            # Same expiry rule as SlidingWindowRateLimit, entries strictly older than the window no longer count
+            if not all(self._oldest(index) < now - bucket.window for index, bucket in enumerate(self._buckets)):
+                return False
+
+            for index in range(len(self._buckets)):
+                self._record(index, now)
+            return True
+
+    def time_until_allowed(self) -> float:
+        with self._locked():
+            now = time.time()
+            delay = 0.0
+            for index, bucket in enumerate(self._buckets):
+                oldest = self._oldest(index)
+                if oldest >= now - bucket.window:
+                    delay = max(delay, max(0.0, oldest + bucket.window - now) + 0.001)
+            return delay
+
+    def throughput(self) -> float:
+        return min((bucket.limit / bucket.window for bucket in self._buckets), default=math.inf)
+
+    def bucket_utilisation(self) -> dict[str, float]:
+        with self._locked():
+            now = time.time()
+            utilisation = {}
+            for bucket, offset in zip(self._buckets, self._offsets):
+                timestamps = struct.unpack_from(f"<{bucket.limit}d", self._mmap, offset + _BUCKET.size)
+                used = sum(1 for timestamp in timestamps if timestamp >= now - bucket.window)
+                utilisation[bucket.label] = used / bucket.limit
+            return utilisation
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
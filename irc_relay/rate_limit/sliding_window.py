@@ -1,6 +1,7 @@
 import collections
 import dataclasses
 import logging
+import math
 import time
 
 from irc_relay.rate_limit.base import RateLimiter
@@ -16,8 +17,14 @@ class BucketConfig:
     def __hash__(self) -> int:
         return hash((self.window, self.limit))
 
+    @property
+    def label(self) -> str:
+        return f"{self.limit}/{self.window}s"
+
 
 class SlidingWindowRateLimit(RateLimiter):
+    engine = "sliding_window"
+
     def __init__(self, buckets: list[BucketConfig]) -> None:
         # Explicitly sort the buckets, so we evaluate the smallest window first
         self._buckets = sorted(buckets, key=lambda b: b.window)
@@ -25,17 +32,65 @@ class SlidingWindowRateLimit(RateLimiter):
             bucket: collections.deque() for bucket in buckets
         }
 
-    def _bucket_has_capacity(self, bucket: BucketConfig) -> bool:
+    def reconfigure(self, engine: str, buckets: list[BucketConfig]) -> bool:
+        if engine != self.engine:
+            return False
+
+        # Every admission is recorded in every bucket, so the longest window holds the history for any shorter one
+        history = max(self._windows.values(), key=len, default=collections.deque())
+        now = time.time()
+        self._windows = {
+            bucket: collections.deque(entry for entry in history if entry >= now - bucket.window) for bucket in buckets
+        }
+
+        self._buckets = sorted(buckets, key=lambda b: b.window)
+        return True
+
+    def _expire_bucket(self, bucket: BucketConfig) -> None:
         current_period = time.time() - bucket.window
 
         # Remove entries older than our window
         while self._windows[bucket] and self._windows[bucket][0] < current_period:
             self._windows[bucket].popleft()
 
-        if len(self._windows[bucket]) < bucket.limit:
-            self._windows[bucket].append(time.time())
-            return True
-        return False
+    def _bucket_limit(self, bucket: BucketConfig) -> int:
+        return bucket.limit
+
+    def _bucket_has_capacity(self, bucket: BucketConfig) -> bool:
+        self._expire_bucket(bucket)
+        return len(self._windows[bucket]) < self._bucket_limit(bucket)
 
     def should_allow(self) -> bool:
-        return all(self._bucket_has_capacity(bucket) for bucket in self._buckets)
+        if not all(self._bucket_has_capacity(bucket) for bucket in self._buckets):
+            return False
+
+        # Only charge once every bucket has agreed, so a rejection does not use up capacity in the smaller buckets
+        now = time.time()
+        for bucket in self._buckets:
+            self._windows[bucket].append(now)
+        return True
+
+    def _bucket_time_until_capacity(self, bucket: BucketConfig) -> float:
+        self._expire_bucket(bucket)
+
+        excess = len(self._windows[bucket]) - self._bucket_limit(bucket)
+        if excess < 0:
+            return 0.0
+        # The oldest entry is removed once it is strictly outside of the window, so pad the delay a little
+        return max(0.0, self._windows[bucket][excess] + bucket.window - time.time()) + 0.001
+
+    def time_until_allowed(self) -> float:
+        return max((self._bucket_time_until_capacity(bucket) for bucket in self._buckets), default=0.0)
+
+    def bucket_utilisation(self) -> dict[str, float]:
+        utilisation = {}
+        for bucket in self._buckets:
+            self._expire_bucket(bucket)
+            utilisation[bucket.label] = len(self._windows[bucket]) / self._bucket_limit(bucket)
+        return utilisation
+
+    def throughput(self) -> float:
+        return min((self._bucket_limit(bucket) / bucket.window for bucket in self._buckets), default=math.inf)
+
+    def bucket_limits(self) -> dict[str, float]:
+        return {bucket.label: self._bucket_limit(bucket) for bucket in self._buckets}
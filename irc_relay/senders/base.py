@@ -0,0 +1,53 @@
+import abc
+from collections.abc import Callable
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+
+# Called with the sender, a channel and whether the sender now accepts messages for it
+ChannelListener = Callable[["IrcSender", str, bool], None]
+
+
+class IrcSender(abc.ABC):
+    @abc.abstractmethod
+    async def send_to_channel(
+        self, channel: str, string: str, ttl: float | None = None, priority: bool = False
+    ) -> None:
+        """Queue `string` for `channel`, `priority` ones ahead of the channel's other queued messages."""
+
+    @abc.abstractmethod
+    async def update_channels(self, channels: list[str]) -> None:
+        """JOIN channels added to and PART channels removed from the list, without reconnecting."""
+
+    @abc.abstractmethod
+    def update_rate_limiter(self, config: SlidingWindowRateLimitConfig | None) -> None:
+        """Apply new rate limits, keeping the current window state where the engine allows it."""
+
+    @abc.abstractmethod
+    async def run(self) -> None: ...
+
+    @abc.abstractmethod
+    async def shutdown(self) -> None: ...
+
+    def channel_status(self) -> dict[str, bool]:
+        """Whether each configured channel is joined and can currently be written to."""
+        return {}
+
+    def is_ready(self) -> bool:
+        status = self.channel_status()
+        return bool(status) and all(status.values())
+
+    def add_channel_listener(self, listener: ChannelListener) -> None:
+        """Senders that never report their channels are treated as accepting nothing by admission control."""
+
+    def accepting_channels(self) -> set[str]:
+        """Channels a message would currently be accepted for, whether sent straight away or spooled."""
+        return set()
+
+    def admission_delay(self, channel: str) -> float:
+        """0 if a message for an accepting `channel` would be queued now, otherwise roughly how long until it would."""
+        return 0.0
+
+    def pressure(self, channel: str) -> float:
+        """How close (0 to 1) a message for `channel` is to expiring before it is sent, so callers can shed low value
+        messages first."""
+        return 0.0
@@ -0,0 +1,57 @@
+import dataclasses
+
+from irc_relay.config.sender import SenderConfig
+from irc_relay.rate_limit.factory import make_channel_rate_limiters, make_rate_limiter
+from irc_relay.senders.base import IrcSender
+from irc_relay.senders.irc import IrcClient
+from irc_relay.senders.pool import IrcClientPool
+from irc_relay.senders.spool import MessageSpool
+
+
+def _make_client(sender_config: SenderConfig, nick: str, name: str | None = None) -> IrcClient:
+    spool = None
+    if sender_config.client.spool_path:
+        # Pool members each need their own spool file
+        path = f"{sender_config.client.spool_path}.{nick}" if name else sender_config.client.spool_path
+        spool = MessageSpool(path, sender_config.client.spool_max_bytes)
+
+    throttler = sender_config.throttler
+    if throttler and throttler.shared_path and name:
+        # Each nick has its own budget on the network, shared only with other processes using the same nick
+        throttler = dataclasses.replace(throttler, shared_path=f"{throttler.shared_path}.{nick}")
+
+    return IrcClient(
+        sender_config.client.server,
+        sender_config.client.port,
+        nick,
+        sender_config.client.username,
+        sender_config.client.password,
+        sender_config.client.channels,
+        make_rate_limiter(throttler) if throttler else None,
+        sender_config.client.queue_size,
+        sender_config.client.message_ttl,
+        name,
+        spool,
+        sender_config.client.spool_max_age,
+        sender_config.client.inbound_sample_every,
+        sender_config.client.probe_interval,
+        sender_config.client.reconnect_min_delay,
+        sender_config.client.reconnect_max_delay,
+        make_channel_rate_limiters(throttler) if throttler else None,
+        throttler.channel_shares if throttler else None,
+    )
+
+
+def make_sender(sender_config: SenderConfig) -> IrcSender:
+    if not sender_config.client.pool_nicks:
+        return _make_client(sender_config, sender_config.client.nick)
+
+    name = f"{sender_config.client.server}:{sender_config.client.port}"
+    return IrcClientPool(
+        name,
+        [
+            _make_client(sender_config, nick, f"{name}/{nick}")
+            for nick in [sender_config.client.nick, *sender_config.client.pool_nicks]
+        ],
+        sender_config.client.pool_routing,
+    )
@@ -1,26 +1,201 @@
 import asyncio
 import base64
 import logging
+import math
+import random
+import ssl
 import time
+from collections.abc import Awaitable, Callable
 
 import bottom
+from bottom.core import make_protocol_factory
+from prometheus_client import Histogram
 
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
 from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.factory import make_channel_rate_limiters, make_rate_limiter, reconfigure_rate_limiter
+from irc_relay.rate_limit.sliding_window import SlidingWindowRateLimit
+from irc_relay.senders.base import ChannelListener, IrcSender
 from irc_relay.senders.metrics import (
-    irc_messages_accepted,
-    irc_messages_rejected,
     irc_connection_status,
     irc_connection_time,
+    irc_flood_warnings,
+    irc_inbound_lines_skipped,
+    irc_message_latency,
+    irc_messages_accepted,
+    irc_messages_expired,
+    irc_messages_in_flight,
+    irc_messages_rejected,
+    irc_probe_round_trip,
+    irc_queue_depth,
+    irc_rate_limit_limit,
+    irc_rate_limit_utilisation,
+    irc_rate_limit_wait_duration,
+    irc_send_duration,
+    irc_spool_expired,
+    irc_spool_messages,
+    irc_spool_replayed,
+    irc_tls_sessions_resumed,
 )
+from irc_relay.senders.queue import OutboundMessage, OutboundQueue
+from irc_relay.senders.spool import MessageSpool
 
 logger = logging.getLogger(__name__)
 
 
-class IrcClient:
+DisconnectListener = Callable[["IrcClient", list[OutboundMessage]], Awaitable[None]]
+
+# Other users' activity, which we never act on. Our own JOIN/PART and messages addressed to us are still let through.
+_CHATTER_COMMANDS = frozenset(
+    {b"PRIVMSG", b"NOTICE", b"JOIN", b"PART", b"QUIT", b"NICK", b"AWAY", b"ACCOUNT", b"CHGHOST"}
+)
+
+
+# Room left for the command and line ending when packing channels into a single JOIN
+_MAX_JOIN_TARGETS_BYTES = 400
+
+
+def split_command(line: bytes) -> tuple[bytes, bytes, bytes]:
+    """Split `[:<prefix> ]<command> <params>` into its parts without decoding."""
+    prefix = b""
+    if line.startswith(b":"):
+        prefix, _, line = line.partition(b" ")
+    command, _, params = line.partition(b" ")
+    return prefix, command.upper(), params
+
+
+def encode_privmsg(channel: str, string: str) -> bytes:
+    # Line breaks would otherwise terminate the PRIVMSG and be read as a new command
+    return b"PRIVMSG %s :%s\r\n" % (
+        channel.encode("utf-8"),
+        string.replace("\r", " ").replace("\n", " ").encode("utf-8"),
+    )
+
+
+def pack_join_targets(channels: list[str]) -> list[str]:
+    """Comma-join channels into as few JOIN targets as fit on a line."""
+    targets, current = [], ""
+    for channel in channels:
+        if current and len(current) + len(channel) + 1 > _MAX_JOIN_TARGETS_BYTES:
+            targets.append(current)
+            current = ""
+        current = f"{current},{channel}" if current else channel
+    if current:
+        targets.append(current)
+    return targets
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """Offers the TLS session of the previous connection when reconnecting.
+
+    asyncio does not expose session resumption, so the session is injected where the connection's SSL object is
+    created. A server that no longer knows the session simply falls back to a full handshake.
+    """
+
+    session: ssl.SSLSession | None = None
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session or self.session)
+
+
+def make_ssl_context() -> ResumingSSLContext:
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_default_certs()
+    return context
+
+
+class _Client(bottom.Client):
+    """bottom's client, keeping hold of the transport each connection is made on."""
+
+    _transport: asyncio.WriteTransport | None = None
+
+    @property
+    def transport(self) -> asyncio.WriteTransport | None:
+        return None if self.is_closing() else self._transport
+
+    async def connect(self) -> None:
+        # As bottom's own connect, which drops the transport `create_connection` hands back
+        if not self.is_closing():
+            return
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_connection(
+            make_protocol_factory(self), host=self._host, port=self._port, ssl=self._ssl
+        )
+        if not self.is_closing():
+            protocol.close()
+            return
+        self._protocol, self._transport = protocol, transport
+        self.trigger("client_connect")
+
+
+class CoalescingWriter:
+    """Buffers encoded lines written within one event loop tick and hands them to the transport as a single write.
+
+    The buffer is also flushed straight away once it reaches `max_buffer` bytes, so a long burst is not held back.
+    Each write to the transport is observed by `write_duration`, if given.
+    """
+
+    def __init__(
+        self, max_buffer: int = 16384, high_water: int = 65536, write_duration: Histogram | None = None
+    ) -> None:
+        self._max_buffer = max_buffer
+        self._high_water = high_water
+        self._write_duration = write_duration
+        self._transport: asyncio.WriteTransport | None = None
+        self._buffer: list[bytes] = []
+        self._size = 0
+        self._flush_handle: asyncio.Handle | None = None
+
+    def attach(self, transport: asyncio.WriteTransport | None) -> None:
+        self._transport = transport
+
+    def detach(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._transport = None
+        self._buffer, self._size = [], 0
+
+    def is_connected(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    def write(self, line: bytes) -> None:
+        if not self.is_connected():
+            raise RuntimeError("Not connected")
+
+        self._buffer.append(line)
+        self._size += len(line)
+        if self._size >= self._max_buffer:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._buffer and self.is_connected():
+            if self._write_duration is None:
+                self._transport.write(b"".join(self._buffer))
+            else:
+                start = time.perf_counter()
+                self._transport.write(b"".join(self._buffer))
+                self._write_duration.observe(time.perf_counter() - start)
+        self._buffer, self._size = [], 0
+
+    async def drain(self) -> None:
+        # bottom's protocol does not implement flow control, so poll the transport buffer instead
+        while self.is_connected() and self._transport.get_write_buffer_size() > self._high_water:
+            await asyncio.sleep(0.005)
+
+
+class IrcClient(IrcSender):
     _should_run: bool
     _can_accept_messages: dict[str, bool]
     _allowed_channels: list[str]
-    _client: bottom.Client | None
+    _client: _Client
+    _queue_task: asyncio.Task | None
 
     def __init__(
         self,
@@ -31,28 +206,81 @@ class IrcClient:
         password: str | None,
         allowed_channels: list[str],
         rate_limiter: RateLimiter | None,
+        queue_size: int = 1000,
+        message_ttl: float = 30,
+        name: str | None = None,
+        spool: MessageSpool | None = None,
+        spool_max_age: float = 300,
+        inbound_sample_every: int = 0,
+        probe_interval: float = 0,
+        reconnect_min_delay: float = 1,
+        reconnect_max_delay: float = 60,
+        channel_rate_limiters: dict[str, RateLimiter] | None = None,
+        channel_shares: dict[str, float] | None = None,
     ):
-        self._identifier = f"{server}:{port}"
+        self._identifier = name or f"{server}:{port}"
 
         self._can_accept_messages = {channel.lower(): False for channel in allowed_channels}
         self._should_run = True
         self._rate_limiter = rate_limiter
+        # Checked before `rate_limiter`, the connection wide budget
+        self._channel_rate_limiters = channel_rate_limiters or {}
 
         self._allowed_channels = [channel.lower() for channel in allowed_channels]
+        self._outbound_queue = OutboundQueue(queue_size, channel_shares, self._allowed_channels)
+        self._message_ttl = message_ttl
+        self._queue_task = None
+        self._disconnect_listeners: list[DisconnectListener] = []
+        self._channel_listeners: list[ChannelListener] = []
+
+        self._spool = spool
+        self._spool_max_age = spool_max_age
+        self._replay_task: asyncio.Task | None = None
+        self._registration_task: asyncio.Task | None = None
+
+        # Evaluated on scrape, so they stay accurate while idle
+        self._processing = 0
+        irc_messages_in_flight.labels(name=self._identifier).set_function(
+            lambda: len(self._outbound_queue) + self._processing
+        )
+        self._rate_limit_buckets: list[str] = []
+        self._register_rate_limit_metrics()
 
         self._irc_server = server
         self._irc_port = port
         self._irc_nick = nick
         self._irc_username = username
         self._irc_password = password
+        self._own_prefix = f":{nick}!".lower().encode("utf-8")
+
+        # SASL/CAP replies are only looked for while registering, after that lines skip straight to bottom
+        self._registering = False
+        self._inbound_sample_every = inbound_sample_every
+        self._inbound_chatter_seen = 0
+
+        # PINGs written behind our PRIVMSGs, the time to the PONG is fed back to the rate limiter
+        self._probe_interval = probe_interval
+        self._probe_task: asyncio.Task | None = None
+        self._probe_count = 0
+        self._probe_token: bytes | None = None
+        self._probe_sent_at = 0.0
+
+        # Full jitter exponential backoff, reset once a connection has joined every channel
+        self._reconnect_min_delay = reconnect_min_delay
+        self._reconnect_max_delay = reconnect_max_delay
+        self._reconnect_attempts = 0
 
+        # Kept across reconnects, so certificates are loaded once and the TLS session can be resumed
+        self._ssl_context = make_ssl_context() if port == 6697 else None
+
+        self._writer = CoalescingWriter(write_duration=irc_send_duration.labels(name=self._identifier))
         self._client = self._create_client()
 
-    def _create_client(self) -> bottom.Client:
-        client = bottom.Client(host=self._irc_server, port=self._irc_port, ssl=(self._irc_port == 6697))
+    def _create_client(self) -> _Client:
+        client = _Client(host=self._irc_server, port=self._irc_port, ssl=self._ssl_context or False)
 
-        # Deal with SASL messages not handled by rfc2812_handler
-        client.message_handlers.insert(0, self._sasl_message_handler)
+        # Drop chatter and deal with SASL messages not handled by rfc2812_handler
+        client.message_handlers.insert(0, self._inbound_message_handler)
 
         # Dump all messages if we are debugging
         if logger.getEffectiveLevel() == logging.DEBUG:
@@ -62,35 +290,401 @@ class IrcClient:
         client.on("CLIENT_CONNECT")(self._connect_callback)
         client.on("PING")(self._ping_callback)
         client.on("PRIVMSG")(self._message_callback)
+        client.on("JOIN")(self._join_callback)
+        client.on("PART")(self._part_callback)
 
         return client
 
-    async def send_to_channel(self, channel: str, string: str) -> None:
+    @property
+    def identifier(self) -> str:
+        return self._identifier
+
+    @property
+    def nick(self) -> str:
+        return self._irc_nick
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._outbound_queue)
+
+    def pressure(self, channel: str) -> float:
+        # How much of its TTL a message would spend queued, or how full the channel's share of the queue (or the whole
+        # queue) is if that is closer to the limit
+        channel = channel.lower()
+        return min(
+            1.0,
+            max(
+                self._expected_wait(channel) / self._message_ttl,
+                self._outbound_queue.depth(channel) / self._outbound_queue.capacity(channel),
+                len(self._outbound_queue) / self._outbound_queue.max_size,
+            ),
+        )
+
+    def can_accept_messages(self, channel: str) -> bool:
+        return self._can_accept_messages.get(channel.lower(), False)
+
+    def channel_status(self) -> dict[str, bool]:
+        return dict(self._can_accept_messages)
+
+    def add_channel_listener(self, listener: ChannelListener) -> None:
+        self._channel_listeners.append(listener)
+
+    def _is_accepting(self, channel: str) -> bool:
+        if channel not in self._can_accept_messages:
+            return False
+        return self._can_accept_messages[channel] or self._spool is not None
+
+    def accepting_channels(self) -> set[str]:
+        return {channel for channel in self._can_accept_messages if self._is_accepting(channel)}
+
+    def _set_writable(self, channel: str, writable: bool) -> None:
+        self._can_accept_messages[channel] = writable
+        self._notify_channel_listeners(channel)
+
+    def _notify_channel_listeners(self, channel: str) -> None:
+        for listener in self._channel_listeners:
+            listener(self, channel, self._is_accepting(channel))
+
+    def admission_delay(self, channel: str) -> float:
+        channel = channel.lower()
+        if not self._can_accept_messages.get(channel, False):
+            # Spooled until the channel is joined again
+            return 0
+
+        wait = self._expected_wait(channel)
+        if wait < self._message_ttl and self._outbound_queue.has_room(channel):
+            return 0
+        return max(wait, 1)
+
+    def _expected_wait(self, channel: str) -> float:
+        """Seconds a message queued for `channel` now would wait before being sent.
+
+        That is until the limiters next allow a message, then for everything queued ahead of it on the channel at the
+        rate the channel gets while sharing the connection.
+        """
+        delay = self._channel_delay(channel)
+        rate = math.inf
+        if self._rate_limiter:
+            delay = max(delay, self._rate_limiter.time_until_allowed())
+            rate = self._rate_limiter.throughput() * self._outbound_queue.share(channel)
+        if (channel_rate_limiter := self._channel_rate_limiters.get(channel)) is not None:
+            rate = min(rate, channel_rate_limiter.throughput())
+        return delay + self._outbound_queue.depth(channel) / rate
+
+    def _register_rate_limit_metrics(self) -> None:
+        for bucket in self._rate_limit_buckets:
+            irc_rate_limit_utilisation.remove(self._identifier, bucket)
+            irc_rate_limit_limit.remove(self._identifier, bucket)
+
+        self._rate_limit_buckets = list(self._rate_limiter.bucket_utilisation()) if self._rate_limiter else []
+        for bucket in self._rate_limit_buckets:
+            irc_rate_limit_utilisation.labels(name=self._identifier, bucket=bucket).set_function(
+                lambda bucket=bucket: (
+                    self._rate_limiter.bucket_utilisation().get(bucket, 0.0) if self._rate_limiter else 0.0
+                )
+            )
+            irc_rate_limit_limit.labels(name=self._identifier, bucket=bucket).set_function(
+                lambda bucket=bucket: self._rate_limiter.bucket_limits().get(bucket, 0.0) if self._rate_limiter else 0.0
+            )
+
+    def update_rate_limiter(self, config: SlidingWindowRateLimitConfig | None) -> None:
+        if config and self._rate_limiter and reconfigure_rate_limiter(self._rate_limiter, config):
+            logger.info(f"[{self._identifier}] Updated rate limits in place: {[b.label for b in config.buckets]}")
+        else:
+            logger.warning(f"[{self._identifier}] Replacing rate limiter, current window state is discarded")
+            previous, self._rate_limiter = self._rate_limiter, make_rate_limiter(config) if config else None
+            if previous:
+                previous.close()
+        self._register_rate_limit_metrics()
+
+        # Channels still configured keep their window state
+        channel_rate_limiters = make_channel_rate_limiters(config) if config else {}
+        for channel, buckets in (config.channel_buckets if config else {}).items():
+            current = self._channel_rate_limiters.get(channel.lower())
+            if current and current.reconfigure(SlidingWindowRateLimit.engine, buckets):
+                channel_rate_limiters[channel.lower()] = current
+        self._channel_rate_limiters = channel_rate_limiters
+        self._outbound_queue.set_weights(config.channel_shares if config else {})
+
+    async def update_channels(self, channels: list[str]) -> None:
+        channels = [channel.lower() for channel in channels]
+        connected = self._writer.is_connected()
+
+        for channel in [channel for channel in self._allowed_channels if channel not in channels]:
+            logger.info(f"[{self._identifier}] Leaving {channel}")
+            self._allowed_channels.remove(channel)
+            self._can_accept_messages.pop(channel, None)
+            self._notify_channel_listeners(channel)
+            if discarded := self._outbound_queue.discard(channel):
+                logger.warning(f"[{self._identifier}] Discarding {len(discarded)} messages queued for {channel}")
+                irc_messages_rejected.labels(name=self._identifier, channel=channel, reason="missing_in_allowed").inc(
+                    len(discarded)
+                )
+                irc_queue_depth.labels(name=self._identifier).set(len(self._outbound_queue))
+            if connected:
+                await self._client.send("part", channel=channel)
+
+        added = [channel for channel in channels if channel not in self._allowed_channels]
+        for channel in added:
+            self._allowed_channels.append(channel)
+            self._set_writable(channel, False)
+        self._outbound_queue.set_channels(self._allowed_channels)
+        if connected and added:
+            await self._join_channels(added)
+
+    def add_disconnect_listener(self, listener: DisconnectListener) -> None:
+        """Listeners are handed the messages still queued when the connection dropped, instead of them expiring."""
+        self._disconnect_listeners.append(listener)
+
+    async def send_to_channel(
+        self, channel: str, string: str, ttl: float | None = None, priority: bool = False
+    ) -> None:
         channel = channel.lower()
         if channel not in self._allowed_channels:
             logger.debug(f"[{self._identifier}] {channel} is not in allowed channels, ignoring")
             irc_messages_rejected.labels(name=self._identifier, channel=channel, reason="missing_in_allowed").inc()
             return
 
-        if not self._can_accept_messages[channel]:
+        if not self._can_accept_messages.get(channel, False):
+            if self._spool_message(channel, string):
+                return
             logger.warning(f"[{self._identifier}] {channel} can not accept messages, ignoring")
             irc_messages_rejected.labels(name=self._identifier, channel=channel, reason="not_joined").inc()
             return
 
+        if not self._outbound_queue.put(channel, string, self._message_ttl if ttl is None else ttl, priority):
+            logger.warning(f"[{self._identifier}] [{channel}] dropping due to full queue: {string}")
+            irc_messages_rejected.labels(name=self._identifier, channel=channel, reason="queue_full").inc()
+            return
+        irc_queue_depth.labels(name=self._identifier).set(len(self._outbound_queue))
+
+    def _spool_message(self, channel: str, string: str) -> bool:
+        if self._spool is None or not self._spool.append(channel, string):
+            return False
+
+        logger.debug(f"[{self._identifier}] [{channel}] spooled: {string}")
+        irc_spool_messages.labels(name=self._identifier).set(len(self._spool))
+        return True
+
+    async def _replay_spool(self) -> None:
+        logger.info(f"[{self._identifier}] Replaying {len(self._spool)} spooled messages")
+
+        # Only look at what is in the spool now, anything re-spooled below is left for the next replay
+        for _ in range(len(self._spool)):
+            if (message := self._spool.peek()) is None:
+                break
+
+            if message.age() > self._spool_max_age:
+                self._spool.pop()
+                irc_spool_expired.labels(name=self._identifier, channel=message.channel).inc()
+                continue
+
+            if not self.can_accept_messages(message.channel):
+                self._spool.pop()
+                self._spool.append(message.channel, message.string, message.spooled_at)
+                continue
+
+            # Wait for the outbound queue to drain rather than overflowing it with the backlog
+            while not self._outbound_queue.put(message.channel, message.string, self._spool_max_age - message.age()):
+                if not self.can_accept_messages(message.channel):
+                    return
+                await asyncio.sleep(1)
+
+            self._spool.pop()
+            irc_queue_depth.labels(name=self._identifier).set(len(self._outbound_queue))
+            irc_spool_replayed.labels(name=self._identifier, channel=message.channel).inc()
+            irc_spool_messages.labels(name=self._identifier).set(len(self._spool))
+
+        irc_spool_messages.labels(name=self._identifier).set(len(self._spool))
+
+    def _channel_delay(self, channel: str) -> float:
+        if (rate_limiter := self._channel_rate_limiters.get(channel)) is None:
+            return 0
+        return rate_limiter.time_until_allowed()
+
+    def _rate_limit_delay(self, channel: str) -> float:
+        return max(self._channel_delay(channel), self._rate_limiter.time_until_allowed() if self._rate_limiter else 0)
+
+    async def _wait_for_rate_limit(self, channel: str) -> None:
+        while (delay := self._rate_limit_delay(channel)) > 0:
+            await asyncio.sleep(delay)
+
+    def _take_rate_limit(self, channel: str) -> bool:
+        # The connection limiter may be shared with other processes, which can take the slot we waited for. It is
+        # charged first so a refusal costs no channel budget; only this loop uses the channel limiter, so once waited
+        # for it still has room
         if self._rate_limiter and not self._rate_limiter.should_allow():
-            logger.warning(f"[{self._identifier}] [{channel}] dropping due to rate limit: {string}")
-            irc_messages_rejected.labels(name=self._identifier, channel=channel, reason="rate_limit").inc()
+            return False
+        if (channel_rate_limiter := self._channel_rate_limiters.get(channel)) is not None:
+            channel_rate_limiter.should_allow()
+        return True
+
+    def _discard_if_expired(self, message: OutboundMessage) -> bool:
+        if not message.has_expired():
+            return False
+
+        logger.warning(f"[{self._identifier}] [{message.channel}] expired in queue: {message.string}")
+        irc_messages_expired.labels(name=self._identifier, channel=message.channel).inc()
+        return True
+
+    async def _process_outbound_queue(self) -> None:
+        while self._should_run:
+            message = await self._outbound_queue.get(self._channel_delay)
+            irc_queue_depth.labels(name=self._identifier).set(len(self._outbound_queue))
+
+            self._processing = 1
+            try:
+                await self._process_outbound_message(message)
+            except Exception:
+                # One bad message must not stop everything queued behind it
+                logger.exception(f"[{self._identifier}] [{message.channel}] failed to process message")
+                irc_messages_rejected.labels(name=self._identifier, channel=message.channel, reason="error").inc()
+            finally:
+                self._processing = 0
+
+    async def _process_outbound_message(self, message: OutboundMessage) -> None:
+        if self._discard_if_expired(message):
             return
 
-        logger.info(f"Sending [{channel}] {string}")
-        await self._client.send("privmsg", target=channel, message=string)
-        irc_messages_accepted.labels(name=self._identifier, channel=channel).inc()
+        while True:
+            with irc_rate_limit_wait_duration.labels(name=self._identifier).time():
+                await self._wait_for_rate_limit(message.channel)
+
+            # Checked again after waiting, so we never spend rate limit capacity on a message we will not send
+            if self._discard_if_expired(message):
+                return
+
+            if message.channel not in self._allowed_channels:
+                # Removed by a reload while this message was waiting
+                irc_messages_rejected.labels(
+                    name=self._identifier, channel=message.channel, reason="missing_in_allowed"
+                ).inc()
+                return
+
+            if not self._can_accept_messages.get(message.channel, False):
+                if self._spool_message(message.channel, message.string):
+                    return
+                logger.warning(f"[{self._identifier}] {message.channel} can not accept messages, ignoring")
+                irc_messages_rejected.labels(name=self._identifier, channel=message.channel, reason="not_joined").inc()
+                return
+
+            if self._take_rate_limit(message.channel):
+                break
+
+        logger.info(f"Sending [{message.channel}] {message.string}")
+        try:
+            self._writer.write(encode_privmsg(message.channel, message.string))
+            await self._writer.drain()
+        except RuntimeError as e:
+            if self._spool_message(message.channel, message.string):
+                return
+            logger.warning(f"[{self._identifier}] [{message.channel}] failed to send: {e}")
+            irc_messages_rejected.labels(name=self._identifier, channel=message.channel, reason="not_connected").inc()
+            return
+        irc_messages_accepted.labels(name=self._identifier, channel=message.channel).inc()
+        irc_message_latency.labels(name=self._identifier).observe(time.monotonic() - message.queued_at)
 
     async def shutdown(self):
         logger.info(f"[{self._identifier}] Shutting down IRC Client")
         self._should_run = False
-        if self._client:
-            await self._client.disconnect()
+        if self._queue_task:
+            self._queue_task.cancel()
+        if self._replay_task:
+            self._replay_task.cancel()
+        if self._probe_task:
+            self._probe_task.cancel()
+        self._cancel_registration()
+        await self._client.disconnect()
+        if self._spool is not None:
+            self._spool.close()
+        if self._rate_limiter:
+            self._rate_limiter.close()
+            self._rate_limiter = None
+            self._register_rate_limit_metrics()
+        # Its callback would keep this client alive and report a stale value
+        irc_messages_in_flight.remove(self._identifier)
+
+    def _is_relevant_chatter(self, prefix: bytes, command: bytes, params: bytes) -> bool:
+        if command in (b"JOIN", b"PART"):
+            return prefix.lower().startswith(self._own_prefix)
+
+        if command in (b"PRIVMSG", b"NOTICE"):
+            # Anything not sent to a channel is for us (or the server talking before registration completes)
+            if not params.startswith((b"#", b"&")):
+                return True
+
+            self._inbound_chatter_seen += 1
+            return bool(self._inbound_sample_every) and self._inbound_chatter_seen % self._inbound_sample_every == 0
+
+        return False
+
+    def _handle_kick(self, params: bytes) -> None:
+        channel, _, params = params.partition(b" ")
+        target, _, reason = params.partition(b" ")
+        if target.lower() != self._irc_nick.lower().encode("utf-8"):
+            return
+
+        channel = channel.decode("utf-8", "replace").lower()
+        if channel in self._can_accept_messages:
+            logger.warning(f"[{self._identifier}] Kicked from {channel}: {reason.decode('utf-8', 'replace')}")
+            self._set_writable(channel, False)
+
+    def _is_flood_warning(self, prefix: bytes, command: bytes, params: bytes) -> bool:
+        # RPL_TRYAGAIN and ERR_TARGCHANGE, or a server (not user) notice/error mentioning flooding
+        if command in (b"263", b"707"):
+            return True
+        return command in (b"NOTICE", b"ERROR") and b"!" not in prefix and b"flood" in params.lower()
+
+    def _send_probe(self) -> None:
+        if not self._writer.is_connected():
+            return
+
+        if self._probe_token is not None:
+            # Still unanswered, the round trip is at least this long
+            self._observe_round_trip(time.monotonic() - self._probe_sent_at)
+
+        self._probe_count += 1
+        self._probe_token = f"irc-relay-probe-{self._probe_count}".encode("utf-8")
+        self._probe_sent_at = time.monotonic()
+        self._writer.write(b"PING :%s\r\n" % self._probe_token)
+
+    def _observe_round_trip(self, seconds: float) -> None:
+        irc_probe_round_trip.labels(name=self._identifier).observe(seconds)
+        if self._rate_limiter:
+            self._rate_limiter.observe_round_trip(seconds)
+
+    async def _probe_connection(self) -> None:
+        while self._should_run:
+            await asyncio.sleep(self._probe_interval)
+            self._send_probe()
+
+    async def _inbound_message_handler(
+        self, next_handler: bottom.NextMessageHandler[bottom.Client], client: bottom.Client, message: bytes
+    ) -> None:
+        prefix, command, params = split_command(message)
+        if command in _CHATTER_COMMANDS and not self._is_relevant_chatter(prefix, command, params):
+            irc_inbound_lines_skipped.labels(name=self._identifier, command=command.decode("ascii", "replace")).inc()
+            return
+
+        if command == b"KICK":
+            self._handle_kick(params)
+
+        if command == b"PONG" and self._probe_token is not None and params.endswith(self._probe_token):
+            self._probe_token = None
+            self._observe_round_trip(time.monotonic() - self._probe_sent_at)
+            return
+
+        if self._is_flood_warning(prefix, command, params):
+            logger.warning(f"[{self._identifier}] Flood warning from server: {message.decode(errors='replace')}")
+            irc_flood_warnings.labels(name=self._identifier).inc()
+            if self._rate_limiter:
+                self._rate_limiter.observe_flood_warning()
+
+        if self._registering:
+            await self._sasl_message_handler(next_handler, client, message)
+            return
+
+        await next_handler(client, message)
 
     async def _sasl_message_handler(
         self, next_handler: bottom.NextMessageHandler[bottom.Client], client: bottom.Client, message: bytes
@@ -136,10 +730,36 @@ class IrcClient:
 
     async def _ping_callback(self, message: str, **kwargs) -> None:
         await self._client.send("pong", message=message)
+        if self._probe_interval:
+            self._send_probe()
 
     async def _message_callback(self, nick: str, target: str, message: str, **kwargs) -> None:
         logger.info(f"[{self._identifier}] Got message from {nick} in {target}: {message}")
 
+    async def _join_callback(self, nick: str, channel: str, **kwargs) -> None:
+        # Only our own JOINs get this far, channels become writable once the server has confirmed them
+        channel = channel.lower()
+        if nick.lower() != self._irc_nick.lower() or channel not in self._can_accept_messages:
+            return
+
+        logger.info(f"[{self._identifier}] Joined {channel}")
+        self._set_writable(channel, True)
+        if all(self._can_accept_messages.values()):
+            # Only a connection that got every channel back counts as recovered
+            self._reconnect_attempts = 0
+        if self._spool is not None and len(self._spool) and (self._replay_task is None or self._replay_task.done()):
+            self._replay_task = asyncio.create_task(self._replay_spool())
+
+    async def _part_callback(self, nick: str, channel: str, **kwargs) -> None:
+        channel = channel.lower()
+        if nick.lower() == self._irc_nick.lower() and channel in self._can_accept_messages:
+            self._set_writable(channel, False)
+
+    async def _join_channels(self, channels: list[str]) -> None:
+        logger.info(f"[{self._identifier}] Joining channels: {channels}")
+        for targets in pack_join_targets(channels):
+            await self._client.send_message(f"JOIN {targets}")
+
     async def _authenticate_via_sasl(self) -> bool:
         if not (self._irc_username and self._irc_password):
             logger.info(f"[{self._identifier}] No credentials, skipping SASL")
@@ -191,11 +811,17 @@ class IrcClient:
         irc_connection_status.labels(name=self._identifier).set(1)
         irc_connection_time.labels(name=self._identifier).set(time.time())
 
+        # Cancelled on disconnect, so a registration left waiting on replies does not resume on the next connection
+        self._registration_task = asyncio.create_task(self._register())
+
+    async def _register(self) -> None:
+        self._registering = True
         if not await self._authenticate_via_sasl():
             logger.error(f"[{self._identifier}] SASL failed")
             irc_connection_status.labels(name=self._identifier).set(0)
             await self._client.disconnect()
             return
+        self._registering = False
 
         logger.debug(f"[{self._identifier}] Sending registration details ({self._irc_nick})")
         await self._client.send("nick", nick=self._irc_nick)
@@ -209,22 +835,67 @@ class IrcClient:
         logger.debug(f"[{self._identifier}] Waiting for end of MOTD before joining channels")
         await bottom.wait_for(self._client, ["RPL_ENDOFMOTD", "ERR_NOMOTD"], mode="first")
 
-        logger.info(f"[{self._identifier}] Joining channels: {self._allowed_channels}")
-        for channel in self._allowed_channels:
-            await self._client.send("join", channel=channel)
-            self._can_accept_messages[channel] = True
+        self._remember_tls_session()
+        await self._join_channels(self._allowed_channels)
+
+    def _cancel_registration(self) -> None:
+        if self._registration_task is not None:
+            self._registration_task.cancel()
+            self._registration_task = None
+        self._registering = False
+
+    def _remember_tls_session(self) -> None:
+        # Read after registration, TLS 1.3 servers only send their session ticket once the handshake has completed
+        if self._ssl_context is None or (transport := self._client.transport) is None:
+            return
+
+        ssl_object = transport.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return
+
+        if ssl_object.session_reused:
+            logger.info(f"[{self._identifier}] Resumed TLS session")
+            irc_tls_sessions_resumed.labels(name=self._identifier).inc()
+        self._ssl_context.session = ssl_object.session
+
+    def _reconnect_delay(self) -> float:
+        ceiling = min(self._reconnect_max_delay, self._reconnect_min_delay * 2**self._reconnect_attempts)
+        self._reconnect_attempts += 1
+        return random.uniform(0, ceiling)  # nosec B311
 
     async def run(self) -> None:
         logger.info(f"[{self._identifier}] Starting IRC Client")
+        self._queue_task = asyncio.create_task(self._process_outbound_queue())
+        if self._probe_interval:
+            self._probe_task = asyncio.create_task(self._probe_connection())
         while self._should_run:
-            if self._client is None:
-                self._client = self._create_client()
-
-            await self._client.connect()
+            try:
+                await self._client.connect()
+            except OSError as e:
+                delay = self._reconnect_delay()
+                logger.error(f"[{self._identifier}] Failed to connect ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            # PRIVMSGs bypass bottom's per-line writes, the rest of the protocol still goes through bottom
+            self._writer.attach(self._client.transport)
             await self._client.wait("client_disconnect")
             logger.error(f"[{self._identifier}] Disconnected by remote")
 
             irc_connection_status.labels(name=self._identifier).set(0)
-            self._can_accept_messages = {channel: False for channel in self._can_accept_messages}
-            self._client = None
-            await asyncio.sleep(5)
+            self._cancel_registration()
+            for channel in self._can_accept_messages:
+                self._set_writable(channel, False)
+            self._writer.detach()
+            self._probe_token = None
+
+            if self._disconnect_listeners:
+                pending = self._outbound_queue.drain()
+                irc_queue_depth.labels(name=self._identifier).set(0)
+                for listener in self._disconnect_listeners:
+                    await listener(self, pending)
+
+            if self._should_run:
+                delay = self._reconnect_delay()
+                logger.info(f"[{self._identifier}] Reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 from irc_relay.config import PROMETHEUS_METRIC_NAMESPACE
 
@@ -25,3 +25,108 @@ irc_connection_time = Gauge(
     "Last connection time",
     ["name"],
 )
+
+irc_queue_depth = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_queue_depth",
+    "Number of messages waiting in the outbound queue",
+    ["name"],
+)
+
+irc_messages_expired = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_messages_expired",
+    "Number of messages expired in the outbound queue before being sent",
+    ["name", "channel"],
+)
+
+irc_pool_messages_rerouted = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_pool_messages_rerouted",
+    "Number of queued messages moved to another pool member after a disconnect",
+    ["name", "channel"],
+)
+
+irc_spool_messages = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_spool_messages",
+    "Number of messages held in the spool",
+    ["name"],
+)
+
+irc_spool_replayed = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_spool_replayed",
+    "Number of spooled messages replayed after re-joining",
+    ["name", "channel"],
+)
+
+irc_spool_expired = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_spool_expired",
+    "Number of spooled messages discarded for exceeding the maximum age",
+    ["name", "channel"],
+)
+
+irc_rate_limit_wait_duration = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_rate_limit_wait_duration_seconds",
+    "Time a message waited for the rate limiter to have capacity",
+    ["name"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+irc_send_duration = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_send_duration_seconds",
+    "Time to hand a coalesced write of buffered messages to the IRC connection's transport",
+    ["name"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.01, 0.1, 1),
+)
+
+irc_message_latency = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_message_latency_seconds",
+    "Time from a message being accepted by the sender until it was written to the IRC connection",
+    ["name"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+irc_messages_in_flight = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_messages_in_flight",
+    "Number of messages accepted by the sender that have not yet been written or dropped",
+    ["name"],
+)
+
+irc_rate_limit_utilisation = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_rate_limit_utilisation",
+    "Fraction of each rate limit bucket currently used",
+    ["name", "bucket"],
+)
+
+irc_inbound_lines_skipped = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_inbound_lines_skipped",
+    "Number of inbound lines dropped before being parsed, such as channel chatter",
+    ["name", "command"],
+)
+
+irc_rate_limit_limit = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_rate_limit_limit",
+    "Messages currently allowed per window for each rate limit bucket",
+    ["name", "bucket"],
+)
+
+irc_probe_round_trip = Histogram(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_probe_round_trip_seconds",
+    "Time from writing a PING probe until the server answered it",
+    ["name"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+irc_flood_warnings = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_flood_warnings",
+    "Number of flood warnings received from the server",
+    ["name"],
+)
+
+irc_tls_sessions_resumed = Counter(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_irc_tls_sessions_resumed",
+    "Number of connections that resumed the TLS session of the previous connection",
+    ["name"],
+)
+
+irc_startup_to_ready = Gauge(
+    f"{PROMETHEUS_METRIC_NAMESPACE}_startup_to_ready_seconds",
+    "Seconds from the relay starting until a sender first had every configured channel joined",
+)
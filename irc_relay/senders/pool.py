@@ -0,0 +1,122 @@
+import asyncio
+import dataclasses
+import logging
+import time
+import zlib
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.senders.base import ChannelListener, IrcSender
+from irc_relay.senders.irc import IrcClient
+from irc_relay.senders.metrics import irc_messages_expired, irc_pool_messages_rerouted
+from irc_relay.senders.queue import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+
+class IrcClientPool(IrcSender):
+    """Several connections (one per nick) to the same network, presented as a single sender.
+
+    Each member has its own rate limiter and outbound queue. Messages are routed to a member that has the channel
+    joined, either by a stable hash of the channel (`channel_shard`), to the member with the shortest queue
+    (`least_loaded`) or to the first member able to send (`failover`, the others being joined hot standbys). Messages
+    still queued on a member that disconnects are handed back to the pool and re-routed.
+    """
+
+    def __init__(self, name: str, members: list[IrcClient], routing: str = "least_loaded") -> None:
+        if routing not in ("least_loaded", "channel_shard", "failover"):
+            raise ValueError(f"Unknown pool routing: {routing}")
+
+        self._name = name
+        self._members = members
+        self._routing = routing
+
+        self._channel_listeners: list[ChannelListener] = []
+        for member in self._members:
+            member.add_disconnect_listener(self._member_disconnected)
+            member.add_channel_listener(self._member_channel_changed)
+
+    def _select_member(self, channel: str) -> IrcClient:
+        candidates = [member for member in self._members if member.can_accept_messages(channel)]
+        if not candidates:
+            # Let the first member record the rejection
+            return self._members[0]
+
+        if self._routing == "channel_shard":
+            # Hash against the full member list so a channel only moves while its preferred member is down
+            preferred = self._members[zlib.crc32(channel.lower().encode("utf-8")) % len(self._members)]
+            if preferred in candidates:
+                return preferred
+            return candidates[zlib.crc32(channel.lower().encode("utf-8")) % len(candidates)]
+
+        if self._routing == "failover":
+            return candidates[0]
+
+        return min(candidates, key=lambda member: member.queue_depth)
+
+    def channel_status(self) -> dict[str, bool]:
+        # A channel is usable as long as any member can write to it
+        status: dict[str, bool] = {}
+        for member in self._members:
+            for channel, writable in member.channel_status().items():
+                status[channel] = status.get(channel, False) or writable
+        return status
+
+    def add_channel_listener(self, listener: ChannelListener) -> None:
+        self._channel_listeners.append(listener)
+
+    def accepting_channels(self) -> set[str]:
+        return set().union(*[member.accepting_channels() for member in self._members])
+
+    def _member_channel_changed(self, member: IrcSender, channel: str, accepting: bool) -> None:
+        accepting = accepting or any(channel in other.accepting_channels() for other in self._members)
+        for listener in self._channel_listeners:
+            listener(self, channel, accepting)
+
+    def admission_delay(self, channel: str) -> float:
+        return min(
+            [
+                member.admission_delay(channel)
+                for member in self._members
+                if channel.lower() in member.accepting_channels()
+            ],
+            default=0,
+        )
+
+    def pressure(self, channel: str) -> float:
+        return self._select_member(channel).pressure(channel)
+
+    async def send_to_channel(
+        self, channel: str, string: str, ttl: float | None = None, priority: bool = False
+    ) -> None:
+        await self._select_member(channel).send_to_channel(channel, string, ttl, priority)
+
+    async def update_channels(self, channels: list[str]) -> None:
+        await asyncio.gather(*[member.update_channels(channels) for member in self._members])
+
+    def update_rate_limiter(self, config: SlidingWindowRateLimitConfig | None) -> None:
+        for member in self._members:
+            member_config = config
+            if config and config.shared_path:
+                member_config = dataclasses.replace(config, shared_path=f"{config.shared_path}.{member.nick}")
+            member.update_rate_limiter(member_config)
+
+    async def _member_disconnected(self, member: IrcClient, pending: list[OutboundMessage]) -> None:
+        if not pending:
+            return
+
+        logger.warning(f"[{self._name}] {member.identifier} disconnected, re-routing {len(pending)} messages")
+        for message in pending:
+            remaining_ttl = message.expires_at - time.monotonic()
+            if remaining_ttl <= 0:
+                irc_messages_expired.labels(name=member.identifier, channel=message.channel).inc()
+                continue
+            await self.send_to_channel(message.channel, message.string, remaining_ttl, message.priority)
+            irc_pool_messages_rerouted.labels(name=self._name, channel=message.channel).inc()
+
+    async def run(self) -> None:
+        logger.info(f"[{self._name}] Starting IRC Client pool with {len(self._members)} members")
+        await asyncio.gather(*[member.run() for member in self._members])
+
+    async def shutdown(self) -> None:
+        logger.info(f"[{self._name}] Shutting down IRC Client pool")
+        await asyncio.gather(*[member.shutdown() for member in self._members])
@@ -0,0 +1,190 @@
+import asyncio
+import collections
+import dataclasses
+import heapq
+import time
+from collections.abc import Callable
+
+
+@dataclasses.dataclass
+class OutboundMessage:
+    channel: str
+    string: str
+    expires_at: float
+    queued_at: float = dataclasses.field(default_factory=time.monotonic)
+    # Sent ahead of the channel's other messages
+    priority: bool = False
+
+    def has_expired(self) -> bool:
+        return time.monotonic() > self.expires_at
+
+
+def _always_ready(channel: str) -> float:
+    return 0
+
+
+class OutboundQueue:
+    """Per-channel FIFOs served by deficit round-robin, `max_size` messages in total.
+
+    Each of `channels` may hold at most its weight's share of `max_size`, so one busy channel can not fill the queue
+    and leave nothing for the others. Channels not listed are only bound by `max_size`.
+
+    Each channel with queued messages is visited in turn and may send `weight` messages per round (fractional weights
+    carry over between rounds), so under contention every channel gets its share of the connection. Channels with
+    nothing queued take no part, leaving their share to the busy ones.
+
+    Within a channel messages are sent in order, except that `priority` ones go ahead of all non-priority ones.
+    """
+
+    def __init__(self, max_size: int, weights: dict[str, float] | None = None, channels: list[str] = ()) -> None:
+        self._max_size = max_size
+        self._weights: dict[str, float] = {}
+        self._capacities: dict[str, int] = {}
+        self._configured: list[str] = list(channels)
+        self._size = 0
+        self._channels: dict[str, collections.deque[OutboundMessage]] = {}
+        self._deficits: dict[str, float] = {}
+        # Priority messages at the head of each channel's FIFO
+        self._priority: dict[str, int] = {}
+        # Channels with queued messages, the head is the channel whose turn it is
+        self._active: collections.deque[str] = collections.deque()
+        self._not_empty = asyncio.Event()
+        self.set_weights(weights or {})
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def depth(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    def capacity(self, channel: str) -> int:
+        return self._capacities.get(channel, self._max_size)
+
+    def has_room(self, channel: str) -> bool:
+        return self._size < self._max_size and self.depth(channel) < self.capacity(channel)
+
+    def share(self, channel: str) -> float:
+        """Fraction of the connection `channel` gets while everything queued now is sent, counting it as queued."""
+        weight = self._weights.get(channel, 1.0)
+        total = sum(self._weights.get(active, 1.0) for active in self._active)
+        return weight / (total if channel in self._channels else total + weight)
+
+    def set_weights(self, weights: dict[str, float]) -> None:
+        # Validated as positive when the configuration is loaded
+        self._weights = {channel.lower(): weight for channel, weight in weights.items()}
+        self._update_capacities()
+
+    def set_channels(self, channels: list[str]) -> None:
+        self._configured = list(channels)
+        self._update_capacities()
+
+    def _update_capacities(self) -> None:
+        # Messages already queued beyond a reduced capacity stay, only new ones are refused
+        total = sum(self._weights.get(channel, 1.0) for channel in self._configured)
+        self._capacities = {
+            channel: max(1, int(self._max_size * self._weights.get(channel, 1.0) / total))
+            for channel in self._configured
+        }
+
+    def put(self, channel: str, string: str, ttl: float, priority: bool = False) -> bool:
+        if not self.has_room(channel):
+            return False
+
+        if (messages := self._channels.get(channel)) is None:
+            messages = self._channels[channel] = collections.deque()
+        if not messages:
+            self._active.append(channel)
+            self._deficits[channel] = 0
+            self._priority[channel] = 0
+
+        message = OutboundMessage(channel=channel, string=string, expires_at=time.monotonic() + ttl, priority=priority)
+        if priority:
+            messages.insert(self._priority[channel], message)
+            self._priority[channel] += 1
+        else:
+            messages.append(message)
+        self._size += 1
+        self._not_empty.set()
+        return True
+
+    def _pop(self, channel: str) -> OutboundMessage:
+        messages = self._channels[channel]
+        message = messages.popleft()
+        self._size -= 1
+        self._deficits[channel] -= 1
+        if message.priority:
+            self._priority[channel] -= 1
+
+        if not messages:
+            self._active.popleft()
+            del self._channels[channel], self._deficits[channel], self._priority[channel]
+        elif self._deficits[channel] < 1:
+            # Turn over, keep any remaining fraction for the next round
+            self._active.rotate(-1)
+        return message
+
+    def _next(self, channel_delay: Callable[[str], float]) -> tuple[OutboundMessage | None, float]:
+        """The next message due, or the time until one of the channels is allowed to send again."""
+        blocked: dict[str, float] = {}
+        while len(blocked) < len(self._active):
+            channel = self._active[0]
+            if channel in blocked:
+                self._active.rotate(-1)
+                continue
+
+            if (delay := channel_delay(channel)) > 0:
+                # A channel held back by its own limit does not earn credit, others borrow its share meanwhile
+                blocked[channel] = delay
+                self._active.rotate(-1)
+                continue
+
+            if self._deficits[channel] >= 1:
+                return self._pop(channel), 0
+
+            self._deficits[channel] += self._weights.get(channel, 1.0)
+            if self._deficits[channel] < 1:
+                self._active.rotate(-1)
+
+        return None, min(blocked.values(), default=0)
+
+    async def get(self, channel_delay: Callable[[str], float] = _always_ready) -> OutboundMessage:
+        """Wait for the next message from a channel that `channel_delay` allows to send now."""
+        while True:
+            if not self._size:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            message, delay = self._next(channel_delay)
+            if message is not None:
+                return message
+
+            # Every queued channel is held back, wake early if a message arrives for another one
+            self._not_empty.clear()
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), delay)
+            except TimeoutError:
+                pass
+
+    def discard(self, channel: str) -> list[OutboundMessage]:
+        """Remove and return everything queued for `channel`."""
+        if not (messages := self._channels.pop(channel, None)):
+            return []
+
+        self._active.remove(channel)
+        del self._deficits[channel], self._priority[channel]
+        self._size -= len(messages)
+        return list(messages)
+
+    def drain(self) -> list[OutboundMessage]:
+        messages = list(heapq.merge(*self._channels.values(), key=lambda message: message.queued_at))
+        self._channels.clear()
+        self._deficits.clear()
+        self._priority.clear()
+        self._active.clear()
+        self._size = 0
+        return messages
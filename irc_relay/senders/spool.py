@@ -0,0 +1,122 @@
+import dataclasses
+import logging
+import mmap
+import os
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+# head offset, used bytes, record count (offsets are relative to the start of the data area)
+_HEADER = struct.Struct("<QQQ")
+# payload length, wall clock time the message was spooled
+_RECORD = struct.Struct("<Id")
+
+
+@dataclasses.dataclass
+class SpooledMessage:
+    channel: str
+    string: str
+    spooled_at: float
+
+    def age(self) -> float:
+        return time.time() - self.spooled_at
+
+
+class MessageSpool:
+    """Append-only ring of messages in a memory mapped file, capped at `max_bytes` of data.
+
+    When full, the oldest messages are overwritten. Records may wrap around the end of the data area, so the whole
+    capacity is usable. State lives entirely in the file, so a spool survives a restart of the relay.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self._path = path
+        self._capacity = max_bytes
+        size = _HEADER.size + max_bytes
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != size:
+                logger.info(f"Initialising spool {path} ({max_bytes} bytes)")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._head, self._used, self._count = _HEADER.unpack_from(self._mmap, 0)
+        if self._head >= self._capacity or self._used > self._capacity:
+            logger.warning(f"Spool {path} has an invalid header, discarding contents")
+            self._head, self._used, self._count = 0, 0, 0
+            self._write_header()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._mmap, 0, self._head, self._used, self._count)
+
+    def _write(self, offset: int, data: bytes) -> None:
+        offset %= self._capacity
+        first = min(len(data), self._capacity - offset)
+        self._mmap[_HEADER.size + offset : _HEADER.size + offset + first] = data[:first]
+        if first < len(data):
+            self._mmap[_HEADER.size : _HEADER.size + len(data) - first] = data[first:]
+
+    def _read(self, offset: int, length: int) -> bytes:
+        offset %= self._capacity
+        first = min(length, self._capacity - offset)
+        data = self._mmap[_HEADER.size + offset : _HEADER.size + offset + first]
+        if first < length:
+            data += self._mmap[_HEADER.size : _HEADER.size + length - first]
+        return data
+
+    def _read_record(self) -> tuple[SpooledMessage, int]:
+        length, spooled_at = _RECORD.unpack(self._read(self._head, _RECORD.size))
+        channel, _, string = self._read(self._head + _RECORD.size, length).decode("utf-8").partition("\0")
+        return SpooledMessage(channel=channel, string=string, spooled_at=spooled_at), _RECORD.size + length
+
+    def append(self, channel: str, string: str, spooled_at: float | None = None) -> bool:
+        payload = f"{channel}\0{string}".encode("utf-8")
+        size = _RECORD.size + len(payload)
+        if size > self._capacity:
+            return False
+
+        # Make room by overwriting the oldest messages
+        while self._used + size > self._capacity:
+            self.pop()
+
+        tail = self._head + self._used
+        self._write(tail, _RECORD.pack(len(payload), time.time() if spooled_at is None else spooled_at))
+        self._write(tail + _RECORD.size, payload)
+        self._used += size
+        self._count += 1
+        self._write_header()
+        return True
+
+    def peek(self) -> SpooledMessage | None:
+        if not self._count:
+            return None
+        return self._read_record()[0]
+
+    def pop(self) -> SpooledMessage | None:
+        if not self._count:
+            return None
+
+        message, size = self._read_record()
+        self._head = (self._head + size) % self._capacity
+        self._used -= size
+        self._count -= 1
+        if not self._count:
+            self._head, self._used = 0, 0
+        self._write_header()
+        return message
+
+    def close(self) -> None:
+        self._mmap.flush()
+        self._mmap.close()
@@ -0,0 +1,119 @@
+import asyncio
+import dataclasses
+import logging
+
+from irc_relay.config.sender import SenderConfig
+from irc_relay.messages.dispatcher import DebugReceiver, MessageDispatcher, MessageReceiver, make_receiver
+from irc_relay.senders.base import IrcSender
+from irc_relay.senders.factory import make_sender
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class _RunningSender:
+    config: SenderConfig
+    sender: IrcSender
+    receiver: MessageReceiver
+    task: asyncio.Task
+
+
+def _needs_reconnect(old: SenderConfig, new: SenderConfig) -> bool:
+    # Channels can be joined and parted on the existing connection, anything else about the client can not
+    return dataclasses.replace(old.client, channels=[]) != dataclasses.replace(new.client, channels=[])
+
+
+class SenderSupervisor:
+    """Owns the running senders and their receivers, applying configuration changes without touching unchanged
+    connections."""
+
+    def __init__(self, dispatcher: MessageDispatcher) -> None:
+        self._dispatcher = dispatcher
+        self._running: dict[str, _RunningSender] = {}
+        self._debug_receiver: DebugReceiver | None = None
+        self._failed: asyncio.Future | None = None
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() and self._failed and not self._failed.done():
+            self._failed.set_exception(task.exception())
+
+    def _start(self, config: SenderConfig) -> None:
+        logger.info(f"Creating sender: {config.client.server}:{config.client.port}")
+        sender = make_sender(config)
+        receiver = make_receiver(config.receiver, sender, config)
+        task = asyncio.create_task(sender.run())
+        task.add_done_callback(self._task_done)
+        self._dispatcher.add_receiver(receiver)
+        self._running[config.name] = _RunningSender(config=config, sender=sender, receiver=receiver, task=task)
+
+    async def _stop(self, name: str) -> None:
+        running = self._running.pop(name)
+        logger.info(f"Removing sender: {running.config.client.server}:{running.config.client.port}")
+        self._dispatcher.remove_receiver(running.receiver)
+        await running.sender.shutdown()
+        running.task.cancel()
+
+    async def _update(self, running: _RunningSender, config: SenderConfig) -> None:
+        if running.config.client.channels != config.client.channels:
+            await running.sender.update_channels(config.client.channels)
+
+        if running.config.throttler != config.throttler:
+            running.sender.update_rate_limiter(config.throttler)
+
+        if (running.config.receiver, running.config.cbng) != (config.receiver, config.cbng):
+            # Built before the old one is removed, so a bad config leaves the sender with its current receiver
+            receiver = make_receiver(config.receiver, running.sender, config)
+            self._dispatcher.add_receiver(receiver)
+            self._dispatcher.remove_receiver(running.receiver)
+            running.receiver = receiver
+
+        running.config = config
+
+    async def apply(self, sender_configs: list[SenderConfig]) -> None:
+        if self._failed is None:
+            self._failed = asyncio.get_running_loop().create_future()
+        wanted = {config.name: config for config in sender_configs}
+
+        for name in [name for name in self._running if name not in wanted]:
+            await self._stop(name)
+
+        for name, config in wanted.items():
+            if (running := self._running.get(name)) is None:
+                self._start(config)
+            elif _needs_reconnect(running.config, config):
+                await self._stop(name)
+                self._start(config)
+            elif running.config != config:
+                logger.info(f"Updating sender: {config.client.server}:{config.client.port}")
+                await self._update(running, config)
+
+        if not self._running and self._debug_receiver is None:
+            logger.info("Adding default debug receiver")
+            self._debug_receiver = DebugReceiver()
+            self._dispatcher.add_receiver(self._debug_receiver)
+        elif self._running and self._debug_receiver is not None:
+            self._dispatcher.remove_receiver(self._debug_receiver)
+            self._debug_receiver = None
+
+    def channel_status(self) -> dict[str, dict[str, bool]]:
+        return {name: running.sender.channel_status() for name, running in self._running.items()}
+
+    def is_ready(self) -> bool:
+        # Without senders messages only go to the debug receiver, so there is nothing to wait for
+        return not self._running or any(running.sender.is_ready() for running in self._running.values())
+
+    async def wait_until_ready(self, interval: float = 0.05) -> None:
+        while not self.is_ready():
+            await asyncio.sleep(interval)
+
+    async def shutdown(self) -> None:
+        for name in list(self._running):
+            await self._stop(name)
+        if self._failed and not self._failed.done():
+            self._failed.set_result(None)
+
+    async def run(self) -> None:
+        # Senders are started by `apply`, this only waits for one of them to fail (or a shutdown)
+        if self._failed is None:
+            self._failed = asyncio.get_running_loop().create_future()
+        await self._failed
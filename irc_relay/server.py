@@ -1,48 +1,124 @@
 #!/usr/bin/env python3
 import asyncio
+import importlib
 import logging
+import os
+import signal
+import tempfile
+import time
 
+from irc_relay.config.env_file import EnvFile
 from irc_relay.config.runtime import RuntimeConfig
-from irc_relay.http_api.server import HttpServer
-from irc_relay.rate_limit.sliding_window import SlidingWindowRateLimit
-from irc_relay.messages.dispatcher import (
-    MessageDispatcher,
-    DebugReceiver,
-    make_receiver,
-)
-from irc_relay.senders.irc import IrcClient
+from irc_relay.messages.dedup import DuplicateCache
+from irc_relay.messages.dispatcher import MessageDispatcher
+from irc_relay.messages.ingest import IngestQueue
+from irc_relay.senders.metrics import irc_startup_to_ready
+from irc_relay.senders.supervisor import SenderSupervisor
 
 logger = logging.getLogger(__name__)
 
 
+async def _measure_startup(sender_supervisor: SenderSupervisor, started_at: float) -> None:
+    await sender_supervisor.wait_until_ready()
+    startup_to_ready = time.monotonic() - started_at
+    logger.info(f"Ready {startup_to_ready:.2f}s after starting")
+    irc_startup_to_ready.set(startup_to_ready)
+
+
 async def main():
+    started_at = time.monotonic()
     logging.basicConfig(level=logging.INFO)
+    env_file = EnvFile(os.environ["IRC_RELAY_CONFIG_FILE"]) if os.environ.get("IRC_RELAY_CONFIG_FILE") else None
+    if env_file:
+        env_file.load()
     runtime_config = RuntimeConfig.from_env()
-    message_dispatcher = MessageDispatcher()
+    message_dispatcher = MessageDispatcher(
+        DuplicateCache(runtime_config.dedup.window, runtime_config.dedup.max_entries)
+        if runtime_config.dedup.window > 0
+        else None
+    )
+
+    sender_supervisor = SenderSupervisor(message_dispatcher)
+    reload_lock = asyncio.Lock()
+
+    async def reload() -> None:
+        # Only senders are reloaded, listener and ingest settings still need a restart
+        async with reload_lock:
+            logger.info("Reloading configuration")
+            try:
+                if env_file:
+                    env_file.load()
+                await sender_supervisor.apply(RuntimeConfig.from_env().senders)
+            except Exception:
+                # Run from a signal handler, so nothing else would report it
+                logger.exception("Failed to reload configuration, senders not yet updated keep running as they were")
 
-    jobs = [
+    # Senders first, they spend seconds connecting and waiting for the MOTD while everything else is set up
+    jobs = []
+    await sender_supervisor.apply(runtime_config.senders)
+    jobs.append(asyncio.create_task(sender_supervisor.run()))
+    jobs.append(asyncio.create_task(_measure_startup(sender_supervisor, started_at)))
+
+    ingest_queue = None
+    if runtime_config.ingest.queue_size > 0:
+        ingest_queue = IngestQueue(message_dispatcher, runtime_config.ingest.queue_size, runtime_config.ingest.workers)
+        jobs.append(asyncio.create_task(ingest_queue.run()))
+
+    # FastAPI takes a large part of startup to import, do that off the event loop so the senders keep registering
+    http_server = await asyncio.to_thread(importlib.import_module, "irc_relay.http_api.server")
+    jobs.append(
         asyncio.create_task(
-            HttpServer(runtime_config.metrics.address, runtime_config.metrics.port, message_dispatcher).run()
-        ),
-    ]
-
-    for sender in runtime_config.senders:
-        logger.info(f"Creating sender: {sender.client.server}:{sender.client.port}")
-        client = IrcClient(
-            sender.client.server,
-            sender.client.port,
-            sender.client.nick,
-            sender.client.username,
-            sender.client.password,
-            sender.client.channels,
-            SlidingWindowRateLimit(sender.throttler.buckets) if sender.throttler else None,
+            http_server.HttpServer(
+                runtime_config.metrics.address,
+                runtime_config.metrics.port,
+                message_dispatcher,
+                ingest_queue,
+                runtime_config.ingest.retry_after,
+                channel_status=sender_supervisor.channel_status,
+            ).run()
+        )
+    )
+
+    if runtime_config.ingest.http_workers > 0:
+        from irc_relay.http_api.workers import HttpWorkerPool
+        from irc_relay.listeners.ipc import IpcListener
+
+        ipc_path = runtime_config.ingest.ipc_path or os.path.join(tempfile.mkdtemp(), "ingest.sock")
+        jobs.append(asyncio.create_task(IpcListener(message_dispatcher, ipc_path).run()))
+        jobs.append(
+            asyncio.create_task(
+                HttpWorkerPool(
+                    runtime_config.ingest.http_workers,
+                    runtime_config.ingest.http_address,
+                    runtime_config.ingest.http_port,
+                    ipc_path,
+                ).run()
+            )
         )
-        jobs.append(asyncio.create_task(client.run()))
-        message_dispatcher.add_receiver(make_receiver(sender.receiver, client, sender))
 
-    if not runtime_config.senders:
-        logger.info("Adding default debug receiver")
-        message_dispatcher.add_receiver(DebugReceiver())
+    if runtime_config.line_listener.enabled:
+        from irc_relay.listeners.line import LineListener
+
+        jobs.append(
+            asyncio.create_task(
+                LineListener(
+                    message_dispatcher,
+                    runtime_config.line_listener.udp_address,
+                    runtime_config.line_listener.udp_port,
+                    runtime_config.line_listener.unix_path,
+                    runtime_config.line_listener.udp_max_pending,
+                ).run()
+            )
+        )
+
+    reload_tasks: set[asyncio.Task] = set()
+
+    def _schedule_reload() -> None:
+        task = asyncio.create_task(reload())
+        reload_tasks.add(task)
+        task.add_done_callback(reload_tasks.discard)
+
+    asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _schedule_reload)
 
     await asyncio.gather(*jobs)
 
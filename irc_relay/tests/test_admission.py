@@ -0,0 +1,129 @@
+import asyncio
+
+from freezegun import freeze_time
+
+from irc_relay.config.sender import CbngReceiverConfig
+from irc_relay.messages.dispatcher import ClueBotNGIrcReceiver, DebugReceiver, IrcReceiver, MessageDispatcher
+from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+from irc_relay.senders.irc import IrcClient
+from irc_relay.senders.spool import MessageSpool
+
+
+def _client(rate_limiter=None, spool=None) -> IrcClient:
+    return IrcClient("localhost", 6667, "Relay", None, None, ["#reverts", "#huggle"], rate_limiter, spool=spool)
+
+
+def _join(client: IrcClient, channel: str) -> None:
+    asyncio.run(client._join_callback(nick="Relay", channel=channel))
+
+
+def _edit(reverted: bool) -> ProcessedEdit:
+    return ProcessedEdit(
+        change=EditChange(title="Example", user="Someone", url="https://example.invalid/", revision_id=1),
+        reverted=reverted,
+        comment=None,
+        score=0.9,
+    )
+
+
+class TestAdmission:
+
+    def test_follows_joined_channels(self):
+        client = _client()
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(IrcReceiver(client))
+        message = TextMessage(channel="#Reverts", string="hi")
+        assert dispatcher.admission_delay(message) is None  # nosec B101:assert_used
+
+        _join(client, "#reverts")
+        assert dispatcher.admission_delay(message) == 0  # nosec B101:assert_used
+        assert dispatcher.admission_delay(TextMessage(channel="#other", string="hi")) is None  # nosec B101:assert_used
+
+        client._handle_kick(b"#reverts Relay :bye")
+        assert dispatcher.admission_delay(message) is None  # nosec B101:assert_used
+
+    def test_edits_need_one_of_their_channels(self):
+        client = _client()
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(
+            ClueBotNGIrcReceiver(client, CbngReceiverConfig(revert_channel="#reverts", huggle_channel="#huggle"))
+        )
+        _join(client, "#reverts")
+        assert dispatcher.admission_delay(_edit(reverted=False)) is None  # nosec B101:assert_used
+        assert dispatcher.admission_delay(_edit(reverted=True)) == 0  # nosec B101:assert_used
+
+    def test_accepted_when_no_channel_is_targeted(self):
+        client = _client()
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(
+            ClueBotNGIrcReceiver(client, CbngReceiverConfig(revert_channel="#reverts", huggle_channel=None))
+        )
+        _join(client, "#reverts")
+        assert dispatcher.admission_delay(_edit(reverted=False)) == 0  # nosec B101:assert_used
+        assert dispatcher.admission_delay(WarnedUser(username="Someone", level=1)) == 0  # nosec B101:assert_used
+        assert dispatcher.admission_delay(_edit(reverted=True)) == 0  # nosec B101:assert_used
+
+    @freeze_time()
+    def test_backs_off_when_rate_limited(self):
+        client = _client(SlidingWindowRateLimit([BucketConfig(window=60, limit=1)]))
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(IrcReceiver(client))
+        _join(client, "#reverts")
+
+        # Waiting longer than the message TTL, so it would only expire in the queue
+        assert client._rate_limiter.should_allow()  # nosec B101:assert_used
+        assert 60 <= dispatcher.admission_delay(TextMessage(channel="#reverts", string="hi")) <= 60.01  # nosec B101
+
+    @freeze_time()
+    def test_queues_within_ttl(self):
+        client = _client(SlidingWindowRateLimit([BucketConfig(window=10, limit=1)]))
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(IrcReceiver(client))
+        _join(client, "#reverts")
+
+        assert client._rate_limiter.should_allow()  # nosec B101:assert_used
+        assert dispatcher.admission_delay(TextMessage(channel="#reverts", string="hi")) == 0  # nosec B101:assert_used
+
+    @freeze_time()
+    def test_backs_off_when_backlog_outlasts_ttl(self):
+        # One message every 2s, the message TTL is 30s
+        client = _client(SlidingWindowRateLimit([BucketConfig(window=10, limit=5)]))
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(IrcReceiver(client))
+        _join(client, "#reverts")
+        _join(client, "#huggle")
+        message = TextMessage(channel="#reverts", string="hi")
+
+        for x in range(0, 14):
+            client._outbound_queue.put("#reverts", f"{x}", 30)
+        assert dispatcher.admission_delay(message) == 0  # nosec B101:assert_used
+
+        client._outbound_queue.put("#reverts", "14", 30)
+        assert dispatcher.admission_delay(message) == 30  # nosec B101:assert_used
+
+        # Another busy channel halves the share #reverts gets of the connection
+        client._outbound_queue.discard("#reverts")
+        for x in range(0, 8):
+            client._outbound_queue.put("#reverts", f"{x}", 30)
+            client._outbound_queue.put("#huggle", f"{x}", 30)
+        assert dispatcher.admission_delay(message) == 32  # nosec B101:assert_used
+
+    def test_spooled_channels_are_accepted(self, tmp_path):
+        client = _client(spool=MessageSpool(str(tmp_path / "spool"), 4096))
+        dispatcher = MessageDispatcher()
+        dispatcher.add_receiver(IrcReceiver(client))
+        assert dispatcher.admission_delay(TextMessage(channel="#reverts", string="hi")) == 0  # nosec B101:assert_used
+
+    def test_removed_and_debug_receivers(self):
+        client = _client()
+        _join(client, "#reverts")
+        dispatcher = MessageDispatcher()
+        receiver = IrcReceiver(client)
+        dispatcher.add_receiver(receiver)
+        dispatcher.remove_receiver(receiver)
+        # Nowhere to send it, so nothing to hold back
+        assert dispatcher.admission_delay(TextMessage(channel="#reverts", string="hi")) == 0  # nosec B101
+
+        dispatcher.add_receiver(DebugReceiver())
+        assert dispatcher.admission_delay(TextMessage(channel="#reverts", string="hi")) == 0  # nosec B101
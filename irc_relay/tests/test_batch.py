@@ -0,0 +1,135 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from irc_relay.http_api.server import create_listener, parse_batch_body
+from irc_relay.listeners.ipc import NotAdmitted
+from irc_relay.messages.models import TextMessage
+
+
+class _Dispatcher:
+    """Admits every channel except those given a delay, records what is dispatched."""
+
+    def __init__(self, delays: dict[str, float | None] | None = None) -> None:
+        self.delays = delays or {}
+        self.dispatched: list = []
+
+    def admission_delay(self, message) -> float | None:
+        return self.delays.get(message.channel, 0)
+
+    async def dispatch_batch(self, messages: list) -> None:
+        self.dispatched.extend(messages)
+
+
+class _Forwarder(_Dispatcher):
+    """Admits everything up front like IpcForwarder, the delays are only applied by the owner on dispatch."""
+
+    def admission_delay(self, message) -> float | None:
+        return 0
+
+    async def dispatch(self, message) -> None:
+        await self.dispatch_batch([message])
+
+    async def dispatch_batch(self, messages: list) -> None:
+        delays = [self.delays.get(message.channel, 0) for message in messages]
+        self.dispatched.extend(message for message, delay in zip(messages, delays) if delay == 0)
+        if any(delay != 0 for delay in delays):
+            raise NotAdmitted(delays)
+
+
+def _put_batch(dispatcher: _Dispatcher, body: str, content_type: str = "application/json"):
+    app = FastAPI()
+    app.include_router(create_listener(dispatcher, retry_after=5))
+    return TestClient(app).put("/batch", content=body, headers={"Content-Type": content_type})
+
+
+class TestBatchParsing:
+
+    def test_json_array_and_ndjson(self):
+        items = [{"channel": "#one", "string": "a"}, {"channel": "#two", "string": "b"}]
+        assert parse_batch_body(json.dumps(items).encode(), "application/json") == items  # nosec B101:assert_used
+
+        ndjson = "\n".join(json.dumps(item) for item in items).encode()
+        assert parse_batch_body(ndjson, "application/x-ndjson") == items  # nosec B101:assert_used
+        # Without a content type, anything not starting with `[` is read as NDJSON
+        assert parse_batch_body(ndjson + b"\n\n", "") == items  # nosec B101:assert_used
+
+    def test_malformed_body(self):
+        response = _put_batch(_Dispatcher(), '{"channel": "#one"')
+        assert response.status_code == 400  # nosec B101:assert_used
+
+
+class TestBatchResults:
+
+    def test_all_accepted(self):
+        dispatcher = _Dispatcher()
+        response = _put_batch(dispatcher, '[{"channel": "#one", "string": "a"}, {"channel": "#one", "string": "b"}]')
+        assert response.status_code == 200  # nosec B101:assert_used
+        assert response.json() == {"results": [{"status": "accepted"}] * 2}  # nosec B101:assert_used
+        assert dispatcher.dispatched == [  # nosec B101:assert_used
+            TextMessage(channel="#one", string="a"),
+            TextMessage(channel="#one", string="b"),
+        ]
+
+    def test_mixed_results(self):
+        dispatcher = _Dispatcher({"#slow": 12.5, "#gone": None})
+        body = "\n".join(
+            [
+                '{"channel": "#one", "string": "a"}',
+                '{"username": "Someone", "level": "high"}',
+                '{"channel": "#slow", "string": "b"}',
+                '{"channel": "#gone", "string": "c"}',
+            ]
+        )
+        response = _put_batch(dispatcher, body, "application/x-ndjson")
+
+        # Part of the batch was taken, so it is not backed off as a whole
+        assert response.status_code == 207  # nosec B101:assert_used
+        assert "retry-after" not in response.headers  # nosec B101:assert_used
+        accepted, invalid, rate_limited, undeliverable = response.json()["results"]
+        assert accepted == {"status": "accepted"}  # nosec B101:assert_used
+        assert invalid["status"] == "rejected" and "retry_after" not in invalid  # nosec B101:assert_used
+        assert [error["loc"] for error in invalid["errors"]] == [["warning", "level"]]  # nosec B101:assert_used
+        assert rate_limited["retry_after"] == 13  # nosec B101:assert_used
+        assert rate_limited["errors"][0]["type"] == "rate_limited"  # nosec B101:assert_used
+        assert undeliverable["retry_after"] == 5  # nosec B101:assert_used
+        assert dispatcher.dispatched == [TextMessage(channel="#one", string="a")]  # nosec B101:assert_used
+
+    def test_nothing_taken_backs_off(self):
+        dispatcher = _Dispatcher({"#slow": 3})
+        response = _put_batch(dispatcher, '[{"channel": "#slow", "string": "a"}, {"nonsense": true}]')
+        assert response.status_code == 429  # nosec B101:assert_used
+        assert response.headers["retry-after"] == "3"  # nosec B101:assert_used
+        assert dispatcher.dispatched == []  # nosec B101:assert_used
+
+
+class TestForwardedAdmission:
+
+    def test_single_message_refused_by_owner(self):
+        app = FastAPI()
+        app.include_router(create_listener(_Forwarder({"#gone": None, "#slow": 1.5}), retry_after=5))
+        client = TestClient(app)
+
+        response = client.put("/", json={"channel": "#gone", "string": "a"})
+        assert response.status_code == 503  # nosec B101:assert_used
+        assert response.headers["retry-after"] == "5"  # nosec B101:assert_used
+
+        response = client.put("/", json={"channel": "#slow", "string": "a"})
+        assert response.status_code == 429  # nosec B101:assert_used
+        assert response.headers["retry-after"] == "2"  # nosec B101:assert_used
+
+        assert client.put("/", json={"channel": "#one", "string": "a"}).status_code == 200  # nosec B101:assert_used
+
+    def test_batch_items_refused_by_owner(self):
+        dispatcher = _Forwarder({"#slow": 12.5})
+        response = _put_batch(dispatcher, '[{"channel": "#one", "string": "a"}, {"channel": "#slow", "string": "b"}]')
+        assert response.status_code == 207  # nosec B101:assert_used
+        accepted, rate_limited = response.json()["results"]
+        assert accepted == {"status": "accepted"}  # nosec B101:assert_used
+        assert rate_limited["retry_after"] == 13  # nosec B101:assert_used
+        assert dispatcher.dispatched == [TextMessage(channel="#one", string="a")]  # nosec B101:assert_used
+
+        response = _put_batch(_Forwarder({"#slow": 3}), '[{"channel": "#slow", "string": "b"}]')
+        assert response.status_code == 429  # nosec B101:assert_used
+        assert response.headers["retry-after"] == "3"  # nosec B101:assert_used
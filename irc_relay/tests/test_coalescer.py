@@ -0,0 +1,53 @@
+import asyncio
+
+from irc_relay.messages.coalescer import LineCoalescer, pack_lines, unpack_line
+
+
+class TestPackLines:
+
+    def test_packs_within_limit(self):
+        lines = [f"SCORED {1314252000 + x} {x}" for x in range(0, 40)]
+        packed = pack_lines(lines, " | ", 100)
+
+        assert all(len(string.encode("utf-8")) <= 100 for string in packed)  # nosec B101:assert_used
+        assert len(packed) < len(lines)  # nosec B101:assert_used
+        assert [line for string in packed for line in unpack_line(string, " | ")] == lines  # nosec B101:assert_used
+
+    def test_oversized_line_is_passed_through(self):
+        assert pack_lines(["a" * 20, "b"], " | ", 10) == ["a" * 20, "b"]  # nosec B101:assert_used
+
+
+class TestLineCoalescer:
+
+    def test_flushes_after_window(self):
+        flushed = []
+
+        async def _flush(string: str) -> None:
+            flushed.append(string)
+
+        async def _run():
+            coalescer = LineCoalescer(window=0.01, separator=" | ", max_bytes=400, flush=_flush)
+            await coalescer.add("ROLLBACK 1")
+            await coalescer.add("SCORED 2 500")
+            assert flushed == []  # nosec B101:assert_used
+            await asyncio.sleep(0.05)
+
+        asyncio.run(_run())
+        assert flushed == ["ROLLBACK 1 | SCORED 2 500"]  # nosec B101:assert_used
+
+    def test_flushes_when_full(self):
+        flushed = []
+
+        async def _flush(string: str) -> None:
+            flushed.append(string)
+
+        async def _run():
+            coalescer = LineCoalescer(window=60, separator=" | ", max_bytes=25, flush=_flush)
+            await coalescer.add("ROLLBACK 1")
+            await coalescer.add("ROLLBACK 2")
+            await coalescer.add("ROLLBACK 3")
+            assert flushed == ["ROLLBACK 1 | ROLLBACK 2"]  # nosec B101:assert_used
+            await coalescer.flush()
+
+        asyncio.run(_run())
+        assert flushed == ["ROLLBACK 1 | ROLLBACK 2", "ROLLBACK 3"]  # nosec B101:assert_used
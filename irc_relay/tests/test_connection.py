@@ -0,0 +1,290 @@
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.rate_limit.base import RateLimiter
+from irc_relay.rate_limit.shared import SharedSlidingWindowRateLimit
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+from irc_relay.senders.irc import IrcClient, _Client, pack_join_targets
+from irc_relay.senders.pool import IrcClientPool
+
+
+class _ContendedRateLimiter(RateLimiter):
+    """Reports room, then loses the first slot to another process sharing it."""
+
+    def __init__(self) -> None:
+        self.refusals = 1
+
+    def should_allow(self) -> bool:
+        if self.refusals:
+            self.refusals -= 1
+            return False
+        return True
+
+    def time_until_allowed(self) -> float:
+        return 0
+
+
+def _client(nick: str = "Relay") -> IrcClient:
+    return IrcClient("localhost", 6667, nick, None, None, ["#one", "#two"], None)
+
+
+class TestJoin:
+
+    def test_pack_join_targets(self):
+        assert pack_join_targets(["#one", "#two"]) == ["#one,#two"]  # nosec B101:assert_used
+
+        channels = [f"#channel-{x:03d}" for x in range(0, 60)]
+        targets = pack_join_targets(channels)
+        assert len(targets) == 2  # nosec B101:assert_used
+        assert all(len(target) <= 400 for target in targets)  # nosec B101:assert_used
+        assert ",".join(targets).split(",") == channels  # nosec B101:assert_used
+
+    def test_writable_once_join_confirmed(self):
+        client = _client()
+        assert not client.can_accept_messages("#one")  # nosec B101:assert_used
+
+        asyncio.run(client._join_callback(nick="someone", channel="#one"))
+        assert not client.can_accept_messages("#one")  # nosec B101:assert_used
+
+        asyncio.run(client._join_callback(nick="relay", channel="#One"))
+        assert client.can_accept_messages("#one")  # nosec B101:assert_used
+        assert not client.can_accept_messages("#two")  # nosec B101:assert_used
+
+    def test_kick_stops_writes(self):
+        client = _client()
+        asyncio.run(client._join_callback(nick="Relay", channel="#one"))
+
+        async def next_handler(_, message):
+            pass
+
+        asyncio.run(client._inbound_message_handler(next_handler, None, b":op!u@h KICK #one Relay :bye"))
+        assert not client.can_accept_messages("#one")  # nosec B101:assert_used
+
+    def test_reconnect_delay_backs_off(self):
+        client = IrcClient(
+            "localhost", 6667, "Relay", None, None, [], None, reconnect_min_delay=1, reconnect_max_delay=8
+        )
+        delays = [client._reconnect_delay() for _ in range(0, 10)]
+        assert all(0 <= delay <= min(8, 2**x) for x, delay in enumerate(delays))  # nosec B101:assert_used
+
+    def test_backoff_reset_once_every_channel_joined(self):
+        client = _client()
+        client._reconnect_attempts = 5
+
+        asyncio.run(client._join_callback(nick="Relay", channel="#one"))
+        assert client._reconnect_attempts == 5  # nosec B101:assert_used
+
+        asyncio.run(client._join_callback(nick="Relay", channel="#two"))
+        assert client._reconnect_attempts == 0  # nosec B101:assert_used
+
+    def test_transport_kept_while_connected(self):
+        async def run():
+            server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+            client = _Client("127.0.0.1", server.sockets[0].getsockname()[1], ssl=False)
+            assert client.transport is None  # nosec B101:assert_used
+
+            await client.connect()
+            assert client.transport is not None  # nosec B101:assert_used
+            assert not client.transport.is_closing()  # nosec B101:assert_used
+
+            await client.disconnect()
+            assert client.transport is None  # nosec B101:assert_used
+            server.close()
+
+        asyncio.run(run())
+
+
+class TestRegistration:
+
+    def test_dropped_mid_registration_registers_once_on_reconnect(self):
+        connections: list[list[str]] = []
+
+        async def handle(reader, writer):
+            lines = []
+            connections.append(lines)
+            while line := await reader.readline():
+                command, _, params = line.decode().rstrip("\r\n").partition(" ")
+                lines.append(command)
+                if command == "CAP":
+                    writer.write(b":fake CAP * ACK :sasl\r\n")
+                elif command == "AUTHENTICATE" and params == "PLAIN":
+                    if len(connections) == 1:
+                        # Drop the first connection while the client waits for the server to ask for credentials
+                        break
+                    writer.write(b"AUTHENTICATE +\r\n")
+                elif command == "AUTHENTICATE":
+                    writer.write(b":fake 903 Relay :SASL authentication successful\r\n")
+                elif command == "USER":
+                    writer.write(b":fake 376 Relay :End of /MOTD command.\r\n")
+                elif command == "JOIN":
+                    writer.write(b":Relay!relay@fake JOIN #one\r\n")
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            client = IrcClient("127.0.0.1", port, "Relay", "relay", "secret", ["#one"], None, reconnect_min_delay=0.01)
+            task = asyncio.create_task(client.run())
+            for _ in range(0, 200):
+                if client.can_accept_messages("#one"):
+                    break
+                await asyncio.sleep(0.01)
+            # Give a registration left over from the first connection the chance to run again
+            await asyncio.sleep(0.1)
+            await client.shutdown()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            server.close()
+            return client
+
+        client = asyncio.run(run())
+        assert len(connections) == 2  # nosec B101:assert_used
+        assert client._reconnect_attempts == 0  # nosec B101:assert_used
+        assert connections[1] == [  # nosec B101:assert_used
+            "CAP",
+            "AUTHENTICATE",
+            "AUTHENTICATE",
+            "CAP",
+            "NICK",
+            "USER",
+            "MODE",
+            "JOIN",
+        ]
+
+
+class TestFailover:
+
+    def test_standby_takes_over(self):
+        primary, standby = _client("Primary"), _client("Standby")
+        pool = IrcClientPool("pool", [primary, standby], "failover")
+        for member in (primary, standby):
+            asyncio.run(member._join_callback(nick=member.nick, channel="#one"))
+
+        assert pool._select_member("#one") is primary  # nosec B101:assert_used
+        primary._can_accept_messages["#one"] = False
+        assert pool._select_member("#one") is standby  # nosec B101:assert_used
+
+    def test_ready_while_any_member_has_each_channel(self):
+        primary, standby = _client("Primary"), _client("Standby")
+        pool = IrcClientPool("pool", [primary, standby], "failover")
+        asyncio.run(primary._join_callback(nick="Primary", channel="#one"))
+        assert not pool.is_ready()  # nosec B101:assert_used
+
+        asyncio.run(standby._join_callback(nick="Standby", channel="#two"))
+        assert pool.channel_status() == {"#one": True, "#two": True}  # nosec B101:assert_used
+        assert pool.is_ready()  # nosec B101:assert_used
+
+
+class TestChannelReload:
+
+    def test_removed_channel_with_queued_messages(self):
+        client = _client()
+        sent = []
+
+        class _Writer:
+            def write(self, line):
+                sent.append(line)
+
+            async def drain(self):
+                pass
+
+            def is_connected(self):
+                return False
+
+        client._writer = _Writer()
+
+        async def run():
+            for channel in ("#one", "#two"):
+                await client._join_callback(nick="Relay", channel=channel)
+                for x in range(0, 3):
+                    await client.send_to_channel(channel, f"{channel} {x}")
+
+            await client.update_channels(["#two"])
+            assert len(client._outbound_queue) == 3  # nosec B101:assert_used
+
+            task = asyncio.create_task(client._process_outbound_queue())
+            while len(client._outbound_queue) or client._processing:
+                await asyncio.sleep(0.01)
+            assert not task.done()  # nosec B101:assert_used
+
+            # A message for a channel that is no longer known does not stop the sender either
+            client._outbound_queue.put("#gone", "stale", 30)
+            await client.send_to_channel("#two", "after")
+            while len(client._outbound_queue) or client._processing:
+                await asyncio.sleep(0.01)
+            assert not task.done()  # nosec B101:assert_used
+            task.cancel()
+
+        asyncio.run(run())
+        assert sent == [f"PRIVMSG #two :#two {x}\r\n".encode() for x in range(0, 3)] + [  # nosec B101:assert_used
+            b"PRIVMSG #two :after\r\n"
+        ]
+
+    def test_replaced_rate_limiter_is_closed(self, tmp_path):
+        buckets = [BucketConfig(window=60, limit=20)]
+        client = IrcClient(
+            "localhost",
+            6667,
+            "Relay",
+            None,
+            None,
+            ["#one"],
+            SharedSlidingWindowRateLimit(buckets, str(tmp_path / "rl")),
+        )
+        shared = client._rate_limiter
+
+        client.update_rate_limiter(SlidingWindowRateLimitConfig(buckets=buckets))
+        assert client._rate_limiter is not shared  # nosec B101:assert_used
+        assert shared._mmap.closed  # nosec B101:assert_used
+
+    def test_shutdown_removes_metrics(self):
+        client = IrcClient(
+            "localhost",
+            6667,
+            "Relay",
+            None,
+            None,
+            ["#one"],
+            SlidingWindowRateLimit([BucketConfig(window=60, limit=20)]),
+            name="stopped",
+        )
+        in_flight = "cbng_irc_relay_irc_messages_in_flight"
+        assert REGISTRY.get_sample_value(in_flight, {"name": "stopped"}) == 0  # nosec B101:assert_used
+
+        asyncio.run(client.shutdown())
+        assert REGISTRY.get_sample_value(in_flight, {"name": "stopped"}) is None  # nosec B101:assert_used
+        assert (  # nosec B101:assert_used
+            REGISTRY.get_sample_value("cbng_irc_relay_irc_rate_limit_limit", {"name": "stopped", "bucket": "20/60s"})
+            is None
+        )
+
+
+class TestRateLimitContention:
+
+    def test_lost_slot_waits_instead_of_dropping(self):
+        channel_rate_limiter = SlidingWindowRateLimit([BucketConfig(window=60, limit=2)])
+        client = IrcClient(
+            "localhost",
+            6667,
+            "Relay",
+            None,
+            None,
+            ["#one"],
+            _ContendedRateLimiter(),
+            channel_rate_limiters={"#one": channel_rate_limiter},
+        )
+        sent = []
+        client._writer.write = sent.append
+        client._writer.drain = lambda: asyncio.sleep(0)
+
+        async def run():
+            await client._join_callback(nick="Relay", channel="#one")
+            await client.send_to_channel("#one", "hello")
+            await client._process_outbound_message(await client._outbound_queue.get())
+
+        asyncio.run(run())
+        assert sent == [b"PRIVMSG #one :hello\r\n"]  # nosec B101:assert_used
+        # The refused attempt did not spend the channel's budget
+        assert channel_rate_limiter.bucket_utilisation() == {"2/60s": 0.5}  # nosec B101:assert_used
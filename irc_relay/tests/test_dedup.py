@@ -0,0 +1,44 @@
+from freezegun import freeze_time
+
+from irc_relay.messages.dedup import DuplicateCache
+from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+
+
+def _edit(revision_id: int, score: float) -> ProcessedEdit:
+    return ProcessedEdit(
+        change=EditChange(title="Page", user="User", url="https://example.org", revision_id=revision_id),
+        reverted=False,
+        comment=None,
+        score=score,
+    )
+
+
+class TestDuplicateCache:
+
+    def test_suppresses_repeats_within_window(self):
+        cache = DuplicateCache(window=10, max_entries=100)
+
+        with freeze_time("2025-09-01 00:00:00"):
+            assert cache.is_duplicate(_edit(1, 0.5)) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(_edit(1, 0.9)) is True  # nosec B101:assert_used
+            assert cache.is_duplicate(_edit(2, 0.5)) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(WarnedUser(username="User", level=1)) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(WarnedUser(username="User", level=1)) is True  # nosec B101:assert_used
+            assert cache.is_duplicate(WarnedUser(username="User", level=2)) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(TextMessage(channel="#a", string="hi")) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(TextMessage(channel="#b", string="hi")) is False  # nosec B101:assert_used
+            assert cache.is_duplicate(TextMessage(channel="#a", string="hi")) is True  # nosec B101:assert_used
+
+        with freeze_time("2025-09-01 00:00:11"):
+            assert cache.is_duplicate(_edit(1, 0.5)) is False  # nosec B101:assert_used
+            assert len(cache) == 1  # nosec B101:assert_used
+
+    @freeze_time()
+    def test_evicts_oldest_when_full(self):
+        cache = DuplicateCache(window=10, max_entries=3)
+        for revision_id in range(0, 4):
+            assert cache.is_duplicate(_edit(revision_id, 0.5)) is False  # nosec B101:assert_used
+
+        assert len(cache) == 3  # nosec B101:assert_used
+        assert cache.is_duplicate(_edit(3, 0.5)) is True  # nosec B101:assert_used
+        assert cache.is_duplicate(_edit(0, 0.5)) is False  # nosec B101:assert_used
@@ -0,0 +1,67 @@
+import asyncio
+
+from irc_relay.messages.dispatcher import MessageDispatcher, MessageReceiver
+from irc_relay.messages.models import TextMessage
+
+
+class _ImmediateReceiver(MessageReceiver):
+    non_blocking = True
+
+    def __init__(self, name: str, log: list[str]) -> None:
+        self._name = name
+        self._log = log
+
+    async def send(self, message: TextMessage) -> None:
+        self._log.append(f"{self._name} {message.string}")
+
+
+class _BlockingReceiver(MessageReceiver):
+    """Only returns once every blocking receiver has started on the message, so must run concurrently."""
+
+    def __init__(self, started: list[str], expected: int, log: list[str]) -> None:
+        self._started = started
+        self._expected = expected
+        self._log = log
+
+    async def send(self, message: TextMessage) -> None:
+        self._started.append(message.string)
+        while self._started.count(message.string) < self._expected:
+            await asyncio.sleep(0)
+        self._log.append(f"blocking {message.string}")
+
+
+class TestFanOut:
+
+    def test_blocking_receivers_run_concurrently(self):
+        dispatcher = MessageDispatcher()
+        started, log = [], []
+        for _ in range(0, 3):
+            dispatcher.add_receiver(_BlockingReceiver(started, 3, log))
+
+        async def run():
+            await asyncio.wait_for(dispatcher.send(TextMessage(channel="#one", string="hi")), 1)
+
+        asyncio.run(run())
+        assert log == ["blocking hi"] * 3  # nosec B101:assert_used
+
+    def test_immediate_receivers_keep_order(self):
+        dispatcher = MessageDispatcher()
+        started, log = [], []
+        dispatcher.add_receiver(_ImmediateReceiver("first", log))
+        dispatcher.add_receiver(_BlockingReceiver(started, 1, log))
+        dispatcher.add_receiver(_ImmediateReceiver("second", log))
+
+        async def run():
+            for string in ("a", "b"):
+                await dispatcher.send(TextMessage(channel="#one", string=string))
+
+        asyncio.run(run())
+        # Immediate receivers see every message in order, in the order they were added, ahead of the blocking ones
+        assert log == [  # nosec B101:assert_used
+            "first a",
+            "second a",
+            "blocking a",
+            "first b",
+            "second b",
+            "blocking b",
+        ]
@@ -0,0 +1,67 @@
+import asyncio
+
+from irc_relay.rate_limit.adaptive import AdaptiveRateLimit
+from irc_relay.rate_limit.sliding_window import BucketConfig
+from irc_relay.senders.irc import IrcClient, split_command
+
+
+def _handle(client: IrcClient, lines: list[bytes]) -> list[bytes]:
+    passed = []
+
+    async def next_handler(_, message):
+        passed.append(message)
+
+    async def run():
+        for line in lines:
+            await client._inbound_message_handler(next_handler, None, line)
+
+    asyncio.run(run())
+    return passed
+
+
+class TestInboundFilter:
+
+    def test_split_command(self):
+        assert split_command(b":nick!user@host privmsg #channel :hi") == (  # nosec B101:assert_used
+            b":nick!user@host",
+            b"PRIVMSG",
+            b"#channel :hi",
+        )
+        assert split_command(b"PING :server") == (b"", b"PING", b":server")  # nosec B101:assert_used
+
+    def test_drops_channel_chatter(self):
+        client = IrcClient("localhost", 6667, "Relay", None, None, ["#channel"], None)
+        passed = _handle(
+            client,
+            [
+                b":someone!u@h PRIVMSG #channel :hello",
+                b":someone!u@h JOIN #channel",
+                b":someone!u@h QUIT :bye",
+                b":Relay!u@h JOIN #channel",
+                b":someone!u@h PRIVMSG Relay :hello",
+                b"PING :server",
+            ],
+        )
+        assert passed == [  # nosec B101:assert_used
+            b":Relay!u@h JOIN #channel",
+            b":someone!u@h PRIVMSG Relay :hello",
+            b"PING :server",
+        ]
+
+    def test_samples_channel_chatter(self):
+        client = IrcClient("localhost", 6667, "Relay", None, None, ["#channel"], None, inbound_sample_every=3)
+        passed = _handle(client, [b":someone!u@h PRIVMSG #channel :%d" % x for x in range(1, 10)])
+        assert passed == [b":someone!u@h PRIVMSG #channel :%d" % x for x in (3, 6, 9)]  # nosec B101:assert_used
+
+    def test_flood_warnings_reach_rate_limiter(self):
+        rate_limiter = AdaptiveRateLimit([BucketConfig(window=1, limit=8)], min_scale=0.1)
+        client = IrcClient("localhost", 6667, "Relay", None, None, ["#channel"], rate_limiter)
+        _handle(
+            client,
+            [
+                b":server.irc 263 Relay PRIVMSG :Server load is temporarily too heavy",
+                b":someone!u@h NOTICE Relay :stop flooding",
+                b":server.irc NOTICE Relay :*** Message to #channel throttled due to flooding",
+            ],
+        )
+        assert rate_limiter.bucket_limits() == {"8/1s": 2}  # nosec B101:assert_used
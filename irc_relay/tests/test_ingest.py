@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from irc_relay.http_api.server import create_listener
+from irc_relay.messages.ingest import IngestQueue
+from irc_relay.messages.models import TextMessage
+
+
+class _Dispatcher:
+    def __init__(self) -> None:
+        self.dispatched: list[TextMessage] = []
+
+    def admission_delay(self, message) -> float:
+        return 0
+
+    async def dispatch(self, message: TextMessage) -> None:
+        if message.string == "fail":
+            raise RuntimeError("Receiver failed")
+        await asyncio.sleep(0)
+        self.dispatched.append(message)
+
+
+class TestIngestQueue:
+
+    def test_full_queue_is_429_with_retry_after(self):
+        ingest_queue = IngestQueue(_Dispatcher(), 1, 1)
+        app = FastAPI()
+        app.include_router(create_listener(_Dispatcher(), ingest_queue, retry_after=7))
+        client = TestClient(app)
+
+        response = client.put("/", json={"channel": "#one", "string": "a"})
+        assert response.status_code == 202  # nosec B101:assert_used
+
+        response = client.put("/", json={"channel": "#one", "string": "b"})
+        assert response.status_code == 429  # nosec B101:assert_used
+        assert response.headers["retry-after"] == "7"  # nosec B101:assert_used
+
+    def test_drains_in_order(self):
+        dispatcher = _Dispatcher()
+        ingest_queue = IngestQueue(dispatcher, 10, 1)
+        strings = ["a", "b", "fail", "c", "d"]
+
+        async def run():
+            for string in strings:
+                assert ingest_queue.put(TextMessage(channel="#one", string=string))  # nosec B101:assert_used
+            task = asyncio.create_task(ingest_queue.run())
+            await asyncio.wait_for(ingest_queue._queue.join(), 1)
+            task.cancel()
+
+        asyncio.run(run())
+        # A failing message does not stop the worker, the rest follow in order
+        assert [message.string for message in dispatcher.dispatched] == ["a", "b", "c", "d"]  # nosec B101:assert_used
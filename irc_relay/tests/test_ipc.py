@@ -0,0 +1,141 @@
+import asyncio
+import collections
+
+import pytest
+
+from irc_relay.listeners.ipc import IpcForwarder, IpcListener, NotAdmitted
+from irc_relay.messages.models import TextMessage, WarnedUser
+
+
+class _Dispatcher:
+    def __init__(self, delays: dict[str, float | None] | None = None) -> None:
+        self.dispatched: list = []
+        # Admission delay by channel, everything else is admitted
+        self.delays = delays or {}
+
+    def admission_delay(self, message) -> float | None:
+        return self.delays.get(getattr(message, "channel", None), 0)
+
+    async def dispatch(self, message) -> None:
+        self.dispatched.append(message)
+
+
+async def _start(listener: IpcListener) -> asyncio.Task:
+    task = asyncio.create_task(listener.run())
+    while listener._server is None:
+        await asyncio.sleep(0.01)
+    return task
+
+
+class _ClosedWriter:
+    def close(self) -> None:
+        pass
+
+
+class TestIpc:
+
+    def test_round_trip(self, tmp_path):
+        dispatcher = _Dispatcher()
+        path = str(tmp_path / "ingest.sock")
+        listener = IpcListener(dispatcher, path)
+        forwarder = IpcForwarder(path)
+        messages = [TextMessage(channel="#one", string="a"), WarnedUser(username="Someone", level=2)]
+
+        async def run():
+            task = await _start(listener)
+            await forwarder.dispatch(messages[0])
+            await forwarder.dispatch_batch(messages)
+
+            # Acknowledged in order, a line the owner can not parse fails the request it belongs to
+            with pytest.raises(ValueError):
+                await forwarder._send([b"not a message\n"])
+            await forwarder.dispatch(messages[1])
+
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(run())
+        assert dispatcher.dispatched == [messages[0], *messages, messages[1]]  # nosec B101:assert_used
+
+    def test_owner_admission_verdict_forwarded(self, tmp_path):
+        dispatcher = _Dispatcher({"#gone": None, "#busy": 2.5})
+        path = str(tmp_path / "ingest.sock")
+        listener = IpcListener(dispatcher, path)
+        forwarder = IpcForwarder(path)
+        messages = [
+            TextMessage(channel="#one", string="a"),
+            TextMessage(channel="#gone", string="b"),
+            TextMessage(channel="#busy", string="c"),
+        ]
+
+        async def run():
+            task = await _start(listener)
+            with pytest.raises(NotAdmitted) as e:
+                await forwarder.dispatch(messages[1])
+            assert e.value.delays == [None]  # nosec B101:assert_used
+
+            with pytest.raises(NotAdmitted) as e:
+                await forwarder.dispatch_batch(messages)
+            assert e.value.delays == [0, None, 2.5]  # nosec B101:assert_used
+
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(run())
+        assert dispatcher.dispatched == [messages[0]]  # nosec B101:assert_used
+
+    def test_reconnects_after_owner_restart(self, tmp_path):
+        path = str(tmp_path / "ingest.sock")
+        first, second = _Dispatcher(), _Dispatcher()
+        forwarder = IpcForwarder(path)
+
+        async def run():
+            listener = IpcListener(first, path)
+            task = await _start(listener)
+            await forwarder.dispatch(TextMessage(channel="#one", string="before"))
+            await listener.shutdown()
+            task.cancel()
+            while forwarder._writer is not None:
+                await asyncio.sleep(0.01)
+
+            listener = IpcListener(second, path)
+            task = await _start(listener)
+            await forwarder.dispatch(TextMessage(channel="#one", string="after"))
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+        assert [message.string for message in first.dispatched] == ["before"]  # nosec B101:assert_used
+        assert [message.string for message in second.dispatched] == ["after"]  # nosec B101:assert_used
+
+    def test_stale_connection_leaves_new_one_alone(self, tmp_path):
+        dispatcher = _Dispatcher()
+        path = str(tmp_path / "ingest.sock")
+        forwarder = IpcForwarder(path)
+
+        async def run():
+            listener = IpcListener(dispatcher, path)
+            task = await _start(listener)
+            await forwarder.dispatch(TextMessage(channel="#one", string="first"))
+            writer = forwarder._writer
+            in_flight = asyncio.get_running_loop().create_future()
+            forwarder._pending.append(in_flight)
+
+            # The reader of an older connection only finishing now
+            reader = asyncio.StreamReader()
+            reader.feed_eof()
+            stale = asyncio.get_running_loop().create_future()
+            await forwarder._read_acknowledgements(reader, _ClosedWriter(), collections.deque([stale]))
+
+            assert isinstance(stale.exception(), ConnectionError)  # nosec B101:assert_used
+            assert forwarder._writer is writer  # nosec B101:assert_used
+            assert not in_flight.done()  # nosec B101:assert_used
+
+            forwarder._pending.remove(in_flight)
+            await forwarder.dispatch(TextMessage(channel="#one", string="second"))
+            assert forwarder._writer is writer  # nosec B101:assert_used
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+        assert [message.string for message in dispatcher.dispatched] == ["first", "second"]  # nosec B101:assert_used
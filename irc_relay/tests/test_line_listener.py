@@ -0,0 +1,140 @@
+import asyncio
+import contextlib
+import json
+import socket
+
+import pytest
+
+from irc_relay.listeners.line import MAX_LINE_BYTES, LineListener, parse_line
+from irc_relay.messages.models import TextMessage, WarnedUser
+
+
+class _Dispatcher:
+    def __init__(self) -> None:
+        self.dispatched: list = []
+        self.received = asyncio.Event()
+
+    async def dispatch_batch(self, messages: list) -> None:
+        self.dispatched.extend(messages)
+        self.received.set()
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for(dispatcher: _Dispatcher, count: int) -> None:
+    while len(dispatcher.dispatched) < count:
+        dispatcher.received.clear()
+        await asyncio.wait_for(dispatcher.received.wait(), 2)
+
+
+class TestParseLine:
+
+    def test_valid_lines(self):
+        assert parse_line(b"#one\thello world\n") == TextMessage(channel="#one", string="hello world")  # nosec B101
+        assert parse_line(b'{"username": "Someone", "level": 2}') == WarnedUser(  # nosec B101:assert_used
+            username="Someone", level=2
+        )
+        assert parse_line(b"  \n") is None  # nosec B101:assert_used
+
+    @pytest.mark.parametrize(
+        "line",
+        [b"no tab here", b"\tmissing channel", b"{not json", b'{"channel": "#one"}', b"#one\t\xff\xfe", b"[1, 2]"],
+    )
+    def test_malformed_lines(self, line):
+        assert parse_line(line) is None  # nosec B101:assert_used
+
+    def test_oversize_lines(self):
+        assert parse_line(b"#one\t" + b"x" * MAX_LINE_BYTES) is None  # nosec B101:assert_used
+        assert parse_line(b"#one\t" + b"x" * (MAX_LINE_BYTES - 5)) is not None  # nosec B101:assert_used
+
+
+class TestLineListener:
+
+    def test_udp_round_trip(self):
+        dispatcher = _Dispatcher()
+        port = _free_udp_port()
+        listener = LineListener(dispatcher, "127.0.0.1", port, None)
+
+        async def run():
+            task = asyncio.create_task(listener.run())
+            while listener._transport is None:
+                await asyncio.sleep(0.01)
+
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(
+                    b"#one\ta\nbroken\n" + json.dumps({"channel": "#two", "string": "b"}).encode(), ("127.0.0.1", port)
+                )
+            await _wait_for(dispatcher, 2)
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(run())
+        assert dispatcher.dispatched == [  # nosec B101:assert_used
+            TextMessage(channel="#one", string="a"),
+            TextMessage(channel="#two", string="b"),
+        ]
+
+    def test_unix_round_trip(self, tmp_path):
+        dispatcher = _Dispatcher()
+        path = str(tmp_path / "relay.sock")
+        listener = LineListener(dispatcher, None, None, path)
+
+        async def run():
+            task = asyncio.create_task(listener.run())
+            while listener._server is None:
+                await asyncio.sleep(0.01)
+
+            _, writer = await asyncio.open_unix_connection(path)
+            writer.write(b"#one\ta\n#one\tb\n")
+            await writer.drain()
+            await _wait_for(dispatcher, 2)
+
+            # An oversize line drops the connection rather than being read in pieces
+            writer.write(b"#one\t" + b"x" * (MAX_LINE_BYTES * 2) + b"\n#one\tafter\n")
+            with contextlib.suppress(ConnectionError):
+                await writer.drain()
+            writer.close()
+
+            _, writer = await asyncio.open_unix_connection(path)
+            writer.write(b"#one\tc\n")
+            await writer.drain()
+            await _wait_for(dispatcher, 3)
+            writer.close()
+            await listener.shutdown()
+            task.cancel()
+
+        asyncio.run(run())
+        assert [message.string for message in dispatcher.dispatched] == ["a", "b", "c"]  # nosec B101:assert_used
+
+    def test_datagrams_beyond_pending_limit_are_dropped(self):
+        class _SlowDispatcher(_Dispatcher):
+            def __init__(self) -> None:
+                super().__init__()
+                self.release = asyncio.Event()
+
+            async def dispatch_batch(self, messages: list) -> None:
+                await self.release.wait()
+                await super().dispatch_batch(messages)
+
+        dispatcher = _SlowDispatcher()
+        listener = LineListener(dispatcher, None, None, None, max_pending_datagrams=2)
+
+        async def run():
+            for x in range(0, 5):
+                listener.dispatch_in_background([TextMessage(channel="#one", string=f"{x}")])
+            assert len(listener._tasks) == 2  # nosec B101:assert_used
+
+            dispatcher.release.set()
+            await _wait_for(dispatcher, 2)
+            await asyncio.sleep(0)
+            assert not listener._tasks  # nosec B101:assert_used
+
+            listener.dispatch_in_background([TextMessage(channel="#one", string="after")])
+            await _wait_for(dispatcher, 3)
+
+        asyncio.run(run())
+        assert [message.string for message in dispatcher.dispatched] == ["0", "1", "after"]  # nosec B101:assert_used
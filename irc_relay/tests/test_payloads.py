@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from irc_relay.http_api.server import payload_adapter
+from irc_relay.messages.decoder import decode_message
+from irc_relay.messages.models import EditChange, ProcessedEdit, TextMessage, WarnedUser
+
+EDIT_PAYLOAD = {
+    "change": {"title": "Example", "user": "Someone", "url": "https://example.invalid/", "revision_id": 1},
+    "reverted": True,
+    "comment": None,
+    "score": 0.9,
+}
+
+
+class TestPayloads:
+
+    @pytest.mark.parametrize("decode", [payload_adapter.validate_python, decode_message], ids=["http", "line"])
+    def test_decodes_by_shape(self, decode):
+        assert decode({"channel": "#channel", "string": "hi"}) == TextMessage(  # nosec B101:assert_used
+            channel="#channel", string="hi"
+        )
+        assert decode({"username": "Someone", "level": 2}) == WarnedUser(  # nosec B101:assert_used
+            username="Someone", level=2
+        )
+        assert decode(EDIT_PAYLOAD) == ProcessedEdit(  # nosec B101:assert_used
+            change=EditChange(title="Example", user="Someone", url="https://example.invalid/", revision_id=1),
+            reverted=True,
+            comment=None,
+            score=0.9,
+        )
+
+    @pytest.mark.parametrize("decode", [payload_adapter.validate_python, decode_message], ids=["http", "line"])
+    def test_explicit_type(self, decode):
+        assert isinstance(decode({"type": "warning", "username": "Someone", "level": 2}), WarnedUser)  # nosec B101
+        with pytest.raises(ValueError):
+            decode({"type": "unknown", "channel": "#channel", "string": "hi"})
+
+    def test_only_matching_type_is_reported(self):
+        with pytest.raises(ValidationError) as e:
+            payload_adapter.validate_json(json.dumps({"channel": "#channel"}))
+        assert [error["loc"] for error in e.value.errors()] == [("text", "string")]  # nosec B101:assert_used
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+from freezegun import freeze_time
+
+from irc_relay.senders.irc import IrcClient
+from irc_relay.senders.pool import IrcClientPool
+from irc_relay.senders.queue import OutboundMessage
+
+CHANNELS = [f"#channel-{x}" for x in range(0, 20)]
+
+
+def _members(count: int) -> list[IrcClient]:
+    members = [IrcClient("localhost", 6667, f"Relay{x}", None, None, CHANNELS, None) for x in range(0, count)]
+    for member in members:
+        for channel in CHANNELS:
+            asyncio.run(member._join_callback(nick=member.nick, channel=channel))
+    return members
+
+
+class TestRouting:
+
+    def test_channel_shard_is_stable(self):
+        members = _members(3)
+        pool = IrcClientPool("pool", members, "channel_shard")
+        routes = {channel: pool._select_member(channel) for channel in CHANNELS}
+        assert len(set(routes.values())) == 3  # nosec B101:assert_used
+
+        # The same for every message, and for a pool built again from the same members
+        again = IrcClientPool("pool", members, "channel_shard")
+        assert all(pool._select_member(c) is routes[c] for c in CHANNELS)  # nosec B101:assert_used
+        assert all(again._select_member(c.upper()) is routes[c] for c in CHANNELS)  # nosec B101:assert_used
+
+        # Only the channels of a member that is down move
+        down = members[0]
+        for channel in CHANNELS:
+            down._can_accept_messages[channel] = False
+        for channel, member in routes.items():
+            assert pool._select_member(channel) is not down  # nosec B101:assert_used
+            if member is not down:
+                assert pool._select_member(channel) is member  # nosec B101:assert_used
+
+    def test_least_loaded(self):
+        members = _members(3)
+        pool = IrcClientPool("pool", members, "least_loaded")
+        for member, depth in zip(members, (3, 1, 2)):
+            for x in range(0, depth):
+                member._outbound_queue.put("#channel-0", f"{x}", 30)
+        assert pool._select_member("#channel-0") is members[1]  # nosec B101:assert_used
+
+        # Members that can not send to the channel are skipped however short their queue
+        members[1]._can_accept_messages["#channel-0"] = False
+        assert pool._select_member("#channel-0") is members[2]  # nosec B101:assert_used
+
+
+class TestRerouting:
+
+    @freeze_time()
+    def test_disconnect_keeps_remaining_ttl(self):
+        lost, remaining = _members(2)
+        pool = IrcClientPool("pool", [lost, remaining], "failover")
+        for channel in CHANNELS:
+            lost._can_accept_messages[channel] = False
+
+        now = time.monotonic()
+        pending = [
+            OutboundMessage(channel="#channel-0", string="fresh", expires_at=now + 20),
+            OutboundMessage(channel="#channel-0", string="expired", expires_at=now - 1),
+            OutboundMessage(channel="#channel-1", string="revert", expires_at=now + 5, priority=True),
+        ]
+        asyncio.run(pool._member_disconnected(lost, pending))
+
+        queued = remaining._outbound_queue.drain()
+        assert [message.string for message in queued] == ["fresh", "revert"]  # nosec B101:assert_used
+        assert [message.expires_at for message in queued] == [now + 20, now + 5]  # nosec B101:assert_used
+        assert queued[1].priority  # nosec B101:assert_used
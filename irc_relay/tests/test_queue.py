@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.senders.queue import OutboundQueue
+
+
+def _get_channels(queue: OutboundQueue, count: int, channel_delay=None) -> list[str]:
+    async def run():
+        if channel_delay:
+            return [(await queue.get(channel_delay)).channel for _ in range(0, count)]
+        return [(await queue.get()).channel for _ in range(0, count)]
+
+    return asyncio.run(run())
+
+
+def _fill(queue: OutboundQueue, channel: str, count: int) -> None:
+    for x in range(0, count):
+        assert queue.put(channel, f"{channel} {x}", 30)  # nosec B101:assert_used
+
+
+class TestOutboundQueue:
+
+    def test_channels_share_by_weight(self):
+        queue = OutboundQueue(100, {"#reverts": 3})
+        _fill(queue, "#huggle", 20)
+        _fill(queue, "#reverts", 20)
+        assert _get_channels(queue, 8) == ["#huggle", "#reverts", "#reverts", "#reverts"] * 2  # nosec B101:assert_used
+
+    def test_fractional_weights_carry_over(self):
+        queue = OutboundQueue(100, {"#huggle": 0.5})
+        _fill(queue, "#huggle", 20)
+        _fill(queue, "#reverts", 20)
+        assert _get_channels(queue, 6).count("#huggle") == 2  # nosec B101:assert_used
+
+    def test_priority_goes_ahead_in_order(self):
+        queue = OutboundQueue(100)
+        _fill(queue, "#huggle", 3)
+        queue.put("#huggle", "ROLLBACK 1", 30, priority=True)
+        queue.put("#huggle", "ROLLBACK 2", 30, priority=True)
+
+        async def run():
+            return [(await queue.get()).string for _ in range(0, 5)]
+
+        assert asyncio.run(run()) == [  # nosec B101:assert_used
+            "ROLLBACK 1",
+            "ROLLBACK 2",
+            "#huggle 0",
+            "#huggle 1",
+            "#huggle 2",
+        ]
+
+    def test_idle_share_is_borrowed(self):
+        queue = OutboundQueue(100, {"#reverts": 3})
+        _fill(queue, "#huggle", 5)
+        assert _get_channels(queue, 5) == ["#huggle"] * 5  # nosec B101:assert_used
+        assert len(queue) == 0  # nosec B101:assert_used
+
+    def test_held_back_channel_is_skipped(self):
+        queue = OutboundQueue(100)
+        _fill(queue, "#huggle", 5)
+        _fill(queue, "#reverts", 5)
+        channels = _get_channels(queue, 5, lambda channel: 10 if channel == "#huggle" else 0)
+        assert channels == ["#reverts"] * 5  # nosec B101:assert_used
+
+    def test_drain_keeps_arrival_order(self):
+        queue = OutboundQueue(100)
+        for x in range(0, 6):
+            queue.put("#huggle" if x % 2 else "#reverts", str(x), 30)
+            time.sleep(0.001)
+        assert [message.string for message in queue.drain()] == [str(x) for x in range(0, 6)]  # nosec B101:assert_used
+        assert len(queue) == 0  # nosec B101:assert_used
+
+    def test_rejects_when_full(self):
+        queue = OutboundQueue(2)
+        _fill(queue, "#huggle", 2)
+        assert not queue.put("#reverts", "full", 30)  # nosec B101:assert_used
+
+    def test_weights_must_be_positive(self, monkeypatch):
+        monkeypatch.setenv("IRC_RELAY_TEST_CHANNEL_SHARES", '{"#huggle": 0}')
+        with pytest.raises(ValueError):
+            SlidingWindowRateLimitConfig.from_environment("IRC_RELAY_TEST")
+
+    def test_channels_capped_at_their_share(self):
+        queue = OutboundQueue(10, {"#reverts": 4}, ["#huggle", "#reverts"])
+        assert [queue.put("#huggle", f"{x}", 30) for x in range(0, 3)] == [True, True, False]  # nosec B101:assert_used
+        assert all(queue.put("#reverts", f"{x}", 30) for x in range(0, 8))  # nosec B101:assert_used
+        assert not queue.put("#reverts", "full", 30)  # nosec B101:assert_used
+
+        # Removing a channel hands its share to the rest
+        queue.discard("#huggle")
+        queue.set_channels(["#reverts"])
+        assert queue.capacity("#reverts") == 10  # nosec B101:assert_used
+        assert queue.put("#reverts", "room", 30)  # nosec B101:assert_used
@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import tempfile
+
+import pytest
+from freezegun import freeze_time
+
+from irc_relay.config.rate_limit import SlidingWindowRateLimitConfig
+from irc_relay.rate_limit.adaptive import AdaptiveRateLimit
+from irc_relay.rate_limit.factory import reconfigure_rate_limiter
+from irc_relay.rate_limit.ring_counter import RingCounterRateLimit
+from irc_relay.rate_limit.shared import SharedSlidingWindowRateLimit
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+
+
+def _shared_rate_limit(buckets: list[BucketConfig]) -> SharedSlidingWindowRateLimit:
+    return SharedSlidingWindowRateLimit(buckets, os.path.join(tempfile.mkdtemp(), "rate_limit"))
+
+
+def _count_allowed(path: str, attempts: int) -> int:
+    rate_limiter = SharedSlidingWindowRateLimit([BucketConfig(window=60, limit=20)], path)
+    return sum(1 for _ in range(0, attempts) if rate_limiter.should_allow())
+
+
+RATE_LIMITERS = [SlidingWindowRateLimit, RingCounterRateLimit, _shared_rate_limit, AdaptiveRateLimit]
+
+
+@pytest.mark.parametrize(
+    "rate_limiter_class", RATE_LIMITERS, ids=["sliding_window", "ring_counter", "shared", "adaptive"]
+)
+class TestRateLimiter:
+
+    @freeze_time()
+    def test_single_bucket(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=25)])
+        for x in range(0, 50):
+            assert rate_limiter.should_allow() is (x < 25), f"Instance {x}"  # nosec B101:assert_used
+
+    def test_throughput_is_the_tightest_bucket(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=2), BucketConfig(window=10, limit=5)])
+        assert rate_limiter.throughput() == 0.5  # nosec B101:assert_used
+
+    def test_window_recovers(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=5)])
+
+        with freeze_time("2025-09-01 00:00:00"):
+            for x in range(0, 10):
+                assert rate_limiter.should_allow() is (x < 5), f"Instance {x}"  # nosec B101:assert_used
+
+        with freeze_time("2025-09-01 00:00:02"):
+            for x in range(0, 10):
+                assert rate_limiter.should_allow() is (x < 5), f"Instance {x}"  # nosec B101:assert_used
+
+    def test_never_exceeds_limit_in_window(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=5)])
+
+        # Attempt a message every 50ms for 5 seconds; no 1 second span may contain more than 5 allowed
+        allowed = []
+        for tick in range(0, 100):
+            with freeze_time(f"2025-09-01 00:00:{tick // 20:02}.{(tick % 20) * 50:03}"):
+                if rate_limiter.should_allow():
+                    allowed.append(tick)
+
+        assert allowed  # nosec B101:assert_used
+        for i, start in enumerate(allowed):
+            in_window = [tick for tick in allowed[i:] if tick < start + 20]
+            assert len(in_window) <= 5, f"Window starting {start}: {in_window}"  # nosec B101:assert_used
+
+    def test_rejection_does_not_charge_other_buckets(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=5), BucketConfig(window=30, limit=5)])
+
+        with freeze_time("2025-09-01 00:00:00"):
+            for _ in range(0, 5):
+                assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+
+        # The 30 second bucket is full, rejections must not use up the 1 second bucket
+        with freeze_time("2025-09-01 00:00:05"):
+            for _ in range(0, 10):
+                assert rate_limiter.should_allow() is False  # nosec B101:assert_used
+
+        with freeze_time("2025-09-01 00:00:35"):
+            for x in range(0, 10):
+                assert rate_limiter.should_allow() is (x < 5), f"Instance {x}"  # nosec B101:assert_used
+
+    def test_time_until_allowed(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=2), BucketConfig(window=30, limit=3)])
+
+        with freeze_time("2025-09-01 00:00:00"):
+            assert rate_limiter.time_until_allowed() == 0  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert 0 < rate_limiter.time_until_allowed() <= 1.1  # nosec B101:assert_used
+
+        with freeze_time("2025-09-01 00:00:02"):
+            assert rate_limiter.time_until_allowed() == 0  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert 28 <= rate_limiter.time_until_allowed() <= 31.01  # nosec B101:assert_used
+
+    def test_time_until_allowed_is_accurate(self, rate_limiter_class):
+        rate_limiter = rate_limiter_class([BucketConfig(window=1, limit=1)])
+
+        with freeze_time("2025-09-01 00:00:00") as frozen:
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            frozen.tick(rate_limiter.time_until_allowed())
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+
+
+class TestSharedRateLimiter:
+
+    @freeze_time()
+    def test_instances_share_budget(self, tmp_path):
+        buckets = [BucketConfig(window=1, limit=5)]
+        first = SharedSlidingWindowRateLimit(buckets, str(tmp_path / "rate_limit"))
+        second = SharedSlidingWindowRateLimit(buckets, str(tmp_path / "rate_limit"))
+
+        assert [first.should_allow() for _ in range(0, 3)] == [True] * 3  # nosec B101:assert_used
+        assert [second.should_allow() for _ in range(0, 3)] == [True, True, False]  # nosec B101:assert_used
+        assert first.should_allow() is False  # nosec B101:assert_used
+        assert first.bucket_utilisation() == {"5/1s": 1.0}  # nosec B101:assert_used
+
+    @freeze_time()
+    def test_changed_buckets_use_separate_state(self, tmp_path):
+        first = SharedSlidingWindowRateLimit([BucketConfig(window=1, limit=1)], str(tmp_path / "rate_limit"))
+        assert first.should_allow() is True  # nosec B101:assert_used
+
+        second = SharedSlidingWindowRateLimit([BucketConfig(window=1, limit=2)], str(tmp_path / "rate_limit"))
+        assert [second.should_allow() for _ in range(0, 3)] == [True, True, False]  # nosec B101:assert_used
+
+        # The first file is left as it was, still mapped and still full
+        assert first.should_allow() is False  # nosec B101:assert_used
+        assert first.bucket_utilisation() == {"1/1s": 1.0}  # nosec B101:assert_used
+
+    def test_foreign_file_is_refused(self, tmp_path):
+        buckets = [BucketConfig(window=1, limit=1)]
+        first = SharedSlidingWindowRateLimit(buckets, str(tmp_path / "rate_limit"))
+        with open(first._path, "r+b") as f:
+            f.write(b"garbage!")
+
+        with pytest.raises(ValueError):
+            SharedSlidingWindowRateLimit(buckets, str(tmp_path / "rate_limit"))
+        assert os.path.getsize(first._path) == first._mmap.size()  # nosec B101:assert_used
+
+    def test_atomic_across_processes(self, tmp_path):
+        path = str(tmp_path / "rate_limit")
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            allowed = pool.starmap(_count_allowed, [(path, 50)] * 4)
+        assert sum(allowed) == 20  # nosec B101:assert_used
+
+
+class TestAdaptiveRateLimiter:
+
+    @freeze_time()
+    def test_flood_warning_lowers_limit(self):
+        rate_limiter = AdaptiveRateLimit([BucketConfig(window=30, limit=100)], min_scale=0.1)
+        rate_limiter.observe_flood_warning()
+        assert rate_limiter.bucket_limits() == {"100/30s": 50}  # nosec B101:assert_used
+        for x in range(0, 60):
+            assert rate_limiter.should_allow() is (x < 50), f"Instance {x}"  # nosec B101:assert_used
+
+        # Already over the new limit, so capacity only returns once enough of the window has expired
+        rate_limiter.observe_flood_warning()
+        assert rate_limiter.bucket_limits() == {"100/30s": 25}  # nosec B101:assert_used
+        assert 30 <= rate_limiter.time_until_allowed() <= 30.01  # nosec B101:assert_used
+
+    def test_stays_within_bounds(self):
+        rate_limiter = AdaptiveRateLimit([BucketConfig(window=1, limit=10)], min_scale=0.5, max_scale=2)
+
+        with freeze_time("2025-09-01 00:00:00"):
+            for _ in range(0, 10):
+                rate_limiter.observe_flood_warning()
+            assert rate_limiter.scale == 0.5  # nosec B101:assert_used
+
+            # No recovery while the flood warning is recent
+            rate_limiter.observe_round_trip(0.1)
+            assert rate_limiter.scale == 0.5  # nosec B101:assert_used
+
+        with freeze_time("2025-09-01 00:05:00"):
+            for _ in range(0, 100):
+                rate_limiter.observe_round_trip(0.1)
+            assert rate_limiter.scale == 2  # nosec B101:assert_used
+            assert rate_limiter.bucket_limits() == {"10/1s": 20}  # nosec B101:assert_used
+
+            # A round trip well above the recent best means the server is holding our lines back
+            rate_limiter.observe_round_trip(5)
+            assert rate_limiter.scale == 1.6  # nosec B101:assert_used
+
+
+class TestReconfigure:
+
+    @freeze_time()
+    def test_keeps_history(self):
+        rate_limiter = SlidingWindowRateLimit([BucketConfig(window=60, limit=10)])
+        for _ in range(0, 5):
+            assert rate_limiter.should_allow()  # nosec B101:assert_used
+
+        assert rate_limiter.reconfigure("sliding_window", [BucketConfig(window=60, limit=7)])  # nosec B101:assert_used
+        for x in range(0, 5):
+            assert rate_limiter.should_allow() is (x < 2), f"Instance {x}"  # nosec B101:assert_used
+
+    def test_adaptive_scale_bounds_applied(self):
+        buckets = [BucketConfig(window=60, limit=10)]
+        rate_limiter = AdaptiveRateLimit(buckets, min_scale=0.25, max_scale=1.0)
+        config = SlidingWindowRateLimitConfig(buckets=buckets, engine="adaptive", adaptive_max_scale=0.5)
+        assert reconfigure_rate_limiter(rate_limiter, config)  # nosec B101:assert_used
+        assert rate_limiter.scale == 0.5  # nosec B101:assert_used
+
+        config.adaptive_min_scale, config.adaptive_max_scale = 2.0, 3.0
+        assert reconfigure_rate_limiter(rate_limiter, config)  # nosec B101:assert_used
+        assert rate_limiter.scale == 2.0  # nosec B101:assert_used
+
+    def test_other_engine_is_not_reconfigured(self):
+        rate_limiter = SlidingWindowRateLimit([BucketConfig(window=60, limit=10)])
+        assert not rate_limiter.reconfigure(
+            "ring_counter", [BucketConfig(window=60, limit=10)]
+        )  # nosec B101:assert_used
@@ -0,0 +1,122 @@
+import asyncio
+
+from freezegun import freeze_time
+
+from irc_relay.config.sender import CbngReceiverConfig
+from irc_relay.messages import templates
+from irc_relay.messages.dispatcher import ClueBotNGIrcReceiver
+from irc_relay.messages.models import EditChange, ProcessedEdit, WarnedUser
+from irc_relay.rate_limit.sliding_window import BucketConfig, SlidingWindowRateLimit
+from irc_relay.senders.base import IrcSender
+from irc_relay.senders.irc import IrcClient
+
+
+class _PressuredSender(IrcSender):
+    def __init__(self, pressure: float) -> None:
+        self.current_pressure = pressure
+        self.sent: list[str] = []
+        self.priority: list[str] = []
+
+    async def send_to_channel(
+        self, channel: str, string: str, ttl: float | None = None, priority: bool = False
+    ) -> None:
+        self.sent.append(string)
+        if priority:
+            self.priority.append(string)
+
+    async def update_channels(self, channels: list[str]) -> None: ...
+
+    def update_rate_limiter(self, config) -> None: ...
+
+    async def run(self) -> None: ...
+
+    async def shutdown(self) -> None: ...
+
+    def pressure(self, channel: str) -> float:
+        return self.current_pressure
+
+
+def _edit(revision_id: int, score: float, reverted: bool = False) -> ProcessedEdit:
+    return ProcessedEdit(
+        change=EditChange(title="Page", user="User", url="https://example.org", revision_id=revision_id),
+        reverted=reverted,
+        comment=None,
+        score=score,
+    )
+
+
+def _send_all(pressure: float) -> list[str]:
+    sender = _PressuredSender(pressure)
+    receiver = ClueBotNGIrcReceiver(sender, CbngReceiverConfig(revert_channel=None, huggle_channel="#huggle"))
+
+    async def run():
+        await receiver.send_edit(_edit(1, 0.2))
+        await receiver.send_edit(_edit(2, 0.9))
+        await receiver.send_user_warning(WarnedUser(username="User", level=1))
+        await receiver.send_edit(_edit(3, 0.95, reverted=True))
+
+    asyncio.run(run())
+    return [line.split(" ")[0] + " " + line.split(" ")[1] for line in sender.sent]
+
+
+class TestLoadShedding:
+
+    def test_nothing_shed_without_pressure(self):
+        assert _send_all(0.1) == ["SCORED 1", "SCORED 2", "WARN 1", "ROLLBACK 3"]  # nosec B101:assert_used
+
+    def test_low_scores_shed_first(self):
+        assert _send_all(0.6) == ["SCORED 2", "WARN 1", "ROLLBACK 3"]  # nosec B101:assert_used
+
+    def test_reserved_capacity_for_critical_lines(self):
+        assert _send_all(0.85) == ["WARN 1", "ROLLBACK 3"]  # nosec B101:assert_used
+        assert _send_all(0.95) == ["ROLLBACK 3"]  # nosec B101:assert_used
+
+    def test_reverts_skip_coalescing_and_queue(self):
+        sender = _PressuredSender(0.1)
+        receiver = ClueBotNGIrcReceiver(
+            sender, CbngReceiverConfig(revert_channel=None, huggle_channel="#huggle", huggle_coalesce_window=60)
+        )
+
+        async def run():
+            await receiver.send_edit(_edit(1, 0.9))
+            await receiver.send_edit(_edit(2, 0.95, reverted=True))
+
+        asyncio.run(run())
+        assert sender.sent == sender.priority == ["ROLLBACK 2"]  # nosec B101:assert_used
+
+    def test_packed_lines_fit_long_channel_names(self):
+        channel = "#" + "h" * 40
+        sender = _PressuredSender(0)
+        receiver = ClueBotNGIrcReceiver(
+            sender, CbngReceiverConfig(revert_channel=None, huggle_channel=channel, huggle_coalesce_window=60)
+        )
+
+        async def run():
+            for x in range(0, 100):
+                await receiver.send_edit(_edit(1314252000 + x, 0.9))
+            await receiver._huggle_coalescer.flush()
+
+        asyncio.run(run())
+        assert len(sender.sent) > 1  # nosec B101:assert_used
+        assert all(  # nosec B101:assert_used
+            len(string.encode("utf-8")) <= templates.line_budget(channel) for string in sender.sent
+        )
+
+    @freeze_time()
+    def test_pressure_follows_expected_wait(self):
+        # One message every 2s against the default 30s TTL, so each queued message adds 1/15 of the TTL
+        client = IrcClient(
+            "localhost",
+            6667,
+            "Relay",
+            None,
+            None,
+            ["#huggle"],
+            SlidingWindowRateLimit([BucketConfig(window=10, limit=5)]),
+        )
+        assert client.pressure("#huggle") == 0  # nosec B101:assert_used
+
+        for x in range(0, 9):
+            client._outbound_queue.put("#huggle", f"{x}", 30)
+        assert client.pressure("#huggle") == 9 * 2 / 30  # nosec B101:assert_used
+        assert len(client._outbound_queue) / client._outbound_queue.max_size < 0.01  # nosec B101:assert_used
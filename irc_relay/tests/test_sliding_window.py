@@ -35,3 +35,18 @@ class TestSlidingWindowRateLimit:
                         assert rate_limiter.should_allow() is True, f"Instance {instance}"  # nosec B101:assert_used
                     else:
                         assert rate_limiter.should_allow() is False, f"Instance {instance}"  # nosec B101:assert_used
+
+    def test_time_until_allowed(self):
+        rate_limiter = SlidingWindowRateLimit([BucketConfig(window=1, limit=2), BucketConfig(window=30, limit=3)])
+
+        with freeze_time("2025-09-01 00:00:00"):
+            assert rate_limiter.time_until_allowed() == 0  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert 1 <= rate_limiter.time_until_allowed() <= 1.01  # nosec B101:assert_used
+
+        # 1 second bucket has capacity again, 30 second bucket is now full
+        with freeze_time("2025-09-01 00:00:02"):
+            assert rate_limiter.time_until_allowed() == 0  # nosec B101:assert_used
+            assert rate_limiter.should_allow() is True  # nosec B101:assert_used
+            assert 28 <= rate_limiter.time_until_allowed() <= 28.01  # nosec B101:assert_used
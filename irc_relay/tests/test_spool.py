@@ -0,0 +1,38 @@
+from irc_relay.senders.spool import MessageSpool
+
+
+class TestMessageSpool:
+
+    def test_fifo(self, tmp_path):
+        spool = MessageSpool(str(tmp_path / "spool"), 1024)
+        for x in range(0, 5):
+            assert spool.append("#channel", f"message {x}") is True  # nosec B101:assert_used
+
+        assert len(spool) == 5  # nosec B101:assert_used
+        assert [spool.pop().string for _ in range(0, 5)] == [f"message {x}" for x in range(0, 5)]  # nosec B101
+        assert spool.pop() is None  # nosec B101:assert_used
+
+    def test_overwrites_oldest_when_full(self, tmp_path):
+        spool = MessageSpool(str(tmp_path / "spool"), 200)
+        for x in range(0, 50):
+            spool.append("#channel", f"message {x:02}")
+
+        assert spool.used_bytes <= 200  # nosec B101:assert_used
+        messages = [spool.pop().string for _ in range(0, len(spool))]
+        assert messages[-1] == "message 49"  # nosec B101:assert_used
+        assert messages == [f"message {x:02}" for x in range(50 - len(messages), 50)]  # nosec B101:assert_used
+
+    def test_rejects_oversized_message(self, tmp_path):
+        spool = MessageSpool(str(tmp_path / "spool"), 32)
+        assert spool.append("#channel", "x" * 64) is False  # nosec B101:assert_used
+
+    def test_survives_reopen(self, tmp_path):
+        spool = MessageSpool(str(tmp_path / "spool"), 100)
+        for x in range(0, 10):
+            spool.append("#channel", f"wrapped {x}")
+        expected = [spool.peek().string]
+        spool.close()
+
+        spool = MessageSpool(str(tmp_path / "spool"), 100)
+        assert spool.peek().string == expected[0]  # nosec B101:assert_used
+        assert spool.pop().channel == "#channel"  # nosec B101:assert_used
@@ -0,0 +1,45 @@
+import pytest
+
+from irc_relay.messages.templates import LineTemplate, line_budget, truncate_utf8
+
+
+class TestLineTemplate:
+
+    def test_renders_fields_positionally(self):
+        template = LineTemplate("{b} {a:.2f} {{literal}}", ("a", "b"))
+        assert template.render(100, 0.5, "x") == "x 0.50 {literal}"  # nosec B101:assert_used
+
+    def test_rejects_unknown_fields(self):
+        with pytest.raises(ValueError):
+            LineTemplate("{missing}", ("a",))
+        with pytest.raises(ValueError):
+            LineTemplate("{a!x}", ("a",))
+        with pytest.raises(ValueError):
+            LineTemplate("{a:{b}}", ("a", "b"))
+
+    def test_literals_are_not_code(self):
+        template = LineTemplate("\"' \\n {{a}} {a} \x03", ("a",))
+        assert template.render(100, "x") == "\"' \\n {a} x \x03"  # nosec B101:assert_used
+
+    def test_truncated_line_keeps_conversions(self):
+        template = LineTemplate("{a!r} {b}", ("a", "b"), ("b",))
+        assert template.render(100, "x", "y") == "'x' y"  # nosec B101:assert_used
+        assert template.render(8, "x", "long text") == "'x' l…"  # nosec B101:assert_used
+
+    def test_truncates_fields_in_order(self):
+        template = LineTemplate("[{title}] ({comment})", ("title", "comment"), ("comment", "title"))
+
+        line = template.render(20, "Title", "é" * 20)
+        assert len(line.encode("utf-8")) <= 20  # nosec B101:assert_used
+        assert line.startswith("[Title] (é") and line.endswith("…)")  # nosec B101:assert_used
+
+        line = template.render(10, "Long title", "comment")
+        assert len(line.encode("utf-8")) <= 10  # nosec B101:assert_used
+        assert line.endswith("] ()")  # nosec B101:assert_used
+
+    def test_truncate_keeps_characters_whole(self):
+        assert truncate_utf8("ab€€€", 8) == "ab€…"  # nosec B101:assert_used
+        assert truncate_utf8("abc", 3) == "abc"  # nosec B101:assert_used
+
+    def test_line_budget_leaves_room_for_prefix(self):
+        assert line_budget("#channel") + len("PRIVMSG #channel :\r\n") + 100 == 512  # nosec B101:assert_used
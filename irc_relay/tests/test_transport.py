@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from irc_relay.senders.irc import CoalescingWriter, encode_privmsg
+
+
+class _Transport:
+    def __init__(self) -> None:
+        self.writes: list[bytes] = []
+        self.closing = False
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    def is_closing(self) -> bool:
+        return self.closing
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+
+class TestEncodePrivmsg:
+
+    def test_line_breaks_can_not_inject_commands(self):
+        assert encode_privmsg("#one", "a\r\nQUIT :bye\nb\rc") == (  # nosec B101:assert_used
+            b"PRIVMSG #one :a  QUIT :bye b c\r\n"
+        )
+
+    def test_utf8(self):
+        assert encode_privmsg("#one", "Spanish–American") == (  # nosec B101:assert_used
+            "PRIVMSG #one :Spanish–American\r\n".encode("utf-8")
+        )
+
+
+class TestCoalescingWriter:
+
+    def test_coalesces_writes_within_a_tick(self):
+        transport = _Transport()
+        writer = CoalescingWriter()
+        writer.attach(transport)
+
+        async def run():
+            writer.write(b"one\r\n")
+            writer.write(b"two\r\n")
+            assert transport.writes == []  # nosec B101:assert_used
+            await asyncio.sleep(0)
+            writer.write(b"three\r\n")
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert transport.writes == [b"one\r\ntwo\r\n", b"three\r\n"]  # nosec B101:assert_used
+
+    def test_flushes_when_buffer_is_full(self):
+        transport = _Transport()
+        writer = CoalescingWriter(max_buffer=10)
+        writer.attach(transport)
+
+        async def run():
+            writer.write(b"12345")
+            writer.write(b"67890")
+            assert transport.writes == [b"1234567890"]  # nosec B101:assert_used
+            writer.write(b"x")
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert transport.writes == [b"1234567890", b"x"]  # nosec B101:assert_used
+
+    def test_detach_drops_buffer(self):
+        transport = _Transport()
+        writer = CoalescingWriter()
+        writer.attach(transport)
+
+        async def run():
+            writer.write(b"lost\r\n")
+            writer.detach()
+            await asyncio.sleep(0)
+            assert not writer.is_connected()  # nosec B101:assert_used
+
+            transport.closing = True
+            writer.attach(transport)
+            with pytest.raises(RuntimeError):
+                writer.write(b"never\r\n")
+
+        asyncio.run(run())
+        assert transport.writes == []  # nosec B101:assert_used
+
+    def test_times_each_transport_write(self):
+        class _Histogram:
+            def __init__(self) -> None:
+                self.observed: list[float] = []
+
+            def observe(self, value: float) -> None:
+                self.observed.append(value)
+
+        transport, histogram = _Transport(), _Histogram()
+        writer = CoalescingWriter(write_duration=histogram)
+        writer.attach(transport)
+
+        async def run():
+            writer.write(b"one\r\n")
+            writer.write(b"two\r\n")
+            assert histogram.observed == []  # nosec B101:assert_used
+            await asyncio.sleep(0)
+            writer.write(b"three\r\n")
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        # One observation per write handed to the transport, not per message buffered
+        assert len(histogram.observed) == len(transport.writes) == 2  # nosec B101:assert_used